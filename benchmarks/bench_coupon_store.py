@@ -0,0 +1,90 @@
+"""
+Benchmark: indexed coupon store vs. scanning the feed as a Python list.
+
+Generates a synthetic CouponAPI feed, streams it into a throwaway CouponStore
+and compares per-store lookup latency with the substring scan used by
+test_couponapi_csv.py.
+
+    python benchmarks/bench_coupon_store.py --offers 50000 --stores 500
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.coupon_store import CouponStore  # noqa: E402
+
+
+def synthetic_feed(offers, stores, seed=7):
+    rng = random.Random(seed)
+    store_names = [f"Store {i}.com" for i in range(stores)] + ["Walmart.com", "Target"]
+    return {
+        "result": True,
+        "offers": [
+            {
+                "offer_id": str(i),
+                "store": rng.choice(store_names),
+                "title": f"{rng.randint(5, 50)}% off {rng.choice(['groceries', 'electronics', 'home', 'toys'])}",
+                "description": "Limited time offer",
+                "code": rng.choice(["", f"SAVE{i}"]),
+                "categories": rng.choice(["Grocery", "Electronics", "Home & Garden", "Toys"]),
+                "end_date": rng.choice(["", "2099-12-31"]),
+                "status": "new",
+            }
+            for i in range(offers)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=50_000)
+    parser.add_argument("--stores", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    args = parser.parse_args()
+
+    feed = synthetic_feed(args.offers, args.stores)
+    raw = json.dumps(feed)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CouponStore(os.path.join(tmp, "coupons.sqlite3"))
+        start = time.perf_counter()
+        counts = store.ingest_json(io.StringIO(raw))
+        ingest_s = time.perf_counter() - start
+        print(f"ingest: {counts['upserted']:,} offers in {ingest_s:.2f}s ({counts['upserted'] / ingest_s:,.0f}/s)")
+
+        queries = [f"Store {i % args.stores}" for i in range(args.lookups)] + ["walmart"] * 10
+
+        offers = feed["offers"]
+        start = time.perf_counter()
+        for name in queries[:200]:
+            needle = name.lower()
+            [o for o in offers if needle in o.get("store", "").lower()]
+        scan_us = (time.perf_counter() - start) / 200 * 1e6
+
+        store.memo_ttl = 0
+        start = time.perf_counter()
+        for name in queries:
+            store.for_store(name, kind="coupon")
+        indexed_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        store.memo_ttl = 60
+        for name in queries:
+            store.for_store(name, kind="coupon")
+        start = time.perf_counter()
+        for name in queries:
+            store.for_store(name, kind="coupon")
+        memo_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        print(f"list scan:     {scan_us:10.1f} us/lookup")
+        print(f"sqlite index:  {indexed_us:10.1f} us/lookup")
+        print(f"memoized:      {memo_us:10.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
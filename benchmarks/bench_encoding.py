@@ -0,0 +1,109 @@
+"""
+Benchmark: response encoding time and bytes on the wire for /shopping_list_value.
+
+Payloads are built from the recorded SerpApi fixtures: every offer is scored
+and enriched like the pipeline does (quantity fields plus the store's coupon
+and deal lists) and shaped with `analysis_to_dict`. Each payload is encoded
+with FastAPI's default path (jsonable_encoder + JSONResponse), the stdlib
+json module and `responses.dumps`, then compressed with gzip and brotli.
+
+    python benchmarks/bench_encoding.py --items 5 15 30 --num 20
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from smart_budget_mcp.offers import AnalyzedOffer, analysis_to_dict  # noqa: E402
+from smart_budget_mcp.responses import BROTLI_AVAILABLE, ORJSON_AVAILABLE, dumps  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+from stubs import ShoppingReplay  # noqa: E402
+
+COUPONS = [
+    {"offer_id": str(1000 + i), "title": f"{5 + i}% off select items", "description": "Online and in store",
+     "code": f"SAVE{5 + i}", "type": "Code", "store": "walmart", "url": "https://www.walmart.com/",
+     "end_date": "2099-12-31"}
+    for i in range(6)
+]
+
+
+def build_analyses(items, num):
+    """{item: {"best_deal", "all_deals"}} of AnalyzedOffers from the recorded responses."""
+    replay = ShoppingReplay()
+    plan = compile_savings_plan(["Chase Freedom", "Amex Blue Cash"])
+    analyses = {}
+    for i in range(items):
+        query = replay.queries[i % len(replay.queries)]
+        recorded = replay.responses[query]
+        results = recorded["inline_shopping_results"] + recorded["shopping_results"]
+        offers = [
+            {"store": r["source"], "title": r["title"], "price": r["price"], "extracted_price": r["extracted_price"],
+             "link": r["link"], "delivery": r.get("delivery"), "extensions": r.get("extensions"),
+             "thumbnail": r.get("thumbnail")}
+            for r in (results * (num // len(results) + 1))[:num]
+        ]
+        scores = plan.score([o["store"] for o in offers], [o["extracted_price"] for o in offers])
+        analyzed = [
+            AnalyzedOffer(offer, score, 12.0, "oz", round(score.final_price / 12, 4), "rules", COUPONS[:4], COUPONS[4:],
+                          {"window_days": 30, "lowest_price": score.base_price, "typical_price": score.base_price,
+                           "days_observed": 12, "is_lowest": True, "is_sale": False})
+            for offer, score in zip(offers, scores)
+        ]
+        analyses[f"{query} {i}"] = {"best_deal": min(analyzed, key=lambda o: o.score.final_price),
+                                    "all_deals": analyzed}
+    return analyses
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[5, 15, 30])
+    parser.add_argument("--num", type=int, default=20, help="offers per item")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"orjson: {ORJSON_AVAILABLE}  brotli: {BROTLI_AVAILABLE}")
+    print(f"{'items':>6} {'shape':<8}{'encoder':<28}{'encode ms':>10}{'bytes':>10}{'gzip':>9}{'gz ms':>7}"
+          f"{'br':>9}{'br ms':>7}")
+    for items in args.items:
+        analyses = build_analyses(items, args.num)
+        for shape, detail in (("default", False), ("detail", True)):
+            content = {item: analysis_to_dict(a, detail=detail) for item, a in analyses.items()}
+            encoders = [
+                ("fastapi (jsonable_encoder)", lambda: JSONResponse(jsonable_encoder(content)).body),
+                ("json.dumps", lambda: json.dumps(content, separators=(",", ":")).encode("utf-8")),
+                ("responses.dumps", lambda: dumps(content)),
+            ]
+            for name, encode in encoders:
+                encode_ms, body = best_of(encode, args.repeat)
+                gzip_ms, gzipped = best_of(lambda: gzip.compress(body, compresslevel=5, mtime=0), 3)
+                row = (f"{items:>6} {shape:<8}{name:<28}{encode_ms:>10.2f}{len(body):>10,}{len(gzipped):>9,}"
+                       f"{gzip_ms:>7.2f}")
+                if BROTLI_AVAILABLE:
+                    import brotli
+                    br_ms, compressed = best_of(lambda: brotli.compress(body, quality=4), 3)
+                    row += f"{len(compressed):>9,}{br_ms:>7.2f}"
+                print(row)
+        # Shaping happens once, before encoding, so it is not in the encode times above.
+        shape_ms, _ = best_of(lambda: {item: analysis_to_dict(a) for item, a in analyses.items()}, args.repeat)
+        print(f"{items:>6} {'':<8}{'(analysis_to_dict shaping)':<28}{shape_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
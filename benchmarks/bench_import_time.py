@@ -0,0 +1,99 @@
+"""
+Benchmark: cold-start import time of the FastAPI app and the MCP entry point.
+
+Each target is imported in a fresh interpreter several times; the script
+reports the median and best import time and, with --top, the slowest
+modules from one `python -X importtime` run. Heavy optional backends
+(ollama, httpx, numpy) should not show up, since they load on first use.
+
+    python benchmarks/bench_import_time.py --repeat 7 --top 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+TARGETS = {
+    "fastapi app": "smart_budget_mcp.main",
+    "mcp server": "smart_budget_mcp.mcp_server",
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+lazy = [m for m in ("ollama", "httpx", "numpy") if m in sys.modules]
+print(f"{{elapsed:.3f}} {{','.join(lazy)}}")
+"""
+
+
+def run_probe(module, env, cwd):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)], env=env, cwd=cwd,
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), out[1].split(",") if len(out) > 1 else []
+
+
+def slowest_modules(module, env, cwd, top):
+    """(cumulative ms, module) for the `top` slowest imports under `module`."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, cwd=cwd,
+        capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest imports per target")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    # A scratch working directory keeps the SQLite files the app opens at import out of the repo.
+    with tempfile.TemporaryDirectory() as cwd:
+        env = {**os.environ, "PYTHONPATH": os.path.abspath(SRC), "PYTHONDONTWRITEBYTECODE": "1"}
+        for label, module in TARGETS.items():
+            run_probe(module, env, cwd)  # warm the OS file cache and bytecode
+            samples, loaded = [], []
+            for _ in range(args.repeat):
+                ms, loaded = run_probe(module, env, cwd)
+                samples.append(ms)
+            results[label] = {
+                "module": module,
+                "median_ms": round(statistics.median(samples), 1),
+                "min_ms": round(min(samples), 1),
+                "eager_heavy_modules": loaded,
+            }
+            if args.top:
+                results[label]["slowest"] = [
+                    {"module": name.strip(), "cumulative_ms": ms} for ms, name in slowest_modules(module, env, cwd, args.top)
+                ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for label, result in results.items():
+        heavy = ", ".join(result["eager_heavy_modules"]) or "none"
+        print(f"{label:<12} median {result['median_ms']:7.1f} ms   min {result['min_ms']:7.1f} ms   "
+              f"eager heavy modules: {heavy}")
+        for row in result.get("slowest", []):
+            print(f"    {row['cumulative_ms']:8.1f} ms  {row['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: budget-constrained purchase planning over large lists.
+
+Builds synthetic wishlist and grocery lists with analyzed offers spread over
+several stores (some charging delivery), then times PurchasePlanner.solve
+at a few budgets per list size.
+
+    python benchmarks/bench_planner.py --sizes 100 300 1000 --stores 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.offers import AnalyzedOffer  # noqa: E402
+from smart_budget_mcp.planner import PurchasePlanner, plan_items  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+
+STORES = ["Walmart", "Target", "QFC", "Safeway", "Instacart", "Costco", "Amazon.com", "Kroger", "Whole Foods",
+          "Trader Joe's", "Fred Meyer", "Albertsons"]
+
+
+def make_lists(rng, size, stores, offers_per_item):
+    fees = {store: rng.choice([0, 0, 3.99, 5.99, 9.99]) for store in stores}
+    plan = compile_savings_plan([])
+    wishlist, groceries, analyses = [], [], {}
+    for i in range(size):
+        name = f"item {i}"
+        if i % 3:
+            groceries.append({"name": name, "quantity": rng.randint(1, 3),
+                              "frequency": rng.choice(["daily", "weekly", "biweekly", "monthly"])})
+            base = rng.uniform(1, 12)
+        else:
+            wishlist.append({"name": name, "urgency": rng.choice(["high", "medium", "low", "not set"])})
+            base = rng.uniform(10, 200)
+        offers = [{"store": store, "delivery": f"Delivery ${fees[store]}" if fees[store] else "Free pickup today"}
+                  for store in rng.sample(stores, min(offers_per_item, len(stores)))]
+        prices = [round(base * rng.uniform(0.8, 1.2), 2) for _ in offers]
+        scores = plan.score([offer["store"] for offer in offers], prices)
+        analyses[name] = {"all_deals": [AnalyzedOffer(offer, score) for offer, score in zip(offers, scores)]}
+    return wishlist, groceries, analyses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--stores", type=int, default=10)
+    parser.add_argument("--offers", type=int, default=5, help="offers per item")
+    parser.add_argument("--budget-fractions", type=float, nargs="+", default=[0.25, 0.5, 0.9],
+                        help="budgets as a fraction of buying everything at its cheapest offer")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    stores = STORES[:args.stores]
+    print(f"{'items':>6}{'budget':>10}{'solve ms':>10}{'value':>8}{'max':>7}{'stores':>8}{'fees':>8}{'sets':>6}")
+    for size in args.sizes:
+        wishlist, groceries, analyses = make_lists(rng, size, stores, args.offers)
+        items = plan_items(wishlist, groceries, analyses)
+        everything = sum(min(o.final_effective_price for o in item.options.values()) * item.units
+                         for item in items if item.options)
+        for fraction in args.budget_fractions:
+            budget = everything * fraction
+            start = time.perf_counter()
+            plan = PurchasePlanner(items).solve(budget)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"{size:>6}{budget:>10.0f}{elapsed_ms:>10.1f}{plan['value']:>8}{plan['max_value']:>7}"
+                  f"{len(plan['stores']):>8}{plan['delivery_fees']:>8.2f}{plan['solver']['store_sets_evaluated']:>6}")
+
+
+if __name__ == "__main__":
+    main()
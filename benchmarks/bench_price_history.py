@@ -0,0 +1,66 @@
+"""
+Benchmark: price history appends and "lowest in N days" / "is this a sale" queries.
+
+Records a synthetic year of daily observations for many series, then times
+point queries against warm (in-memory) and cold (loaded from SQLite) series.
+
+    python benchmarks/bench_price_history.py --series 2000 --days 365
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.price_history import DAY, PriceHistory  # noqa: E402
+
+STORES = ["Walmart", "Target", "QFC", "Safeway", "Instacart"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=3, help="observations per series per day")
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    products = [(f"Product {i} 12 oz", STORES[i % len(STORES)], 8 + rng.random() * 20) for i in range(args.series)]
+    start_day = int(time.time() // DAY) - args.days + 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = PriceHistory(os.path.join(tmp, "price_history.sqlite3"))
+        start = time.perf_counter()
+        for d in range(args.days):
+            now = (start_day + d) * DAY + 3600
+            for _ in range(args.per_day):
+                offers = [
+                    {"title": title, "store": store, "extracted_price": round(base * rng.uniform(0.8, 1.1), 2)}
+                    for title, store, base in products
+                ]
+                history.record(offers, "Seattle", now=now)
+        record_s = time.perf_counter() - start
+        total = args.series * args.days * args.per_day
+        print(f"recorded {total:,} observations in {record_s:.2f} s ({total / record_s:,.0f}/s)")
+        print("stats:", history.stats())
+
+        def timed_queries(history, label):
+            start = time.perf_counter()
+            sales = 0
+            for _ in range(args.queries):
+                title, store, base = rng.choice(products)
+                insight = history.insight(title, store, "Seattle", base * 0.8)
+                sales += bool(insight and insight["is_sale"])
+            per_query_us = (time.perf_counter() - start) / args.queries * 1e6
+            print(f"{label:<28} {per_query_us:8.1f} us/query   ({sales} sales flagged)")
+
+        timed_queries(history, "insight (warm, 30d):")
+        timed_queries(PriceHistory(history.path), "insight (cold then warm):")
+
+
+if __name__ == "__main__":
+    main()
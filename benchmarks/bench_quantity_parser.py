@@ -0,0 +1,94 @@
+"""
+Benchmark: rule-based quantity parser vs. the LLM extractor.
+
+Runs the compiled rule engine over a labelled corpus of offer titles and
+reports throughput, label accuracy and how many titles would still fall back
+to the LLM. With --llm it also runs `extract_quantity_with_llm` (needs a local
+Ollama with gemma3) and reports its throughput and agreement with the rules.
+
+    python benchmarks/bench_quantity_parser.py [--corpus PATH] [--repeat 200] [--llm]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.quantity_parser import MIN_CONFIDENCE, normalize, parse_quantity  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "quantity_titles.jsonl")
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def agrees(quantity, unit, expected_quantity, expected_unit, tolerance=0.02):
+    if expected_quantity is None or quantity is None:
+        return expected_quantity is None and quantity is None
+    return unit == expected_unit and abs(quantity - expected_quantity) <= tolerance * expected_quantity
+
+
+async def run_llm(corpus):
+    from smart_budget_mcp.main import extract_quantity_with_llm
+
+    results = []
+    start = time.perf_counter()
+    for row in corpus:
+        quantity, unit, _ = await extract_quantity_with_llm(row["title"], row["price"])
+        normalized = None
+        if quantity is not None and unit:
+            try:
+                normalized = normalize(float(quantity), str(unit))
+            except (TypeError, ValueError):
+                normalized = None
+        results.append(normalized or (None, None))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the corpus for the throughput timing")
+    parser.add_argument("--llm", action="store_true", help="also run the Ollama extractor")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    parsed = [parse_quantity(row["title"], row["price"]) for row in corpus]
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for row in corpus:
+            parse_quantity(row["title"], row["price"])
+    elapsed = time.perf_counter() - start
+    calls = args.repeat * len(corpus)
+
+    confident = [p for p in parsed if p.confidence >= MIN_CONFIDENCE]
+    correct = sum(
+        agrees(p.total_quantity, p.unit_type, row["quantity"], row["unit"]) for p, row in zip(parsed, corpus)
+    )
+    print(f"corpus: {len(corpus)} titles ({args.corpus})")
+    print(f"rules: {calls / elapsed:,.0f} titles/s, {elapsed / calls * 1e6:.1f} us/title")
+    print(f"rules: {correct}/{len(corpus)} match labels, "
+          f"{len(corpus) - len(confident)} below confidence {MIN_CONFIDENCE} -> LLM fallback")
+    for p, row in zip(parsed, corpus):
+        if not agrees(p.total_quantity, p.unit_type, row["quantity"], row["unit"]):
+            print(f"  miss: {row['title']!r}: got {p.total_quantity} {p.unit_type} "
+                  f"(conf {p.confidence}), expected {row['quantity']} {row['unit']}")
+
+    if args.llm:
+        llm_results, llm_elapsed = asyncio.run(run_llm(corpus))
+        llm_correct = sum(agrees(q, u, row["quantity"], row["unit"]) for (q, u), row in zip(llm_results, corpus))
+        agreement = sum(
+            agrees(q, u, p.total_quantity, p.unit_type) for (q, u), p in zip(llm_results, parsed)
+        )
+        print(f"llm: {len(corpus) / llm_elapsed:,.1f} titles/s, {llm_elapsed / len(corpus) * 1e3:.0f} ms/title")
+        print(f"llm: {llm_correct}/{len(corpus)} match labels, {agreement}/{len(corpus)} agree with rules")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Benchmark: the HTTP app end to end against recorded upstream responses.
+
+Starts the SerpApi, CouponAPI and Ollama replay stubs from stubs.py (with
+per-provider latency), runs the app under uvicorn in a subprocess pointed at
+them, then drives /shopping_list_value and /store_coupons_deals at each
+concurrency and list size. Reports p50/p95/p99 latency, throughput and the
+server's peak RSS, and writes everything as JSON for comparing commits.
+
+    python benchmarks/bench_replay.py --sizes 1 5 15 --concurrency 1 8 32 --json replay.json
+    python benchmarks/bench_replay.py --compare replay.json --max-regression 0.15
+
+`--cache cold` (the default) expires the shopping and LLM caches immediately
+so every request replays its upstream calls; `--cache warm` measures the
+cached path.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stubs import couponapi_stub, ollama_stub, serpapi_stub, ShoppingReplay  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+SCENARIO_KEY = ("endpoint", "cache", "items", "concurrency")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+def peak_rss_mb(pid):
+    """High-water resident set size of `pid` (Linux /proc; None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- App Server ---
+class AppServer:
+    """
+    The FastAPI app under uvicorn in a child process, with state files in a
+    temp dir. With `workers` it is started through the multi-worker launcher.
+    """
+
+    def __init__(self, port, stubs, cache, workdir, workers=None):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.path.join(ROOT, "src"),
+            # Keep a developer's .env (and real API keys) out of the run.
+            "DOTENV_PATH": os.devnull,
+            "SERPAPI_KEY": "replay",
+            "SERPAPI_BASE_URL": stubs["serpapi"].base_url,
+            "COUPONSAPI_KEY": "replay",
+            "COUPONAPI_BASE_URL": stubs["couponapi"].base_url,
+            "OLLAMA_HOST": stubs["ollama"].base_url,
+            "PRICE_WATCH_ENABLED": "0",
+            # Measure the app, not the provider quotas.
+            "SERPAPI_RATE_LIMIT": "0",
+            "COUPONAPI_RATE_LIMIT": "0",
+            "LLM_CACHE_BACKEND": "memory",
+            "STATE_STORE_PATH": os.path.join(workdir, "state.sqlite3"),
+            "COUPON_STORE_PATH": os.path.join(workdir, "coupons.sqlite3"),
+            "PRICE_HISTORY_PATH": os.path.join(workdir, "price_history.sqlite3"),
+        }
+        if cache == "cold":
+            env.update({"SHOPPING_CACHE_TTL": "0", "SHOPPING_CACHE_STALE_TTL": "0", "LLM_CACHE_TTL": "0"})
+        if workers is None:
+            command = ["-m", "uvicorn", "smart_budget_mcp.main:app"]
+        else:
+            command = ["-m", "smart_budget_mcp.workers", "--workers", str(workers), "--state-dir", workdir]
+        self.process = subprocess.Popen(
+            [sys.executable, *command, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env,
+        )
+
+    async def wait_ready(self, client, timeout=30.0):
+        """Waits for the app to answer and for the first coupon sync to land."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"app exited with code {self.process.returncode}")
+            try:
+                stats = (await client.get(f"{self.base_url}/coupons/stats")).json()
+                # Only the leader worker runs the sync; the others see its offers in the shared index.
+                if (stats["sync"] or {}).get("last_success_at") or (stats["sync"] is None and stats["index"]["offers"]):
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+        raise TimeoutError("app did not become ready")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# --- Load ---
+async def drive(client, make_request, requests, concurrency, warmup):
+    """Runs `requests` calls with at most `concurrency` in flight; returns latencies (ms), errors, seconds."""
+    for i in range(warmup):
+        await make_request(i)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                resp = await make_request(i)
+                ok = resp.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def shopping_lists(queries, size, count):
+    """`count` lists of `size` items, rotating through the recorded queries (with variants past the end)."""
+    pool = [q if n == 0 else f"{q} {n + 1}" for n in range(size) for q in queries][:max(size, len(queries))]
+    return [[pool[(i + j) % len(pool)] for j in range(size)] for i in range(count)]
+
+
+async def run_scenarios(args, server, stubs, cache):
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await server.wait_ready(client)
+        queries = ShoppingReplay().queries
+        stores = sorted({r["source"] for doc in ShoppingReplay().responses.values()
+                         for section in ("inline_shopping_results", "shopping_results") for r in doc.get(section, [])})
+        scenarios = [("/shopping_list_value", size, c) for size in args.sizes for c in args.concurrency]
+        scenarios += [("/store_coupons_deals", None, c) for c in args.concurrency]
+        for endpoint, size, concurrency in scenarios:
+            if endpoint == "/shopping_list_value":
+                lists = shopping_lists(queries, size, args.requests + args.warmup)
+
+                def make_request(i, lists=lists):
+                    return client.get(f"{server.base_url}{endpoint}",
+                                      params={"items": lists[i], "location": args.location, "num": args.num})
+            else:
+                def make_request(i):
+                    return client.get(f"{server.base_url}{endpoint}", params={"store": stores[i % len(stores)]})
+
+            upstream_before = {name: len(stub.requests) for name, stub in stubs.items()}
+            latencies, errors, elapsed = await drive(client, make_request, args.requests, concurrency, args.warmup)
+            result = {
+                "endpoint": endpoint,
+                "cache": cache,
+                "items": size,
+                "concurrency": concurrency,
+                "requests": args.requests,
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+                "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+                "peak_rss_mb": peak_rss_mb(server.process.pid),
+                "upstream_calls": {name: len(stub.requests) - upstream_before[name] for name, stub in stubs.items()},
+            }
+            results.append(result)
+            print(format_row(result), flush=True)
+    return results
+
+
+# --- Reporting ---
+HEADER = (f"{'endpoint':<22}{'cache':>6}{'items':>6}{'conc':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'req/s':>9}{'rss MB':>8}{'err':>5}  upstream serp/coup/llm")
+
+
+def format_row(r):
+    calls = r["upstream_calls"]
+    return (f"{r['endpoint']:<22}{r['cache']:>6}{r['items'] or '-':>6}{r['concurrency']:>6}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['throughput_rps']:>9.1f}"
+            f"{r['peak_rss_mb'] or float('nan'):>8.1f}{r['errors']:>5}"
+            f"  {calls['serpapi']}/{calls['couponapi']}/{calls['ollama']}")
+
+
+def compare(results, baseline_path, max_regression):
+    """Prints p95, throughput and RSS changes against a previous run; returns the regressed scenarios."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {tuple(r[k] for k in SCENARIO_KEY): r for r in json.load(f)["results"]}
+    regressed = []
+    print(f"\nvs {baseline_path}")
+    for r in results:
+        old = baseline.get(tuple(r[k] for k in SCENARIO_KEY))
+        if old is None:
+            continue
+        p95 = r["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps = r["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        rss = (r["peak_rss_mb"] or 0) - (old["peak_rss_mb"] or 0)
+        flag = ""
+        if max_regression is not None and p95 > max_regression:
+            regressed.append(r)
+            flag = "  REGRESSED"
+        print(f"{r['endpoint']:<22}{r['cache']:>6}{r['items'] or '-':>6}{r['concurrency']:>6}"
+              f"  p95 {p95:+7.1%}  req/s {rps:+7.1%}  rss {rss:+6.1f} MB{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 15], help="items per shopping list")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--cache", choices=["cold", "warm"], nargs="+", default=["cold"])
+    parser.add_argument("--num", type=int, default=10, help="offers requested per item")
+    parser.add_argument("--location", default="Seattle, Washington")
+    parser.add_argument("--serpapi-ms", type=float, default=150, help="SerpApi stub response time")
+    parser.add_argument("--couponapi-ms", type=float, default=50, help="CouponAPI stub response time")
+    parser.add_argument("--ollama-ms", type=float, default=200, help="Ollama stub response time")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="previous --json output to diff against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if any p95 grows by more than this fraction")
+    args = parser.parse_args()
+
+    stubs = {
+        "serpapi": serpapi_stub(latency_ms=args.serpapi_ms).start(),
+        "couponapi": couponapi_stub(latency_ms=args.couponapi_ms).start(),
+        "ollama": ollama_stub(latency_ms=args.ollama_ms).start(),
+    }
+    started = time.time()
+    results = []
+    print(HEADER)
+    try:
+        for cache in args.cache:
+            with tempfile.TemporaryDirectory() as workdir:
+                server = AppServer(args.port, stubs, cache, workdir)
+                try:
+                    results += asyncio.run(run_scenarios(args, server, stubs, cache))
+                finally:
+                    server.stop()
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": started,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("json", "compare", "max_regression")},
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.json}")
+    if args.compare and compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
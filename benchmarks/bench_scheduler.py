@@ -0,0 +1,80 @@
+"""
+Benchmark: cross-request upstream scheduling.
+
+Fires bursts of overlapping interactive and background requests at a local
+stub through the shared UpstreamClient, then reports how many reached the
+stub, how long each class waited for admission and the scheduler's stats.
+
+    python benchmarks/bench_scheduler.py --requests 400 --distinct 40 --rate 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from smart_budget_mcp.http_client import UpstreamClient  # noqa: E402
+from smart_budget_mcp.scheduler import BACKGROUND, INTERACTIVE, Quota, UpstreamScheduler  # noqa: E402
+from stubs import StubServer  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else float("nan")
+
+
+async def run(args, base_url, scheduled):
+    quotas = {"serpapi": Quota(args.rate, args.burst)}
+    client = UpstreamClient(retries=0, scheduler=UpstreamScheduler(quotas))
+    rng = random.Random(5)
+    latencies = {INTERACTIVE: [], BACKGROUND: []}
+
+    async def one(i):
+        priority = BACKGROUND if i % 2 else INTERACTIVE
+        query = f"item-{rng.randrange(args.distinct)}"
+        start = time.perf_counter()
+        if scheduled:
+            await client.get(f"{base_url}/search.json", provider="serpapi", priority=priority, params={"q": query})
+        else:
+            await client.get(f"{base_url}/search.json", params={"q": query})
+        latencies[priority].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    stats = client.scheduler.stats().get("serpapi")
+    await client.aclose()
+    return elapsed, latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--distinct", type=int, default=40, help="distinct queries among the requests")
+    parser.add_argument("--rate", type=float, default=20, help="provider quota, requests/second")
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub response time")
+    args = parser.parse_args()
+
+    def search(path, query):
+        time.sleep(args.latency_ms / 1000)
+        return 200, {"shopping_results": [{"title": query.get("q"), "extracted_price": 1.0}]}
+
+    for scheduled in (False, True):
+        with StubServer({"/search.json": search}) as server:
+            elapsed, latencies, stats = asyncio.run(run(args, server.base_url, scheduled))
+            label = "scheduler" if scheduled else "direct"
+            print(f"[{label}] {args.requests} requests -> {len(server.requests)} upstream calls in {elapsed:.2f} s")
+            for priority, name in ((INTERACTIVE, "interactive"), (BACKGROUND, "background")):
+                values = latencies[priority]
+                print(f"    {name:<12} p50 {percentile(values, 0.5):8.1f} ms   p95 {percentile(values, 0.95):8.1f} ms")
+            if stats:
+                print("    scheduler:", stats)
+
+
+if __name__ == "__main__":
+    main()
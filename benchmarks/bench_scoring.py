@@ -0,0 +1,86 @@
+"""
+Benchmark: vectorized OfferBatch scoring vs. the per-offer Python loop.
+
+Builds synthetic cached offers for many items, then times picking the best
+effective-price offer per item both ways and checks they agree.
+
+    python benchmarks/bench_scoring.py --items 500 --offers 20
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+from smart_budget_mcp.scoring import OfferBatch  # noqa: E402
+
+STORES = ["Walmart", "Target", "QFC", "Safeway", "Instacart", "Costco", "Starbucks"]
+
+
+def synthetic_offers(items, offers, seed=11):
+    rng = random.Random(seed)
+    return {
+        f"item-{i}": [
+            {"store": rng.choice(STORES), "title": f"item {i} offer {j}", "extracted_price": round(rng.uniform(1, 50), 2)}
+            for j in range(offers)
+        ]
+        for i in range(items)
+    }
+
+
+def python_best(offers_by_item, plan):
+    """The per-offer loop the pipeline uses: one dict per offer and a running minimum."""
+    best = {}
+    for item, offers in offers_by_item.items():
+        best_deal, best_price = None, float("inf")
+        for offer in offers:
+            base_price = float(offer["extracted_price"])
+            score = plan.score([offer["store"]], [base_price])[0]
+            analyzed = {**offer, "base_price": base_price, "final_effective_price": round(score.final_price, 2)}
+            if score.final_price < best_price:
+                best_price, best_deal = score.final_price, analyzed
+        best[item] = best_deal
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--offers", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    offers_by_item = synthetic_offers(args.items, args.offers)
+    plan = compile_savings_plan(["Target RedCard", "Chase Freedom"]).with_layer("cashback", {"Costco": 0.02})
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        expected = python_best(offers_by_item, plan)
+    python_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        batch = OfferBatch.from_offers(offers_by_item, plan)
+    build_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        best = batch.best()
+        top3 = batch.top_k(3)
+    rank_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+    mismatches = sum(
+        batch.offers[row]["extracted_price"] != expected[item]["extracted_price"] for item, row in best.items()
+    )
+    print(f"offers: {len(batch):,} across {args.items} items")
+    print(f"python loop:          {python_ms:8.2f} ms")
+    print(f"batch build:          {build_ms:8.2f} ms")
+    print(f"vectorized best+top3: {rank_ms:8.2f} ms")
+    print(f"mismatched winners:   {mismatches}  (top-3 rows for first item: {top3['item-0']})")
+
+
+if __name__ == "__main__":
+    main()
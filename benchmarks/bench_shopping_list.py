@@ -0,0 +1,134 @@
+"""
+Benchmark: /shopping_list_value fan-out vs. the old serial loop.
+
+Upstreams are stubbed with asyncio.sleep latencies so the numbers only reflect
+how the pipeline schedules work, not network noise. SerpApi latency is spread
+per item (--serpapi-spread) so the streaming mode's time to first result is
+meaningful.
+
+    python benchmarks/bench_shopping_list.py --sizes 1 5 15 30 --offers 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from smart_budget_mcp.cache import MemoryBackend  # noqa: E402
+from smart_budget_mcp.llm_extractor import LLMQuantityExtractor  # noqa: E402
+from smart_budget_mcp.pipeline import ConcurrencyLimits, ShoppingListPipeline, Upstreams  # noqa: E402
+from smart_budget_mcp.savings_engine import fetch_gift_card_deals, get_credit_card_perks  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+
+STORES = ["Walmart", "Target", "QFC", "Safeway", "Instacart"]
+
+
+def make_stub_upstreams(offers_per_item, serpapi_ms, llm_ms, coupons_ms, serpapi_spread=0.0):
+    rng = random.Random(7)
+
+    async def fetch_offers(item_name, location, num):
+        await asyncio.sleep(serpapi_ms * (1 + serpapi_spread * rng.random()) / 1000)
+        return [
+            {
+                "store": STORES[i % len(STORES)],
+                "title": f"{item_name} {i + 1} ct",
+                "price": f"${3 + i:.2f}",
+                "extracted_price": 3 + i,
+            }
+            for i in range(min(num, offers_per_item))
+        ]
+
+    def chat(model, prompt):
+        # One model round-trip per prompt, however many titles it carries.
+        time.sleep(llm_ms / 1000)
+        ids = range(1, prompt.count("Title:") + 1)
+        return json.dumps({"items": [{"id": i, "total_quantity": 1, "unit_type": "count"} for i in ids]})
+
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(100_000), chat=chat)
+
+    async def fetch_coupons(store):
+        await asyncio.sleep(coupons_ms / 1000)
+        return []
+
+    return Upstreams(
+        fetch_offers=fetch_offers,
+        extract_quantity=extractor.extract,
+        fetch_coupons=fetch_coupons,
+        fetch_deals=fetch_coupons,
+        compile_plan=compile_savings_plan,
+    ), extractor
+
+
+async def serial_baseline(upstreams, items, location, num, cards, llm_ms, gift_card_ms):
+    """The pre-pipeline behaviour: one item, one offer, one lookup at a time."""
+    for name in items:
+        offers = await upstreams.fetch_offers(name, location, num)
+        for offer in offers:
+            # The old path made one unbatched, uncached model call per offer.
+            await asyncio.sleep(llm_ms / 1000)
+            await upstreams.fetch_coupons(offer["store"])
+            await upstreams.fetch_deals(offer["store"])
+            await asyncio.sleep(gift_card_ms / 1000)
+            await fetch_gift_card_deals(offer["store"])
+            get_credit_card_perks(offer["store"], cards)
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+
+async def first_and_last(stream):
+    """(ms to the first streamed item, ms to the last)."""
+    start = time.perf_counter()
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+    return first, (time.perf_counter() - start) * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 15, 30])
+    parser.add_argument("--offers", type=int, default=10)
+    parser.add_argument("--serpapi-ms", type=float, default=80)
+    parser.add_argument("--serpapi-spread", type=float, default=2.0,
+                        help="each item's SerpApi latency is serpapi-ms * (1 + spread * U[0,1))")
+    parser.add_argument("--llm-ms", type=float, default=40)
+    parser.add_argument("--coupons-ms", type=float, default=5)
+    parser.add_argument("--gift-card-ms", type=float, default=5)
+    parser.add_argument("--skip-serial", action="store_true", help="only time the pipeline")
+    args = parser.parse_args()
+
+    limits = ConcurrencyLimits.from_env()
+    cards = ["Target RedCard", "Chase Freedom"]
+    print(f"limits: global={limits.global_limit} per_upstream={limits.per_upstream}")
+    print(f"{'items':>6} {'serial ms':>10} {'pipeline ms':>12} {'warm LLM ms':>12} {'prompts':>8} "
+          f"{'stream 1st ms':>14} {'speedup':>8}")
+    for size in args.sizes:
+        upstreams, extractor = make_stub_upstreams(
+            args.offers, args.serpapi_ms, args.llm_ms, args.coupons_ms, args.serpapi_spread
+        )
+        items = [f"item-{i}" for i in range(size)]
+        item_dicts = [{"name": name} for name in items]
+        pipeline = ShoppingListPipeline(upstreams, limits)
+        pipeline_ms = await timed(pipeline.analyze(item_dicts, "Seattle", args.offers, cards))
+        prompts = extractor.stats()["batches"]
+        warm_ms = await timed(pipeline.analyze(item_dicts, "Seattle", args.offers, cards))
+        first_ms, _ = await first_and_last(pipeline.analyze_stream(item_dicts, "Seattle", args.offers, cards))
+        if args.skip_serial:
+            print(f"{size:>6} {'-':>10} {pipeline_ms:>12.1f} {warm_ms:>12.1f} {prompts:>8} {first_ms:>14.1f} {'-':>8}")
+            continue
+        serial_ms = await timed(serial_baseline(upstreams, items, "Seattle", args.offers, cards, args.llm_ms, args.gift_card_ms))
+        print(f"{size:>6} {serial_ms:>10.1f} {pipeline_ms:>12.1f} {warm_ms:>12.1f} {prompts:>8} {first_ms:>14.1f} "
+              f"{serial_ms / pipeline_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
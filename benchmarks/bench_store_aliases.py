@@ -0,0 +1,124 @@
+"""
+Benchmark: store-name match rate and lookup cost, exact lowercase tables vs. the store index.
+
+Store names are the recorded SerpApi `source` strings plus the variants
+Google Shopping produces for them: location and channel suffixes
+("Walmart - Seattle", "Safeway Delivery"), domains, joined or hyphenated
+spellings and one-letter typos. Each name is labelled with the store it
+should resolve to (or none, for stores the savings tables don't know), so
+both match rate and wrong matches are reported. Lookup cost is timed for
+the old `name.lower()` dict lookup, the index with its LRU disabled (every
+name resolved from scratch) and warm (answered from the LRU).
+
+    python benchmarks/bench_store_aliases.py --names 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from smart_budget_mcp.savings_engine import mock_gift_card_deals, store_to_category_map  # noqa: E402
+from smart_budget_mcp.store_index import STORE_ALIASES, StoreIndex, get_store_index  # noqa: E402
+from stubs import ShoppingReplay  # noqa: E402
+
+CITIES = ["Seattle", "Bellevue", "Redmond", "Tacoma", "Kirkland"]
+SUFFIXES = [" - {city}", " Delivery", " Supercenter", " Store #{n}", ".com", " ({city})"]
+
+
+def known_stores():
+    return set(store_to_category_map) | set(mock_gift_card_deals) | {"target", "walmart"}
+
+
+def typo(name, rng):
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i + 1:] if rng.random() < 0.5 else name[:i] + name[i] + name[i:]
+
+
+def variants(store, rng):
+    """(spelling, expected store key) pairs for one store key."""
+    title = store.title()
+    yield title, store
+    yield store.upper(), store
+    for suffix in SUFFIXES:
+        yield title + suffix.format(city=rng.choice(CITIES), n=rng.randrange(100, 999)), store
+    if " " in store:
+        yield title.replace(" ", ""), store
+        yield title.replace(" ", "-"), store
+    if len(store) >= 6:
+        yield typo(title, rng), store
+        yield f"{typo(title, rng)} - {rng.choice(CITIES)}", store
+
+
+def corpus(size, seed=7):
+    """`size` (name, expected) pairs: known stores in every spelling, unknown stores as recorded."""
+    rng = random.Random(seed)
+    known = known_stores()
+    names = []
+    for store in sorted(known):
+        names.extend(variants(store, rng))
+    names.extend((alias.title(), store) for alias, store in STORE_ALIASES.items())
+    replay = ShoppingReplay()
+    for recorded in replay.responses.values():
+        for result in recorded["inline_shopping_results"] + recorded["shopping_results"]:
+            source = result["source"]
+            expected = next((s for s in known if source.lower().split(".")[0] == s), None)
+            names.append((source, expected))
+            names.append((f"{source} - {rng.choice(CITIES)}", expected))
+    names.extend((name, None) for name in ("Walgreens", "Trader Joe's", "Whole Foods Market", "eBay - seller", "Aldi"))
+    return [rng.choice(names) for _ in range(size)], names
+
+
+def match_report(label, resolve, names):
+    hits = wrong = 0
+    for name, expected in names:
+        got = resolve(name)
+        if expected is not None and got == expected:
+            hits += 1
+        elif got is not None and got != expected:
+            wrong += 1
+    known = sum(expected is not None for _, expected in names)
+    print(f"{label:<24}{hits:>6}/{known:<6}{hits / known:>8.1%}{wrong:>8}")
+
+
+def per_lookup_ns(fn, names, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name in names:
+            fn(name)
+        best = min(best, time.perf_counter() - start)
+    return best / len(names) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=20000, help="lookups in the timed stream")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    stream, distinct = corpus(args.names)
+    known = known_stores()
+    exact = lambda name: name.lower() if name.lower() in known else None  # noqa: E731
+    index = get_store_index()
+
+    print(f"{len(distinct)} distinct spellings, {index.stats()['stores']} known stores")
+    print(f"{'matcher':<24}{'matched':>13}{'rate':>8}{'wrong':>8}")
+    match_report("exact lowercase", exact, distinct)
+    match_report("store index", index.resolve, distinct)
+
+    print(f"\n{'lookup':<24}{'ns/lookup':>10}")
+    print(f"{'exact lowercase':<24}{per_lookup_ns(exact, [n for n, _ in stream], args.repeat):>10.0f}")
+    build = per_lookup_ns(lambda _: StoreIndex(known, STORE_ALIASES), range(50), args.repeat)
+    uncached = StoreIndex(known, STORE_ALIASES, cache_size=0)
+    print(f"{'index, uncached':<24}{per_lookup_ns(uncached.resolve, [n for n, _ in stream], args.repeat):>10.0f}")
+    print(f"{'index, warm LRU':<24}{per_lookup_ns(index.resolve, [n for n, _ in stream], args.repeat):>10.0f}")
+    print(f"{'index build':<24}{build:>10.0f}")
+    print("\nstore index:", index.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: /shopping_list_value throughput as the number of uvicorn workers grows.
+
+Each worker count gets a fresh app started through the multi-worker launcher
+(`python -m smart_budget_mcp.workers`), so several workers share the SQLite
+cache and state tier, against the same replay stubs as bench_replay.py.
+Every shopping list is requested once before measuring so the shared
+shopping cache is warm and the measured path is the CPU-bound one
+(scoring, enrichment, encoding). Reports throughput, p50/p95 and speedup
+over the first worker count; `--cache cold` measures the upstream-bound
+path instead.
+
+Throughput can only scale up to the machine's core count (printed first).
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --concurrency 32 --items 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_replay import AppServer, drive, percentile, shopping_lists  # noqa: E402
+from stubs import couponapi_stub, ollama_stub, serpapi_stub, ShoppingReplay  # noqa: E402
+
+
+async def measure(args, server, workers):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await server.wait_ready(client)
+        lists = shopping_lists(ShoppingReplay().queries, args.items, args.distinct)
+
+        def make_request(i):
+            return client.get(f"{server.base_url}/shopping_list_value",
+                              params={"items": lists[i % len(lists)], "location": args.location, "num": args.num})
+
+        if args.cache == "warm":
+            # Fill the shared shopping cache (and each worker's LLM cache) before timing.
+            await drive(client, make_request, len(lists) * workers, args.concurrency, 0)
+        latencies, errors, elapsed = await drive(client, make_request, args.requests, args.concurrency, args.warmup)
+    return {
+        "workers": workers,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--items", type=int, default=5, help="items per shopping list")
+    parser.add_argument("--distinct", type=int, default=16, help="distinct shopping lists in rotation")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400, help="measured requests per worker count")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--cache", choices=["cold", "warm"], default="warm")
+    parser.add_argument("--num", type=int, default=10, help="offers requested per item")
+    parser.add_argument("--location", default="Seattle, Washington")
+    parser.add_argument("--serpapi-ms", type=float, default=150, help="SerpApi stub response time")
+    parser.add_argument("--couponapi-ms", type=float, default=50, help="CouponAPI stub response time")
+    parser.add_argument("--ollama-ms", type=float, default=200, help="Ollama stub response time")
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    print(f"cpus: {os.cpu_count()}  cache: {args.cache}  items: {args.items}  concurrency: {args.concurrency}")
+    stubs = {
+        "serpapi": serpapi_stub(latency_ms=args.serpapi_ms).start(),
+        "couponapi": couponapi_stub(latency_ms=args.couponapi_ms).start(),
+        "ollama": ollama_stub(latency_ms=args.ollama_ms).start(),
+    }
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'p50 ms':>10}{'p95 ms':>10}{'err':>5}")
+    baseline = None
+    try:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as workdir:
+                server = AppServer(args.port, stubs, args.cache, workdir, workers=workers)
+                try:
+                    r = asyncio.run(measure(args, server, workers))
+                finally:
+                    server.stop()
+            baseline = baseline or r["throughput_rps"]
+            print(f"{workers:>8}{r['throughput_rps']:>10.1f}{r['throughput_rps'] / baseline:>8.2f}x"
+                  f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['errors']:>5}", flush=True)
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
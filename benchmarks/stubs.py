@@ -0,0 +1,212 @@
+"""
+Local stub servers that replay recorded upstream responses.
+
+Each stub runs a stdlib HTTP server on a background thread so scripts and
+benchmarks can point the app's `*_BASE_URL` settings (and `OLLAMA_HOST`) at it.
+
+    python benchmarks/stubs.py couponapi --port 8765
+    python benchmarks/stubs.py serpapi --port 8766 --latency-ms 300
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# A route handler receives (path, query) and returns (status, JSON body).
+Handler = Callable[[str, dict], tuple[int, object]]
+
+
+class StubServer:
+    """
+    Serves JSON routes on 127.0.0.1 and records every request it sees.
+    POST handlers get the decoded JSON body in place of the query string.
+    `latency_ms` delays every response, standing in for upstream round-trips.
+    """
+
+    def __init__(self, routes: dict[str, Handler], port: int = 0, latency_ms: float = 0.0):
+        self.routes = routes
+        self.latency_ms = latency_ms
+        self.requests: list[tuple[str, dict]] = []
+        stub = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {k: v[0] if len(v) == 1 else v for k, v in parse_qs(parsed.query).items()}
+                self._respond(parsed.path, query)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = {}
+                self._respond(urlparse(self.path).path, body if isinstance(body, dict) else {})
+
+            def _respond(self, path: str, query: dict):
+                stub.requests.append((path, query))
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+                handler = stub.routes.get(path.rstrip("/") or "/")
+                status, body = handler(path, query) if handler else (404, {"error": "no such route"})
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), RequestHandler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- CouponAPI ---
+class CouponFeedReplay:
+    """
+    Replays recorded incremental-feed pages in order, one page per request,
+    then empty deltas. `fail_next` makes the next request return HTTP 500.
+    """
+
+    def __init__(self, fixture_dir: str = os.path.join(FIXTURES, "couponapi")):
+        self.pages = []
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "page_*.json"))):
+            with open(path, encoding="utf-8") as f:
+                self.pages.append(json.load(f))
+        self.served = 0
+        self.fail_next = False
+
+    def __call__(self, path: str, query: dict) -> tuple[int, object]:
+        if not query.get("API_KEY"):
+            return 200, {"result": False, "error": "Missing API_KEY"}
+        if self.fail_next:
+            self.fail_next = False
+            return 500, {"result": False, "error": "stub failure"}
+        if self.served < len(self.pages):
+            page = self.pages[self.served]
+            self.served += 1
+            return 200, page
+        return 200, {"result": True, "offers": []}
+
+
+def couponapi_stub(port: int = 0, replay: Optional[CouponFeedReplay] = None, latency_ms: float = 0.0) -> StubServer:
+    return StubServer({"/api/getIncrementalFeed": replay or CouponFeedReplay()}, port, latency_ms)
+
+
+# --- SerpApi ---
+class ShoppingReplay:
+    """
+    Replays recorded Google Shopping responses, one fixture per query
+    (`fixtures/serpapi/<query>.json`). Queries without a recording get one
+    picked by a stable hash, so any list size can be replayed.
+    """
+
+    def __init__(self, fixture_dir: str = os.path.join(FIXTURES, "serpapi")):
+        self.responses = {}
+        for path in sorted(glob.glob(os.path.join(fixture_dir, "*.json"))):
+            with open(path, encoding="utf-8") as f:
+                self.responses[os.path.basename(path)[:-5].replace("_", " ")] = json.load(f)
+        self.queries = sorted(self.responses)
+
+    def __call__(self, path: str, query: dict) -> tuple[int, object]:
+        if not query.get("api_key"):
+            return 401, {"error": "Invalid API key."}
+        q = " ".join(str(query.get("q", "")).lower().split())
+        recorded = self.responses.get(q)
+        if recorded is None:
+            recorded = self.responses[self.queries[zlib.crc32(q.encode("utf-8")) % len(self.queries)]]
+        return 200, recorded
+
+
+def serpapi_stub(port: int = 0, replay: Optional[ShoppingReplay] = None, latency_ms: float = 0.0) -> StubServer:
+    return StubServer({"/search.json": replay or ShoppingReplay()}, port, latency_ms)
+
+
+# --- Ollama ---
+TITLE_LINE = re.compile(r"^\s*(\d+)\. Title: '(.*)' Price: ", re.MULTILINE)
+
+
+class OllamaChatReplay:
+    """
+    Answers `/api/chat` batch-extraction prompts from recorded per-title
+    extractions (`fixtures/ollama/extractions.json`). Titles without a
+    recording come back with null fields, as an unsure model would.
+    """
+
+    def __init__(self, fixture_path: str = os.path.join(FIXTURES, "ollama", "extractions.json")):
+        with open(fixture_path, encoding="utf-8") as f:
+            self.extractions = json.load(f)
+
+    def __call__(self, path: str, body: dict) -> tuple[int, object]:
+        prompt = "".join(m.get("content", "") for m in body.get("messages", []) if isinstance(m, dict))
+        items = []
+        for number, title in TITLE_LINE.findall(prompt):
+            recorded = self.extractions.get(" ".join(title.lower().split()), {})
+            items.append({"id": int(number), "total_quantity": recorded.get("total_quantity"),
+                          "unit_type": recorded.get("unit_type"), "unit_price": recorded.get("unit_price")})
+        return 200, {
+            "model": body.get("model", "stub"),
+            "created_at": "2025-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": json.dumps({"items": items})},
+            "done": True,
+            "done_reason": "stop",
+        }
+
+
+def ollama_stub(port: int = 0, replay: Optional[OllamaChatReplay] = None, latency_ms: float = 0.0) -> StubServer:
+    return StubServer({"/api/chat": replay or OllamaChatReplay()}, port, latency_ms)
+
+
+STUBS = {"couponapi": couponapi_stub, "serpapi": serpapi_stub, "ollama": ollama_stub}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("stub", choices=sorted(STUBS))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = STUBS[args.stub](args.port, latency_ms=args.latency_ms)
+    print(f"{args.stub} stub listening on {server.base_url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
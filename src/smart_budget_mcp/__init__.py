@@ -1,10 +1,17 @@
-# Removed import of main to prevent circular import issues.
-# import asyncio
+# The HTTP app is not imported here to prevent circular import issues;
+# `main()` loads the MCP server lazily.
 
-# def run_server():
-#     """Main entry point for the package."""
-#     import uvicorn
-#     uvicorn.run(main.app, host="127.0.0.1", port=8000, reload=True)
 
-# Optionally expose other important items at package level
-__all__ = []
\ No newline at end of file
+def main():
+    """Entry point for the `smart-budget-mcp` script: runs the MCP server over stdio."""
+    from .mcp_server import run
+    run()
+
+
+def run_server():
+    """Entry point for the `smart-budget-server` script: runs the FastAPI app under uvicorn workers."""
+    from .workers import serve
+    serve()
+
+
+__all__ = ["main", "run_server"]
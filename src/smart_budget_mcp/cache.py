@@ -0,0 +1,240 @@
+# src/smart_budget_mcp/cache.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+# --- Backends ---
+class MemoryBackend:
+    """In-process LRU store bounded by entry count."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    LRU store in a local SQLite file so cached results survive restarts and
+    are shared by every worker process opening the same path.
+
+    Values must be JSON-serializable. Recency is tracked with `last_access`
+    and the least recently used rows are trimmed once `max_entries` is exceeded.
+    A hit only rewrites `last_access` once it is `touch_interval` seconds old,
+    so reads from many workers don't queue on SQLite's single writer.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, touch_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Wait for another worker's write instead of failing with "database is locked".
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                fresh_until REAL NOT NULL,
+                stale_until REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, fresh_until, stale_until, last_access FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[3] >= self.touch_interval:
+                self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
+
+    def set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, fresh_until, stale_until, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(entry.value), entry.fresh_until, entry.stale_until, time.time()),
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)", (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+# --- Cache Front ---
+@dataclass
+class _Pending:
+    """A fetch shared by every caller waiting on one key."""
+    task: asyncio.Task
+    background: bool = False
+    waiters: int = 0
+
+
+class TTLCache:
+    """
+    TTL cache with stale-while-revalidate and request coalescing.
+
+    Within `ttl` an entry is served as-is. Between `ttl` and `ttl + stale_ttl`
+    it is served immediately while one background task refreshes it. Concurrent
+    misses for the same key share a single in-flight fetch, which is only
+    cancelled once every caller waiting on it has been.
+    """
+
+    def __init__(self, backend, ttl: float = 900, stale_ttl: float = 3600,
+                 should_cache: Callable[[Any], bool] = lambda value: True):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.should_cache = should_cache
+        self._in_flight: dict[str, _Pending] = {}
+        self._metrics = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.time()
+        entry = self.backend.get(key)
+        if entry is not None and now < entry.fresh_until:
+            self._metrics["hits"] += 1
+            return entry.value
+        if entry is not None and now < entry.stale_until:
+            self._metrics["stale_hits"] += 1
+            if key not in self._in_flight:
+                self._metrics["refreshes"] += 1
+                self._start(key, fetch, background=True)
+            return entry.value
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self._metrics["coalesced"] += 1
+        else:
+            self._metrics["misses"] += 1
+            pending = self._start(key, fetch)
+        pending.waiters += 1
+        try:
+            return await asyncio.shield(pending.task)
+        finally:
+            pending.waiters -= 1
+            if pending.waiters == 0 and not pending.background and not pending.task.done():
+                # Every caller was cancelled, so nobody wants the shared fetch any more.
+                pending.task.cancel()
+
+    def _start(self, key: str, fetch: Callable[[], Awaitable[Any]], background: bool = False) -> "_Pending":
+        """
+        Runs `fetch` as a task shared by every caller for `key`, so cancelling
+        one caller doesn't cancel the others. Background refreshes have no
+        caller and always run to completion.
+        """
+        pending = _Pending(asyncio.ensure_future(self._fetch(key, fetch)), background)
+        self._in_flight[key] = pending
+        pending.task.add_done_callback(lambda task: self._fetch_done(key, pending))
+        return pending
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._metrics["errors"] += 1
+            raise
+        if self.should_cache(value):
+            now = time.time()
+            self.backend.set(key, CacheEntry(value, now + self.ttl, now + self.ttl + self.stale_ttl))
+        return value
+
+    def _fetch_done(self, key: str, pending: "_Pending"):
+        if self._in_flight.get(key) is pending:
+            del self._in_flight[key]
+        if not pending.task.cancelled():
+            # Mark retrieved so failed refreshes (and waiter-less failures) don't log "never retrieved".
+            pending.task.exception()
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self._metrics["hits"] + self._metrics["stale_hits"] + self._metrics["misses"] + self._metrics["coalesced"]
+        served = lookups - self._metrics["misses"]
+        return {
+            **self._metrics,
+            "hit_ratio": round(served / lookups, 4) if lookups else 0.0,
+            "in_flight": len(self._in_flight),
+            "size": len(self.backend),
+            "evictions": self.backend.evictions,
+            "backend": type(self.backend).__name__,
+        }
+
+
+def backend_from_env(prefix: str, max_entries: int, default: str = "memory"):
+    """
+    Builds a cache backend from `<PREFIX>_BACKEND` ("memory" or "sqlite"),
+    `<PREFIX>_PATH` and `<PREFIX>_MAX_ENTRIES`.
+    """
+    max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", max_entries))
+    if os.getenv(f"{prefix}_BACKEND", default).lower() == "sqlite":
+        path = os.getenv(f"{prefix}_PATH", f"{prefix.lower()}.sqlite3")
+        return SQLiteBackend(path, max_entries)
+    return MemoryBackend(max_entries)
+
+
+def cache_from_env(prefix: str, ttl: float, stale_ttl: float, max_entries: int, **kwargs) -> TTLCache:
+    """
+    Builds a TTLCache on `backend_from_env(prefix, ...)`, reading
+    `<PREFIX>_TTL` and `<PREFIX>_STALE_TTL` for the expiry windows.
+    """
+    return TTLCache(
+        backend_from_env(prefix, max_entries),
+        ttl=float(os.getenv(f"{prefix}_TTL", ttl)),
+        stale_ttl=float(os.getenv(f"{prefix}_STALE_TTL", stale_ttl)),
+        **kwargs,
+    )
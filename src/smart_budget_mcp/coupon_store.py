@@ -0,0 +1,403 @@
+# src/smart_budget_mcp/coupon_store.py
+import csv
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import IO, Iterable, Iterator, Optional
+
+from .store_index import StoreIndex, normalize_store
+
+# Columns kept from CouponAPI.org offers; everything else in the feed is dropped.
+OFFER_FIELDS = (
+    "offer_id", "store", "title", "description", "code", "type", "categories",
+    "url", "affiliate_link", "image_url", "start_date", "end_date", "status",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS offers (
+    offer_id TEXT PRIMARY KEY,
+    store TEXT,
+    store_key TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    code TEXT,
+    kind TEXT NOT NULL,
+    categories TEXT,
+    url TEXT,
+    affiliate_link TEXT,
+    image_url TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    expires_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS offers_store ON offers(store_key, kind, updated_at);
+CREATE TABLE IF NOT EXISTS offer_categories (
+    offer_id TEXT NOT NULL,
+    category_key TEXT NOT NULL,
+    PRIMARY KEY (category_key, offer_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS offer_categories_offer ON offer_categories(offer_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS offers_fts USING fts5(
+    title, description, store, content='offers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS offers_ai AFTER INSERT ON offers BEGIN
+    INSERT INTO offers_fts(rowid, title, description, store) VALUES (new.rowid, new.title, new.description, new.store);
+END;
+CREATE TRIGGER IF NOT EXISTS offers_ad AFTER DELETE ON offers BEGIN
+    INSERT INTO offers_fts(offers_fts, rowid, title, description, store)
+    VALUES ('delete', old.rowid, old.title, old.description, old.store);
+END;
+CREATE TRIGGER IF NOT EXISTS offers_au AFTER UPDATE ON offers BEGIN
+    INSERT INTO offers_fts(offers_fts, rowid, title, description, store)
+    VALUES ('delete', old.rowid, old.title, old.description, old.store);
+    INSERT INTO offers_fts(rowid, title, description, store) VALUES (new.rowid, new.title, new.description, new.store);
+END;
+-- Every store key ever written, in insertion order, so workers can pick up new stores incrementally.
+CREATE TABLE IF NOT EXISTS store_keys (
+    store_key TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_category(name: Optional[str]) -> str:
+    return _NON_WORD_RE.sub(" ", (name or "").lower()).strip()
+
+
+def parse_feed_date(value: Optional[str], end_of_day: bool = False) -> Optional[float]:
+    """CouponAPI dates are "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS" (UTC); blank means open-ended."""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+        try:
+            parsed = datetime.strptime(value.strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+        stamp = parsed.timestamp()
+        if end_of_day and fmt == "%Y-%m-%d":
+            stamp += 24 * 60 * 60 - 1
+        return stamp
+    return None
+
+
+def iter_json_offers(fp: IO[str], chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """
+    Streams offer objects out of a CouponAPI JSON feed without loading the
+    whole document: skips to the `"offers"` array and decodes one object at a
+    time from a rolling buffer.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    # Find the start of the offers array.
+    while True:
+        start = buffer.find('"offers"')
+        bracket = buffer.find("[", start) if start != -1 else -1
+        if bracket != -1:
+            buffer = buffer[bracket + 1:]
+            break
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            return
+        buffer = (buffer[start:] if start != -1 else buffer[-16:]) + chunk
+    pos = 0
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if buffer.startswith("]", pos):
+            return
+        try:
+            offer, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                return
+            # Only compact when refilling so decoding stays linear in the feed size.
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield offer
+
+
+def iter_csv_offers(fp: IO[str]) -> Iterator[dict]:
+    """Streams rows of a CouponAPI CSV export."""
+    yield from csv.DictReader(fp)
+
+
+def _offer_dicts(rows: list[sqlite3.Row]) -> list[dict]:
+    return [
+        {
+            "offer_id": row["offer_id"],
+            "store": row["store"],
+            "title": row["title"],
+            "description": row["description"],
+            "code": row["code"],
+            "url": row["affiliate_link"] or row["url"],
+            "end_date": row["end_date"],
+        }
+        for row in rows
+    ]
+
+
+class CouponStore:
+    """
+    Local index of CouponAPI.org offers on SQLite.
+
+    Offers are keyed by normalized store name and category with expiry
+    indexed alongside, and an FTS5 table covers free-text search. Store
+    lookups are answered from the index (plus a short-lived in-process memo)
+    so the request path never touches the network.
+
+    Writes (ingest, purge) and lookups use separate connections and locks.
+    Under WAL a reader never waits on a writer, so lookups on the event loop
+    don't stall while a sync commits its batches.
+    """
+
+    def __init__(self, path: str = os.getenv("COUPON_STORE_PATH", "coupons.sqlite3"), memo_ttl: float = 60.0):
+        self.path = path
+        self.memo_ttl = memo_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._read_conn.row_factory = sqlite3.Row
+        self._read_conn.execute("PRAGMA busy_timeout=5000")
+        with self._lock:
+            # Indexes written before `store_keys` existed.
+            self._conn.execute(
+                "INSERT OR IGNORE INTO store_keys SELECT DISTINCT store_key FROM offers "
+                "WHERE NOT EXISTS (SELECT 1 FROM store_keys)"
+            )
+        self._memo: dict[tuple, tuple[float, list[dict]]] = {}
+        # Store keys present in the index, so "Walmart - Seattle" finds "walmart" offers.
+        # Extended when a write adds new keys: ours right after the commit,
+        # another worker's (the sync leader's) once `data_version` shows it.
+        # The memo and key state belong to the read side (`_read_lock`).
+        self._store_keys: set[str] = set()
+        self._store_keys_seen = 0
+        self._stores: Optional[StoreIndex] = None
+        self._data_version: Optional[int] = None
+
+    # --- Ingest ---
+    def ingest(self, offers: Iterable[dict], batch_size: int = 1000) -> dict:
+        """
+        Upserts offers in batches of `batch_size`, one transaction per batch.
+        Offers with status "suspended" are removed instead.
+
+        Returns:
+            Counts of received, upserted and removed offers.
+        """
+        counts = {"received": 0, "upserted": 0, "removed": 0}
+        batch: list[dict] = []
+        for offer in offers:
+            counts["received"] += 1
+            batch.append(offer)
+            if len(batch) >= batch_size:
+                self._write_batch(batch, counts)
+                batch = []
+        if batch:
+            self._write_batch(batch, counts)
+        return counts
+
+    def ingest_json(self, fp: IO[str], batch_size: int = 1000) -> dict:
+        return self.ingest(iter_json_offers(fp), batch_size)
+
+    def ingest_csv(self, fp: IO[str], batch_size: int = 1000) -> dict:
+        return self.ingest(iter_csv_offers(fp), batch_size)
+
+    def _write_batch(self, batch: list[dict], counts: dict):
+        now = time.time()
+        rows, categories, removed = [], [], []
+        for offer in batch:
+            offer_id = str(offer.get("offer_id") or "").strip()
+            if not offer_id:
+                continue
+            if str(offer.get("status", "")).lower() == "suspended":
+                removed.append((offer_id,))
+                continue
+            values = {field: (str(offer[field]) if offer.get(field) is not None else None) for field in OFFER_FIELDS}
+            code = (values["code"] or "").strip()
+            rows.append((
+                offer_id, values["store"], normalize_store(values["store"]), values["title"],
+                values["description"], code or None, "coupon" if code else "deal", values["categories"],
+                values["url"], values["affiliate_link"], values["image_url"], values["start_date"],
+                values["end_date"], parse_feed_date(values["end_date"], end_of_day=True), now,
+            ))
+            for category in (values["categories"] or "").split(","):
+                category_key = normalize_category(category)
+                if category_key:
+                    categories.append((offer_id, category_key))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("DELETE FROM offers WHERE offer_id = ?", removed)
+                self._conn.executemany(
+                    "DELETE FROM offer_categories WHERE offer_id = ?", removed + [(row[0],) for row in rows]
+                )
+                self._conn.executemany("""
+                    INSERT INTO offers (offer_id, store, store_key, title, description, code, kind, categories,
+                                        url, affiliate_link, image_url, start_date, end_date, expires_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(offer_id) DO UPDATE SET
+                        store=excluded.store, store_key=excluded.store_key, title=excluded.title,
+                        description=excluded.description, code=excluded.code, kind=excluded.kind,
+                        categories=excluded.categories, url=excluded.url, affiliate_link=excluded.affiliate_link,
+                        image_url=excluded.image_url, start_date=excluded.start_date, end_date=excluded.end_date,
+                        expires_at=excluded.expires_at, updated_at=excluded.updated_at
+                """, rows)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO offer_categories (offer_id, category_key) VALUES (?, ?)", categories
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO store_keys (store_key) VALUES (?)", {(row[2],) for row in rows}
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        # Our commit moved the read connection's data_version; pick it up now,
+        # in the writing thread, rather than on the next lookup.
+        with self._read_lock:
+            self._sync()
+        counts["upserted"] += len(rows)
+        counts["removed"] += len(removed)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "DELETE FROM offer_categories WHERE offer_id IN (SELECT offer_id FROM offers WHERE expires_at < ?)",
+                (now,),
+            )
+            deleted = self._conn.execute("DELETE FROM offers WHERE expires_at < ?", (now,)).rowcount
+            self._conn.execute("COMMIT")
+        # Store keys are kept: a key with no offers left just finds nothing.
+        with self._read_lock:
+            self._sync()
+        return deleted
+
+    def _load_store_keys(self):
+        """Adds store keys written since the last load; rebuilds the StoreIndex only if there are new ones."""
+        rows = self._read_conn.execute(
+            "SELECT rowid, store_key FROM store_keys WHERE rowid > ? ORDER BY rowid", (self._store_keys_seen,)
+        ).fetchall()
+        if rows:
+            self._store_keys.update(row[1] for row in rows)
+            self._store_keys_seen = rows[-1][0]
+        if rows or self._stores is None:
+            self._stores = StoreIndex(self._store_keys)
+
+    def _sync(self):
+        """Picks up commits made since the last call: drops the memo and loads any new store keys."""
+        version = self._read_conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._memo.clear()
+            self._load_store_keys()
+
+    # --- Lookups ---
+    def store_key(self, store: Optional[str]) -> str:
+        """The indexed store key `store` resolves to, else its normalized spelling."""
+        with self._read_lock:
+            self._sync()
+            stores = self._stores
+        return stores.canonical(store)
+
+    def _query(self, sql: str, params: tuple) -> list[dict]:
+        with self._read_lock:
+            rows = self._read_conn.execute(sql, params).fetchall()
+        return _offer_dicts(rows)
+
+    def for_store(self, store: str, kind: Optional[str] = None, limit: int = 20) -> list[dict]:
+        """
+        Unexpired offers for a store, most recently updated first.
+
+        Args:
+            store: Any spelling of the store name (e.g., "Walmart.com").
+            kind: "coupon" (has a code), "deal" (no code) or None for both.
+        """
+        now = time.time()
+        # One critical section, so a result read before a commit can't be memoized after it.
+        with self._read_lock:
+            self._sync()
+            store_key = self._stores.canonical(store)
+            if not store_key:
+                return []
+            memo_key = (store_key, kind, limit)
+            memo = self._memo.get(memo_key)
+            if memo is not None and memo[0] > now:
+                return memo[1]
+            sql = "SELECT * FROM offers WHERE store_key = ? AND (expires_at IS NULL OR expires_at >= ?)"
+            params: tuple = (store_key, now)
+            if kind:
+                sql += " AND kind = ?"
+                params += (kind,)
+            sql += " ORDER BY updated_at DESC LIMIT ?"
+            result = _offer_dicts(self._read_conn.execute(sql, params + (limit,)).fetchall())
+            if len(self._memo) >= 4096:
+                self._memo.clear()
+            self._memo[memo_key] = (now + self.memo_ttl, result)
+        return result
+
+    def for_category(self, category: str, limit: int = 20) -> list[dict]:
+        return self._query("""
+            SELECT o.* FROM offer_categories c JOIN offers o ON o.offer_id = c.offer_id
+            WHERE c.category_key = ? AND (o.expires_at IS NULL OR o.expires_at >= ?)
+            LIMIT ?
+        """, (normalize_category(category), time.time(), limit))
+
+    def search(self, text: str, store: Optional[str] = None, limit: int = 20) -> list[dict]:
+        """Full-text search over title, description and store."""
+        terms = " ".join(f'"{term}"' for term in _NON_WORD_RE.sub(" ", text.lower()).split())
+        if not terms:
+            return []
+        sql = """
+            SELECT o.* FROM offers_fts f JOIN offers o ON o.rowid = f.rowid
+            WHERE offers_fts MATCH ? AND (o.expires_at IS NULL OR o.expires_at >= ?)
+        """
+        params: tuple = (terms, time.time())
+        if store:
+            sql += " AND o.store_key = ?"
+            params += (self.store_key(store),)
+        return self._query(sql + " ORDER BY rank LIMIT ?", params + (limit,))
+
+    # --- Metadata ---
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def stats(self) -> dict:
+        with self._read_lock:
+            total = self._read_conn.execute("SELECT COUNT(*) FROM offers").fetchone()[0]
+            stores = self._read_conn.execute("SELECT COUNT(DISTINCT store_key) FROM offers").fetchone()[0]
+        return {"offers": total, "stores": stores, "path": self.path}
+
+
+# --- Shared Instance ---
+_coupon_store: Optional[CouponStore] = None
+
+
+def get_coupon_store() -> CouponStore:
+    global _coupon_store
+    if _coupon_store is None:
+        _coupon_store = CouponStore()
+    return _coupon_store
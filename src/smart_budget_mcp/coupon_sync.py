@@ -0,0 +1,120 @@
+# src/smart_budget_mcp/coupon_sync.py
+import asyncio
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+from .coupon_store import CouponStore
+from .scheduler import BACKGROUND, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "couponapi_last_extract"
+
+
+class CouponSync:
+    """
+    Background incremental sync of the CouponAPI feed into a CouponStore.
+
+    The `last_extract` watermark is persisted in the store, so each cycle only
+    asks for offers changed since the previous successful cycle, including
+    across restarts. Upserts are keyed by offer_id and suspended or expired
+    offers are dropped, which makes replaying an overlapping window harmless.
+
+    `fetch` may return a lazy iterable (see `fetch_couponapi_feed`); it is
+    consumed in batches in a worker thread, so a large delta is never held in
+    memory or decoded on the event loop.
+    """
+
+    def __init__(self,
+                 store: CouponStore,
+                 fetch: Callable[[int], Awaitable[Iterable[dict]]],
+                 interval: float = float(os.getenv("COUPON_SYNC_INTERVAL", 3600)),
+                 initial_window: float = 365 * 24 * 60 * 60,
+                 overlap: float = 300):
+        self.store = store
+        self.fetch = fetch
+        self.interval = interval
+        self.initial_window = initial_window
+        # Re-request a few minutes before the watermark to tolerate clock skew upstream.
+        self.overlap = overlap
+        self._task: Optional[asyncio.Task] = None
+        self._metrics = {
+            "runs": 0, "failures": 0, "offers_received": 0, "offers_upserted": 0,
+            "offers_removed": 0, "offers_expired": 0,
+            "last_run_at": None, "last_success_at": None, "last_duration_s": None,
+            "last_volume": None, "last_error": None,
+        }
+
+    @property
+    def watermark(self) -> Optional[int]:
+        value = self.store.get_meta(WATERMARK_KEY)
+        return int(value) if value else None
+
+    async def sync_once(self) -> dict:
+        """
+        Fetches and applies one delta. The watermark only advances when the
+        fetch and the ingest both succeed.
+        """
+        started = time.time()
+        watermark = self.watermark
+        since = int(watermark - self.overlap) if watermark else int(started - self.initial_window)
+        self._metrics["runs"] += 1
+        self._metrics["last_run_at"] = started
+        try:
+            offers = await self.fetch(since)
+            counts = await asyncio.to_thread(self.store.ingest, offers)
+            expired = await asyncio.to_thread(self.store.purge_expired)
+        except Exception as e:
+            self._metrics["failures"] += 1
+            self._metrics["last_error"] = f"{type(e).__name__}: {e}"
+            raise
+        self.store.set_meta(WATERMARK_KEY, str(int(started)))
+        duration = time.time() - started
+        self._metrics.update({
+            "offers_received": self._metrics["offers_received"] + counts["received"],
+            "offers_upserted": self._metrics["offers_upserted"] + counts["upserted"],
+            "offers_removed": self._metrics["offers_removed"] + counts["removed"],
+            "offers_expired": self._metrics["offers_expired"] + expired,
+            "last_success_at": time.time(),
+            "last_duration_s": round(duration, 3),
+            "last_volume": counts["received"],
+            "last_error": None,
+        })
+        return {"since": since, **counts, "expired": expired}
+
+    async def run(self):
+        # Queue behind interactive requests for the same upstream quota.
+        upstream_priority.set(BACKGROUND)
+        while True:
+            try:
+                await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Coupon sync failed; watermark left at %s", self.watermark)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        watermark = self.watermark
+        return {
+            **self._metrics,
+            "running": self._task is not None and not self._task.done(),
+            "interval_s": self.interval,
+            "watermark": watermark,
+            "lag_s": round(time.time() - watermark, 1) if watermark else None,
+        }
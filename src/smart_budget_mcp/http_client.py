@@ -0,0 +1,199 @@
+# src/smart_budget_mcp/http_client.py
+import asyncio
+import importlib.util
+import os
+import random
+from collections import defaultdict
+from typing import IO, TYPE_CHECKING, Optional
+
+from .scheduler import UpstreamScheduler
+
+if TYPE_CHECKING:
+    import httpx
+
+# httpx is imported on the first request, not at app import.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class UpstreamClient:
+    """
+    One pooled `httpx.AsyncClient` shared by every upstream fetcher.
+
+    Connections are kept alive (HTTP/2 when `h2` is installed), each host gets
+    its own concurrency cap, and transient failures are retried with
+    full-jitter exponential backoff. Requests tagged with a `provider` also go
+    through the shared `UpstreamScheduler` (merging, quotas, priorities).
+    """
+
+    def __init__(self,
+                 timeout: float = float(os.getenv("UPSTREAM_TIMEOUT", 10.0)),
+                 max_connections: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100)),
+                 max_keepalive_connections: int = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", 20)),
+                 per_host_limit: int = int(os.getenv("UPSTREAM_PER_HOST_LIMIT", 10)),
+                 retries: int = int(os.getenv("UPSTREAM_RETRIES", 2)),
+                 backoff_base: float = 0.25,
+                 backoff_max: float = 4.0,
+                 http2: bool = HTTP2_AVAILABLE,
+                 scheduler: Optional[UpstreamScheduler] = None):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.per_host_limit = per_host_limit
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.scheduler = scheduler or UpstreamScheduler()
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: {
+            "requests": 0, "retries": 0, "errors": 0, "in_flight": 0,
+        })
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def request(self, method: str, url: str, provider: Optional[str] = None,
+                      priority: Optional[int] = None, **kwargs) -> "httpx.Response":
+        """
+        Sends a request through the shared pool.
+
+        Retries on connection errors, timeouts and 429/5xx responses. The last
+        response is returned even if it is still an error status; the last
+        transport exception is re-raised once retries are exhausted.
+
+        With `provider` set, the request is admitted by the scheduler under that
+        provider's quota, and identical GETs already in flight share one response.
+        Retries of an admitted request do not take another token.
+        """
+        if provider is None:
+            return await self._send(method, url, **kwargs)
+        key = None
+        if method in ("GET", "HEAD") and set(kwargs) <= {"params"}:
+            import httpx
+            key = (method, str(httpx.URL(url, params=kwargs.get("params"))))
+        return await self.scheduler.submit(provider, key, lambda: self._send(method, url, **kwargs), priority)
+
+    async def _send(self, method: str, url: str, sink: Optional[IO[bytes]] = None, **kwargs) -> "httpx.Response":
+        import httpx
+        host = httpx.URL(url).host
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        counters = self._counters[host]
+        for attempt in range(self.retries + 1):
+            counters["requests"] += 1
+            counters["in_flight"] += 1
+            try:
+                async with semaphore:
+                    if sink is None:
+                        resp = await self.client.request(method, url, **kwargs)
+                    else:
+                        resp = await self._stream_into(sink, method, url, **kwargs)
+            except httpx.TransportError:
+                counters["errors"] += 1
+                if attempt == self.retries:
+                    raise
+                retry_after = None
+            else:
+                if resp.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    return resp
+                retry_after = resp.headers.get("Retry-After")
+            finally:
+                counters["in_flight"] -= 1
+            counters["retries"] += 1
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+
+    async def _stream_into(self, sink: IO[bytes], method: str, url: str, **kwargs) -> "httpx.Response":
+        resp = await self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+        try:
+            if resp.is_success:
+                # Start over on a retry so a partial body from a dropped connection isn't kept.
+                sink.seek(0)
+                sink.truncate()
+                async for chunk in resp.aiter_bytes():
+                    sink.write(chunk)
+            else:
+                await resp.aread()
+        finally:
+            await resp.aclose()
+        return resp
+
+    async def get(self, url: str, provider: Optional[str] = None, **kwargs) -> "httpx.Response":
+        return await self.request("GET", url, provider, **kwargs)
+
+    async def download(self, url: str, sink: IO[bytes], provider: Optional[str] = None,
+                       **kwargs) -> "httpx.Response":
+        """
+        GETs `url` like `get`, but writes a successful body into `sink` as it
+        arrives instead of buffering it on the response. Downloads are never
+        merged with other in-flight requests.
+        """
+        return await self.request("GET", url, provider, sink=sink, **kwargs)
+
+    def stats(self) -> dict:
+        """Pool occupancy and per-host request counters."""
+        connections = []
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        if pool is not None:
+            connections = list(getattr(pool, "connections", []))
+        return {
+            "http2": self.http2,
+            "open": self._client is not None and not self._client.is_closed,
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "per_host": self.per_host_limit,
+            },
+            "connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "hosts": {host: dict(c) for host, c in self._counters.items()},
+            "scheduler": self.scheduler.stats(),
+        }
+
+
+# --- Shared Instance ---
+# Opened and closed by the FastAPI lifespan in main.py; scripts that never run
+# the app get a client lazily on first use.
+_upstream_client: Optional[UpstreamClient] = None
+
+
+def get_upstream_client() -> UpstreamClient:
+    global _upstream_client
+    if _upstream_client is None:
+        _upstream_client = UpstreamClient()
+    return _upstream_client
+
+
+async def close_upstream_client():
+    global _upstream_client
+    if _upstream_client is not None:
+        await _upstream_client.aclose()
+        _upstream_client = None
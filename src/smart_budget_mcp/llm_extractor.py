@@ -0,0 +1,204 @@
+# src/smart_budget_mcp/llm_extractor.py
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .cache import CacheEntry, backend_from_env
+
+# ollama (and the httpx stack under it) is only imported on the first model call.
+OLLAMA_AVAILABLE = importlib.util.find_spec("ollama") is not None
+
+EMPTY = (None, None, None)
+
+# Model calls run on their own bounded pool instead of the default executor
+# that serves SQLite and other to_thread work. "thread" suits a remote model
+# server; "process" moves an in-process, CPU-bound `chat` off the workers'
+# GIL (it must then be a picklable module-level function).
+LLM_POOL = os.getenv("LLM_POOL", "thread").strip().lower()
+
+
+def normalize_title(title: str) -> str:
+    return " ".join((title or "").lower().split())
+
+
+def extraction_key(title: str, price, model: str) -> str:
+    """Content address of one extraction: normalized title, price and model name."""
+    price_part = f"{float(price):.2f}" if price is not None else ""
+    raw = f"{model}\x1f{normalize_title(title)}\x1f{price_part}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_batch_prompt(batch: list[tuple[str, Optional[float]]]) -> str:
+    lines = "\n".join(f"{i}. Title: '{title}' Price: {price}" for i, (title, price) in enumerate(batch, 1))
+    return f"""
+    Extract the total quantity, unit type, and price per unit for each numbered product title and price.
+    {lines}
+    Respond in JSON: {{'items': [{{'id': <number>, 'total_quantity': ..., 'unit_type': ..., 'unit_price': ...}}, ...]}}
+    """
+
+
+def parse_batch_response(content: str, size: int) -> list[Optional[tuple]]:
+    """Maps a batched JSON reply back to input order; ids the model skipped come back as None."""
+    data = json.loads(content)
+    items = data.get("items", []) if isinstance(data, dict) else data
+    results: list[Optional[tuple]] = [None] * size
+    for position, item in enumerate(items if isinstance(items, list) else []):
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id", position + 1)) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < size:
+            results[index] = (item.get("total_quantity"), item.get("unit_type"), item.get("unit_price"))
+    return results
+
+
+def ollama_chat(model: str, prompt: str) -> str:
+    import ollama
+    response = ollama.chat(
+        model=model,
+        messages=[{'role': 'user', 'content': prompt}],
+        format='json',
+        options={'temperature': 0.0}
+    )
+    return response['message']['content']
+
+
+class LLMQuantityExtractor:
+    """
+    Memoized, batching front for the LLM quantity extractor.
+
+    Results are cached under `extraction_key` (SQLite by default, so they
+    survive restarts). Cache misses that arrive within `batch_window` seconds
+    of each other -- typically every offer of one request -- are sent as a
+    single prompt of up to `batch_size` titles, and `max_concurrency` bounds
+    how many prompts run at once, each on a dedicated pool of that size.
+    """
+
+    def __init__(self,
+                 model: str = os.getenv("LLM_MODEL", "gemma3"),
+                 backend=None,
+                 ttl: float = float(os.getenv("LLM_CACHE_TTL", 30 * 24 * 60 * 60)),
+                 batch_size: int = int(os.getenv("LLM_BATCH_SIZE", 32)),
+                 batch_window: float = float(os.getenv("LLM_BATCH_WINDOW_MS", 20)) / 1000,
+                 max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", 4)),
+                 chat: Optional[Callable[[str, str], str]] = None,
+                 pool: str = LLM_POOL):
+        self.model = model
+        self._backend = backend
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_concurrency = max_concurrency
+        self.chat = chat or (ollama_chat if OLLAMA_AVAILABLE else None)
+        self.pool = pool
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queue: list[tuple[str, str, Optional[float]]] = []
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set[asyncio.Task] = set()
+        self._metrics = {"hits": 0, "misses": 0, "coalesced": 0, "batches": 0, "batched_titles": 0, "errors": 0}
+
+    @property
+    def backend(self):
+        """The memo; the env-configured one (a SQLite file by default) is opened on first use."""
+        if self._backend is None:
+            self._backend = backend_from_env("LLM_CACHE", 100_000, default="sqlite")
+        return self._backend
+
+    @property
+    def available(self) -> bool:
+        return self.chat is not None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.pool == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        return self._executor
+
+    def close(self):
+        """Shuts down the model pool; a later call starts a new one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def extract(self, title: str, price: Optional[float]) -> tuple:
+        """Returns (total_quantity, unit_type, unit_price), or all None if the model is unavailable or fails."""
+        key = extraction_key(title, price, self.model)
+        entry = self.backend.get(key)
+        if entry is not None and time.time() < entry.fresh_until:
+            self._metrics["hits"] += 1
+            return tuple(entry.value)
+        if not self.available:
+            return EMPTY
+        future = self._pending.get(key)
+        if future is not None:
+            self._metrics["coalesced"] += 1
+            return await asyncio.shield(future)
+        self._metrics["misses"] += 1
+        future = self._pending[key] = asyncio.get_running_loop().create_future()
+        self._queue.append((key, title, price))
+        if len(self._queue) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+        if self._queue:
+            self._timer = asyncio.get_running_loop().call_soon(self._flush)
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, str, Optional[float]]]):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: list[Optional[tuple]] = [None] * len(batch)
+        try:
+            async with self._semaphore:
+                prompt = build_batch_prompt([(title, price) for _, title, price in batch])
+                content = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), self.chat, self.model, prompt
+                )
+            results = parse_batch_response(content, len(batch))
+            self._metrics["batches"] += 1
+            self._metrics["batched_titles"] += len(batch)
+        except Exception:
+            self._metrics["errors"] += 1
+        finally:
+            # Also runs when the batch is cancelled, so no waiter is left on an unresolved future.
+            for (key, _, _), result in zip(batch, results):
+                future = self._pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(result or EMPTY)
+        now = time.time()
+        for (key, _, _), result in zip(batch, results):
+            if result is not None:
+                self.backend.set(key, CacheEntry(list(result), now + self.ttl, now + self.ttl))
+
+    def stats(self) -> dict:
+        return {
+            **self._metrics,
+            "model": self.model,
+            "available": self.available,
+            "pool": self.pool,
+            "queued": len(self._queue),
+            "size": len(self.backend),
+            "evictions": self.backend.evictions,
+            "backend": type(self.backend).__name__,
+        }
@@ -1,109 +1,194 @@
 # src/smart_budget_mcp/main.py
 import asyncio
-import os
-from dotenv import load_dotenv
-load_dotenv()
-import httpx
-from fastapi import FastAPI, Query
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from .state import wishlist, groceries, budget, user_profile
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+
+# Imported first: it loads .env, so the modules below see its tuning variables at import.
+from .settings import get_settings
+from .state import DEFAULT_USER, get_state_store
 from .schemas import BudgetInput, CardNamesInput, WishlistItemInput, GroceryItemInput
 from .savings_engine import (
-    get_credit_card_perks, fetch_gift_card_deals,
-    fetch_couponsapi_coupons, fetch_couponsapi_deals
+    fetch_couponsapi_coupons, fetch_couponsapi_deals,
+    fetch_couponapi_feed, COUPONSAPI_KEY
 )
+from .pipeline import ShoppingListPipeline, Upstreams
+from .quantity_parser import parse_quantity
+from .http_client import get_upstream_client, close_upstream_client
+from .cache import cache_from_env
+from .llm_extractor import LLMQuantityExtractor
+from .coupon_store import get_coupon_store
+from .coupon_sync import CouponSync
+from .savings_plan import compile_savings_plan
+from .price_history import get_price_history
+from .price_watch import PriceWatch, QueueSink, SQLiteSink, webhook_sink
+from .providers import PriceAggregator, providers_from_settings
+from .offers import analysis_to_dict, parse_fields
+from .store_index import get_store_index
+from .responses import FastJSONResponse, json_response
+from .metrics import METRICS_ENABLED, http_seconds, registry, render_latest, timed
+from .workers import WORKERS, is_leader
+# .scoring and .planner pull in NumPy; /rerank and /purchase_plan import them
+# on first use so it stays out of the app's cold start.
+
+settings = get_settings()
 
 # --- LLM Integration ---
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+# Memoized and batched; misses from one request share a single prompt.
+# Its cache file is opened on first use, not at import.
+llm_extractor = LLMQuantityExtractor()
+
+# --- Background Coupon Sync ---
+# Pulls CouponAPI deltas into the local coupon index on a schedule
+# (COUPON_SYNC_INTERVAL seconds). Disable with COUPON_SYNC_ENABLED=0.
+coupon_sync = None
+
+# --- Price Watch ---
+# Re-checks every wishlist item with a location once per PRICE_WATCH_INTERVAL
+# seconds. Alerts are kept for GET /alerts and, if PRICE_WATCH_WEBHOOK_URL is
+# set, POSTed there. Disable with PRICE_WATCH_ENABLED=0.
+# With several workers alerts go to SQLite, so any worker can serve /alerts.
+alert_queue = SQLiteSink() if WORKERS > 1 else QueueSink()
+price_watch = None
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global coupon_sync, price_watch
+    # One pooled upstream client for the lifetime of the app.
+    get_upstream_client()
+    # Background jobs run in one worker only; see workers.is_leader.
+    leader = is_leader()
+    if leader and COUPONSAPI_KEY and settings.coupon_sync_enabled:
+        coupon_sync = CouponSync(get_coupon_store(), fetch_couponapi_feed)
+        coupon_sync.start()
+    if leader and price_aggregator.providers and settings.price_watch_enabled:
+        sinks = [alert_queue]
+        if settings.price_watch_webhook_url:
+            sinks.append(webhook_sink(settings.price_watch_webhook_url))
+        price_watch = PriceWatch(get_state_store(), fetch_google_shopping_prices_uncached, sinks)
+        price_watch.start()
+    yield
+    if price_watch is not None:
+        await price_watch.stop()
+    if coupon_sync is not None:
+        await coupon_sync.stop()
+    llm_extractor.close()
+    await close_upstream_client()
 
-# --- Helper for API Key ---
-def get_serpapi_key():
-    key = os.getenv("SERPAPI_KEY")
-    if not key:
-        raise ValueError("SERPAPI_KEY environment variable not set.")
-    return key
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# --- Metrics ---
+# Request latency per route template; stage spans are recorded by the
+# pipeline and the timed upstreams below. Disable with METRICS_ENABLED=0.
+if METRICS_ENABLED:
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            http_seconds.observe(time.perf_counter() - start, getattr(route, "path", "unmatched"), str(status))
+
+# --- Price Providers ---
+# SerpApi (SERPAPI_KEY), an affiliate product feed (AFFILIATE_FEED_URL) and a
+# local CSV catalog (CATALOG_CSV_PATH) are queried in parallel, each within
+# its own <PROVIDER>_DEADLINE_MS; see providers.PriceAggregator.
+price_aggregator = PriceAggregator(providers_from_settings(settings))
 
 # --- LLM Quantity/Unit Extraction ---
+@timed("llm_extraction")
 async def extract_quantity_with_llm(title, price):
-    if not OLLAMA_AVAILABLE:
-        return None, None, None
-    prompt = f"""
-    Extract the total quantity, unit type, and price per unit from this product title and price.
-    Title: '{title}'
-    Price: {price}
-    Respond in JSON: {{'total_quantity': ..., 'unit_type': ..., 'unit_price': ...}}
-    """
-    try:
-        response = await asyncio.to_thread(
-            lambda: ollama.chat(
-                model='gemma3',
-                messages=[{'role': 'user', 'content': prompt}],
-                format='json',
-                options={'temperature': 0.0}
-            )
-        )
-        import json
-        data = json.loads(response['message']['content'])
-        return data.get('total_quantity'), data.get('unit_type'), data.get('unit_price')
-    except Exception:
-        return None, None, None
+    return await llm_extractor.extract(title, price)
+
+# --- Offer Cache ---
+# Keyed by (query, location, num). Empty and partial results (a provider
+# missed its deadline) are not cached, so they are retried on the next
+# request. See cache_from_env for settings.
+shopping_cache = cache_from_env(
+    "SHOPPING_CACHE", ttl=900, stale_ttl=3600, max_entries=1024,
+    should_cache=lambda offers: bool(offers) and not getattr(offers, "partial", False),
+)
 
-# Google Shopping Results API via SerpApi fetcher (all stores, location-aware)
+def shopping_cache_key(item_name, location, num):
+    return f"{' '.join(item_name.lower().split())}|{' '.join(location.lower().split())}|{num}"
+
+@timed("offers_fetch")
 async def fetch_google_shopping_prices_nearby(item_name, location, num=20):
-    SERPAPI_KEY = get_serpapi_key()
-    params = {
-        "engine": "google_shopping",
-        "q": item_name,
-        "api_key": SERPAPI_KEY,
-        "gl": "us",
-        "hl": "en",
-        "location": location,
-        "num": num
-    }
-    url = "https://serpapi.com/search.json"
+    return await shopping_cache.get_or_fetch(
+        shopping_cache_key(item_name, location, num),
+        lambda: fetch_google_shopping_prices_uncached(item_name, location, num),
+    )
+
+# --- Price History ---
+# Every fresh provider response is folded into a daily price history so
+# offers can say whether they are the lowest in 30 days or a sale.
+# The history file (PRICE_HISTORY_PATH) is opened on first use.
+async def record_price_history(offers, location):
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-            if resp.status_code == 200:
-                data = resp.json()
-                offers = []
-                for section in ["inline_shopping_results", "shopping_results"]:
-                    for result in data.get(section, []):
-                        offer = {
-                            "store": result.get("source"),
-                            "title": result.get("title"),
-                            "price": result.get("price"),
-                            "extracted_price": result.get("extracted_price"),
-                            "link": result.get("link"),
-                            "delivery": result.get("delivery"),
-                            "extensions": result.get("extensions"),
-                            "thumbnail": result.get("thumbnail"),
-                        }
-                        offers.append(offer)
-                return offers
-            return []
+        await asyncio.to_thread(lambda: get_price_history().record(offers, location))
     except Exception:
-        return []
+        pass
+
+def price_insights(offers, location):
+    return get_price_history().insights(offers, location)
+
+@timed("offers_aggregate")
+async def fetch_google_shopping_prices_uncached(item_name, location, num=20):
+    """Offers from every configured provider, merged and deduplicated; partial if one missed its deadline."""
+    if not price_aggregator.providers:
+        raise ValueError("No price provider configured: set SERPAPI_KEY, AFFILIATE_FEED_URL or CATALOG_CSV_PATH.")
+    offers = await price_aggregator.search(item_name, location, num)
+    if offers:
+        await record_price_history(offers, location)
+    return offers
+
+# --- Shopping List Fan-out ---
+# Items and offers are analyzed concurrently; limits come from the
+# PIPELINE_MAX_CONCURRENCY and <UPSTREAM>_MAX_CONCURRENCY environment variables.
+pipeline = ShoppingListPipeline(Upstreams(
+    fetch_offers=fetch_google_shopping_prices_nearby,
+    extract_quantity=extract_quantity_with_llm,
+    fetch_coupons=timed("coupon_lookup")(fetch_couponsapi_coupons),
+    fetch_deals=timed("coupon_lookup")(fetch_couponsapi_deals),
+    compile_plan=timed("plan_compile")(compile_savings_plan),
+    parse_quantity=timed("quantity_rules")(parse_quantity),
+    price_insights=timed("price_insight")(price_insights),
+))
+
+# --- User State ---
+# Profiles and lists are per user, keyed by the X-User-Id header, and live in
+# a shared SQLite file (STATE_STORE_PATH) so every worker sees the same data.
+# `get_state_store()` opens it on first use.
+
+def current_user(x_user_id: str = Header(DEFAULT_USER)) -> str:
+    return x_user_id.strip() or DEFAULT_USER
 
 @app.post("/budget")
-async def set_user_budget(data: BudgetInput):
-    budget["monthly_limit"] = data.monthly_limit
+async def set_user_budget(data: BudgetInput, user_id: str = Depends(current_user)):
+    await get_state_store().set_monthly_limit(user_id, data.monthly_limit)
     return {"message": f"Budget successfully set to ${data.monthly_limit} per month."}
 
 @app.post("/wishlist/items")
-async def add_user_wishlist_item(data: WishlistItemInput):
-    wishlist.append({"name": data.name, "urgency": data.urgency})
+async def add_user_wishlist_item(data: WishlistItemInput, user_id: str = Depends(current_user)):
+    wishlist = await get_state_store().add_item(user_id, "wishlist", {
+        "name": data.name,
+        "urgency": data.urgency,
+        "location": data.location,
+        "target_price": data.target_price
+    })
     return {"message": f"'{data.name}' added to wishlist.", "current_wishlist": wishlist}
 
 @app.post("/groceries/items")
-async def add_user_grocery_item(data: GroceryItemInput):
-    groceries.append({
+async def add_user_grocery_item(data: GroceryItemInput, user_id: str = Depends(current_user)):
+    groceries = await get_state_store().add_item(user_id, "groceries", {
         "name": data.name, 
         "quantity": data.quantity, 
         "frequency": data.frequency
@@ -111,72 +196,123 @@ async def add_user_grocery_item(data: GroceryItemInput):
     return {"message": f"'{data.name}' added to grocery list.", "current_groceries": groceries}
 
 @app.post("/profile/cards")
-async def set_user_credit_cards(data: CardNamesInput):
-    user_profile["credit_cards"] = data.card_names
-    return {"message": "Credit cards updated successfully.", "current_cards": user_profile["credit_cards"]}
+async def set_user_credit_cards(data: CardNamesInput, user_id: str = Depends(current_user)):
+    profile = await get_state_store().set_credit_cards(user_id, data.card_names)
+    return {"message": "Credit cards updated successfully.", "current_cards": profile["credit_cards"]}
+
+async def resolve_items(user_id: str, items: list[str]) -> list[dict]:
+    found = await get_state_store().find_items(user_id, items)
+    return [found.get(name.strip().lower()) or {"name": name} for name in items]
+
+async def user_cards(user_id: str) -> list[str]:
+    return (await get_state_store().get_profile(user_id))["credit_cards"]
+
+# Per-user responses: caches must key on the user header as well as the coding.
+USER_VARY = ("Accept-Encoding", "X-User-Id")
 
 @app.get("/shopping_list_value")
-async def get_shopping_list_value(items: list[str] = Query(...), location: str = Query(...), num: int = Query(10)):
-    all_items_in_memory = wishlist + groceries
-    item_dicts = []
+async def get_shopping_list_value(request: Request, items: list[str] = Query(...), location: str = Query(...),
+                                  num: int = Query(10), detail: bool = Query(False),
+                                  fields: Optional[str] = Query(None), user_id: str = Depends(current_user)):
+    """
+    Best deal and every analyzed offer per item. Offers leave out thumbnails,
+    extensions and coupon lists unless `detail=true`; `fields` (comma-separated,
+    e.g. "title,store,final_effective_price") returns just those fields.
+    Responses carry an ETag, so a repeat with If-None-Match gets a 304 when
+    nothing changed, and are gzip/brotli compressed when the client accepts it.
+    """
+    analyses = await pipeline.analyze(await resolve_items(user_id, items), location, num, await user_cards(user_id))
+    fields = parse_fields(fields)
+    return json_response(
+        request, {item: analysis_to_dict(analysis, fields, detail) for item, analysis in analyses.items()}, vary=USER_VARY
+    )
+
+def stream_event(event: str, payload: dict, format: str) -> str:
+    data = json.dumps(payload, separators=(",", ":"), default=str)
+    if format == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.get("/shopping_list_value/stream")
+async def stream_shopping_list_value(items: list[str] = Query(...), location: str = Query(...), num: int = Query(10),
+                                     detail: bool = Query(False), fields: Optional[str] = Query(None),
+                                     format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+                                     user_id: str = Depends(current_user)):
+    """
+    Streams one result per item as soon as it is analyzed, fastest first,
+    as NDJSON lines or Server-Sent Events. Each result carries the item's
+    best deal; `detail=true` adds the full offer fields and every analyzed
+    offer, and `fields` limits offers to the named fields. A final `done`
+    event reports how many items were sent.
+    """
+    item_dicts = await resolve_items(user_id, items)
+    credit_cards = await user_cards(user_id)
+    fields = parse_fields(fields)
+
+    async def events():
+        sent = 0
+        async for item_name, analysis in pipeline.analyze_stream(item_dicts, location, num, credit_cards):
+            payload = {"item": item_name, **analysis_to_dict(analysis, fields, detail, all_deals=detail),
+                       "offers": len(analysis["all_deals"])}
+            sent += 1
+            yield stream_event("item", payload, format)
+        yield stream_event("done", {"done": True, "items": sent}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.get("/shopping_list_value/rerank")
+async def rerank_cached_offers(items: list[str] = Query(...), location: str = Query(...), num: int = Query(10),
+                               top_k: int = Query(3, ge=1),
+                               by: str = Query("effective_price", pattern="^(effective_price|unit_price)$"),
+                               user_id: str = Depends(current_user)):
+    """
+    Re-ranks already cached offers against the current card profile with
+    vectorized scoring. Makes no upstream calls; items without cached offers
+    come back with an empty list.
+    """
+    from .scoring import OfferBatch
+    offers_by_item = {}
     for name in items:
-        found = next((item for item in all_items_in_memory if item.get("name", "").lower() == name.lower()), None)
-        item_dicts.append(found or {"name": name})
-
-    results = {}
-    for item in item_dicts:
-        item_name = item["name"]
-        offers = await fetch_google_shopping_prices_nearby(item_name, location, num)
-        analyzed_offers = []
-        best_deal = None
-        best_effective_price = float('inf')
-        for offer in offers:
-            base_price = offer.get("extracted_price")
-            if base_price is None:
-                continue
-            try:
-                base_price = float(base_price)
-            except Exception:
-                continue
-            # --- LLM Quantity/Unit Extraction ---
-            total_quantity, unit_type, unit_price = await extract_quantity_with_llm(offer.get("title", ""), base_price)
-            # --- CouponsAPI.org Integrations ---
-            couponsapi_coupons = await fetch_couponsapi_coupons(offer.get("store", ""))
-            couponsapi_deals = await fetch_couponsapi_deals(offer.get("store", ""))
-            # Apply gift card deals
-            gift_card = await fetch_gift_card_deals(offer.get("store", ""))
-            gift_card_discount = gift_card["discount"] if gift_card else 0.0
-            # Apply credit card perks
-            perks = get_credit_card_perks(offer.get("store", ""), user_profile["credit_cards"])
-            best_perk = max([p["value"] for p in perks], default=0.0)
-            price_after_gift_card = base_price * (1 - gift_card_discount)
-            price_after_perks = price_after_gift_card * (1 - best_perk)
-            analyzed = {
-                **offer,
-                "base_price": base_price,
-                "gift_card_discount": gift_card_discount,
-                "price_after_gift_card": round(price_after_gift_card, 2),
-                "credit_card_perk": best_perk,
-                "final_effective_price": round(price_after_perks, 2),
-                "savings_breakdown": {
-                    "gift_card": f"{int(gift_card_discount*100)}% off" if gift_card else None,
-                    "credit_card": f"{int(best_perk*100)}% off" if best_perk else None
-                },
-                "llm_total_quantity": total_quantity,
-                "llm_unit_type": unit_type,
-                "llm_unit_price": unit_price,
-                "couponsapi_coupons": couponsapi_coupons,
-                "couponsapi_deals": couponsapi_deals
-            }
-            analyzed_offers.append(analyzed)
-            if price_after_perks < best_effective_price:
-                best_effective_price = price_after_perks
-                best_deal = analyzed
-        results[item_name] = {
-            "best_deal": best_deal,
-            "all_deals": analyzed_offers
-        }
-    return results
+        entry = shopping_cache.backend.get(shopping_cache_key(name, location, num))
+        offers_by_item[name] = entry.value if entry is not None else []
+    batch = OfferBatch.from_offers(
+        offers_by_item,
+        compile_savings_plan(await user_cards(user_id)),
+        quantity=lambda offer, price: parse_quantity(offer.get("title") or "", price).as_tuple(),
+    )
+    return {
+        item: {"cached": bool(offers_by_item[item]), "top_deals": batch.to_records(rows)}
+        for item, rows in batch.top_k(top_k, by).items()
+    }
+
+@app.get("/purchase_plan")
+async def get_purchase_plan(request: Request, location: str = Query(...), num: int = Query(10),
+                            budget: Optional[float] = Query(None, ge=0),
+                            user_id: str = Depends(current_user)):
+    """
+    Plans this month's purchases across the user's wishlist and groceries.
+
+    Every item is analyzed like /shopping_list_value, then the planner picks
+    the set of purchases with the most value (urgency for wishlist items,
+    frequency for groceries) whose cost, delivery fees included, fits the
+    budget. `budget` defaults to the monthly limit minus what is already spent.
+    """
+    from .planner import plan_purchases
+    if budget is None:
+        limits = await get_state_store().get_budget(user_id)
+        if not limits["monthly_limit"]:
+            raise HTTPException(status_code=400, detail="No monthly budget set; POST /budget or pass ?budget=.")
+        budget = max(0.0, limits["monthly_limit"] - limits["spent"])
+    wishlist = await get_state_store().list_items(user_id, "wishlist")
+    groceries = await get_state_store().list_items(user_id, "groceries")
+    names = list(dict.fromkeys(item["name"] for item in wishlist + groceries))
+    analyses = await pipeline.analyze([{"name": name} for name in names], location, num, await user_cards(user_id))
+    plan = await asyncio.to_thread(plan_purchases, wishlist, groceries, analyses, budget)
+    # Solver timings differ on every run, so they go in a header rather than the ETag'd body.
+    solver = plan.pop("solver")
+    timing = f'plan;dur={solver["solve_ms"]};desc="{solver["store_sets_evaluated"]} store sets"'
+    return json_response(request, plan, vary=USER_VARY, headers={"Server-Timing": timing})
 
 @app.get("/store_coupons_deals")
 async def get_store_coupons_deals(store: str):
@@ -189,4 +325,62 @@ async def get_store_coupons_deals(store: str):
         "store": store,
         "coupons": coupons,
         "deals": deals
-    }
\ No newline at end of file
+    }
+
+@app.get("/coupons/stats")
+async def get_coupon_stats():
+    """Size of the local coupon index plus sync lag and volume metrics."""
+    return {
+        "index": await asyncio.to_thread(get_coupon_store().stats),
+        "sync": coupon_sync.stats() if coupon_sync is not None else None,
+    }
+
+@app.get("/alerts")
+async def get_price_alerts(since: float = Query(0.0), user_id: str = Depends(current_user)):
+    """Recent price-drop alerts for the user's watched wishlist items, oldest first."""
+    return {
+        "alerts": await alert_queue.recent(user_id, since),
+        "watch": price_watch.stats() if price_watch is not None else None,
+    }
+
+@app.get("/upstream/stats")
+async def get_upstream_stats():
+    """Connection pool, per-host retry counters, scheduler queues and price provider deadlines."""
+    return {**get_upstream_client().stats(), "price_providers": price_aggregator.stats()}
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss metrics for the shopping, LLM extraction, user state and price history stores and store-name index."""
+    return {"shopping": shopping_cache.stats(), "llm_extractions": llm_extractor.stats(), "state": get_state_store().stats(),
+            "price_history": get_price_history().stats(), "store_index": get_store_index().stats()}
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Stage and request latency histograms plus cache and scheduler gauges, in
+    the Prometheus text format. 404 when METRICS_ENABLED=0.
+    """
+    body = render_latest()
+    if body is None:
+        return Response(status_code=404)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+def collect_gauges():
+    shopping = shopping_cache.stats()
+    llm = llm_extractor.stats()
+    yield ("smart_budget_cache_hits", "Cache hits since start.",
+           {("shopping",): shopping.get("hits"), ("llm_extractions",): llm.get("hits")})
+    yield ("smart_budget_cache_misses", "Cache misses since start.",
+           {("shopping",): shopping.get("misses"), ("llm_extractions",): llm.get("misses")})
+
+def collect_scheduler_gauges():
+    providers = get_upstream_client().stats().get("scheduler") or {}
+    yield ("smart_budget_upstream_queue_depth", "Upstream calls waiting for admission.",
+           {(name,): p["queue_depth"] for name, p in providers.items()})
+    yield ("smart_budget_upstream_in_flight", "Upstream calls currently running.",
+           {(name,): p["in_flight"] for name, p in providers.items()})
+    yield ("smart_budget_upstream_deduped", "Upstream calls merged into an identical in-flight call.",
+           {(name,): p["deduped"] for name, p in providers.items()})
+
+registry.register_collector(("cache",), collect_gauges)
+registry.register_collector(("provider",), collect_scheduler_gauges)
@@ -0,0 +1,121 @@
+# src/smart_budget_mcp/mcp_server.py
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from mcp.server.fastmcp import Context, FastMCP
+
+# The HTTP app module owns the engine wiring. Importing it gives the MCP tools
+# the same long-lived pipeline, pooled upstream client, shopping and LLM
+# caches, compiled savings plans and stores as the REST endpoints.
+# (`from . import main` would return the package's `main()` entry point instead.)
+from .main import (
+    alert_queue, app, lifespan as app_lifespan, pipeline, resolve_items, user_cards
+)
+from .coupon_store import get_coupon_store
+from .offers import analysis_to_dict
+from .state import DEFAULT_USER, get_state_store
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Same startup/shutdown as the HTTP app: pooled client, coupon sync, price watch.
+    async with app_lifespan(app):
+        yield
+
+
+mcp = FastMCP(
+    "smart-budget",
+    instructions=(
+        "Finds the cheapest way to buy items after stacking gift-card discounts, "
+        "credit-card perks and coupons, and manages the user's budget and cards."
+    ),
+    lifespan=lifespan,
+)
+
+
+# --- Shopping Analysis ---
+@mcp.tool()
+async def analyze_shopping_list(items: list[str], location: str, num: int = 10, detail: bool = False,
+                                user_id: str = DEFAULT_USER, ctx: Optional[Context] = None) -> dict:
+    """
+    Finds the best effective price for each item near `location`, after the
+    user's gift-card discounts, credit-card perks and store coupons.
+
+    Items are analyzed concurrently and each one is reported as a progress
+    notification as soon as it is ready, so long lists show results early.
+    Set `detail` to include every analyzed offer, not just the best one.
+    """
+    item_dicts = await resolve_items(user_id, items)
+    credit_cards = await user_cards(user_id)
+    results = {}
+    async for item_name, analysis in pipeline.analyze_stream(item_dicts, location, num, credit_cards):
+        best_deal = analysis["best_deal"]
+        results[item_name] = {**analysis_to_dict(analysis, detail=detail, all_deals=detail),
+                              "offers": len(analysis["all_deals"])}
+        if ctx is not None:
+            summary = (
+                f"{item_name}: ${best_deal.final_effective_price} at {best_deal.store}"
+                if best_deal else f"{item_name}: no priced offers"
+            )
+            await ctx.report_progress(len(results), len(item_dicts), summary)
+    return results
+
+
+@mcp.tool()
+async def price_alerts(since: float = 0.0, user_id: str = DEFAULT_USER) -> list[dict]:
+    """Price-drop alerts raised for the user's watched wishlist items since a Unix timestamp."""
+    return await alert_queue.recent(user_id, since)
+
+
+# --- Coupons ---
+@mcp.tool()
+async def find_coupons(store: str, kind: Optional[str] = None, limit: int = 20) -> list[dict]:
+    """
+    Unexpired coupons and deals for a store from the local coupon index.
+    `kind` is "coupon" (has a code), "deal" (no code) or omitted for both.
+    """
+    return get_coupon_store().for_store(store, kind=kind, limit=limit)
+
+
+@mcp.tool()
+async def search_coupons(text: str, store: Optional[str] = None, limit: int = 20) -> list[dict]:
+    """Full-text search over coupon titles, descriptions and stores."""
+    # An FTS query can scan far more rows than a store lookup, so it runs off the loop.
+    return await asyncio.to_thread(get_coupon_store().search, text, store=store, limit=limit)
+
+
+# --- Budget and Profile ---
+@mcp.tool()
+async def get_budget(user_id: str = DEFAULT_USER) -> dict:
+    """The user's monthly limit, amount spent and spending history."""
+    return await get_state_store().get_budget(user_id)
+
+
+@mcp.tool()
+async def set_monthly_budget(monthly_limit: int, user_id: str = DEFAULT_USER) -> dict:
+    """Sets the user's monthly spending limit in dollars."""
+    return await get_state_store().set_monthly_limit(user_id, monthly_limit)
+
+
+@mcp.tool()
+async def set_credit_cards(card_names: list[str], user_id: str = DEFAULT_USER) -> dict:
+    """Replaces the user's credit cards; perks are recompiled once per distinct card set."""
+    return await get_state_store().set_credit_cards(user_id, card_names)
+
+
+@mcp.tool()
+async def add_wishlist_item(name: str, location: Optional[str] = None, target_price: Optional[float] = None,
+                            urgency: str = "not set", user_id: str = DEFAULT_USER) -> list[dict]:
+    """Adds an item to the wishlist; with a location it is also watched for price drops."""
+    return await get_state_store().add_item(user_id, "wishlist", {
+        "name": name,
+        "urgency": urgency,
+        "location": location,
+        "target_price": target_price
+    })
+
+
+def run():
+    """Serves the tools over stdio for one long-lived MCP client session."""
+    mcp.run("stdio")
@@ -0,0 +1,155 @@
+# src/smart_budget_mcp/metrics.py
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# With METRICS_ENABLED=0, spans are a shared no-op and /metrics is empty.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# Seconds; spans from sub-millisecond dict lookups up to slow upstream calls.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (str(bound),))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]:.6f}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    """
+    Histograms plus gauge collectors, rendered in the Prometheus text format.
+
+    Collectors are callables returning (name, help, {label values: value}) for
+    numbers that already live elsewhere, e.g. cache hit counters, so they are
+    read at scrape time instead of being tracked twice.
+    """
+
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.collectors: list[tuple[tuple[str, ...], Callable[[], Iterable[tuple[str, str, dict]]]]] = []
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Histogram:
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, help, labelnames)
+        return self.histograms[name]
+
+    def register_collector(self, labelnames: tuple[str, ...],
+                           collect: Callable[[], Iterable[tuple[str, str, dict]]]):
+        self.collectors.append((labelnames, collect))
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self.histograms.values():
+            lines.extend(histogram.render())
+        for labelnames, collect in self.collectors:
+            try:
+                gauges = list(collect())
+            except Exception:
+                logger.exception("Metrics collector failed")
+                continue
+            for name, help, values in gauges:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in values.items():
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labelnames, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+stage_seconds = registry.histogram(
+    "smart_budget_stage_duration_seconds", "Time spent in each analysis stage.", ("stage",)
+)
+http_seconds = registry.histogram(
+    "smart_budget_http_request_duration_seconds", "HTTP request latency by route and status.", ("route", "status")
+)
+
+_NOOP = nullcontext()
+
+
+@contextmanager
+def _span(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("span", extra={"stage": stage, "duration_ms": round(elapsed * 1000, 3)})
+
+
+def span(stage: str):
+    """Times a block into the stage histogram: `with span("scoring"): ...`."""
+    return _span(stage) if METRICS_ENABLED else _NOOP
+
+
+def timed(stage: str) -> Callable:
+    """Decorator form of `span` for sync and async functions; returns `fn` untouched when disabled."""
+    def decorate(fn: Callable) -> Callable:
+        if not METRICS_ENABLED:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def render_latest() -> Optional[str]:
+    return registry.render() if METRICS_ENABLED else None
@@ -0,0 +1,121 @@
+# src/smart_budget_mcp/offers.py
+from dataclasses import dataclass
+from typing import Callable, Collection, Optional
+
+from .savings_plan import StackScore
+
+# Bulky SerpApi and coupon fields, left out of responses unless detail=true.
+HEAVY_OFFER_FIELDS = frozenset({"thumbnail", "extensions", "couponsapi_coupons", "couponsapi_deals"})
+
+
+@dataclass(slots=True)
+class AnalyzedOffer:
+    """
+    One offer after the savings stack and enrichment.
+
+    `source` is the fetched SerpApi offer itself, shared with the shopping
+    cache rather than copied, so fields nothing scores on (thumbnail,
+    extensions, ...) cost no extra memory and are only read when the offer is
+    serialized. Coupon lists are shared per store within a request.
+    """
+    source: dict
+    score: StackScore
+    llm_total_quantity: Optional[float] = None
+    llm_unit_type: Optional[str] = None
+    llm_unit_price: Optional[float] = None
+    quantity_source: Optional[str] = None
+    couponsapi_coupons: Optional[list] = None
+    couponsapi_deals: Optional[list] = None
+    price_history: Optional[dict] = None
+
+    @property
+    def store(self) -> Optional[str]:
+        return self.source.get("store")
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.source.get("title")
+
+    @property
+    def link(self) -> Optional[str]:
+        return self.source.get("link")
+
+    @property
+    def delivery(self) -> Optional[str]:
+        return self.source.get("delivery")
+
+    @property
+    def final_effective_price(self) -> float:
+        return round(self.score.final_price, 2)
+
+    def savings_breakdown(self) -> dict:
+        score = self.score
+        breakdown = {
+            "gift_card": f"{int(score.gift_card_discount*100)}% off" if score.gift_card else None,
+            "credit_card": f"{int(score.credit_card_perk*100)}% off" if score.credit_card_perk else None
+        }
+        for name, discount in score.layer_discounts.items():
+            breakdown[name] = f"{int(discount*100)}% off"
+        return breakdown
+
+    def get(self, name: str, default=None):
+        """A field by its response name: computed, enrichment or raw SerpApi field."""
+        computed = _COMPUTED_FIELDS.get(name)
+        if computed is not None:
+            return computed(self)
+        if name in _ENRICHMENT_FIELDS:
+            return getattr(self, name)
+        return self.source.get(name, default)
+
+    def to_dict(self, fields: Optional[Collection[str]] = None, detail: bool = False) -> dict:
+        """
+        Serializes the offer for a response.
+
+        Args:
+            fields: Only these fields, in this order (heavy ones included if asked for).
+            detail: Without `fields`, include HEAVY_OFFER_FIELDS as well.
+        """
+        if fields is not None:
+            return {name: self.get(name) for name in fields}
+        if detail:
+            out = dict(self.source)
+        else:
+            out = {k: v for k, v in self.source.items() if k not in HEAVY_OFFER_FIELDS}
+        for name, compute in _COMPUTED_FIELDS.items():
+            out[name] = compute(self)
+        for name in _ENRICHMENT_FIELDS:
+            if detail or name not in HEAVY_OFFER_FIELDS:
+                out[name] = getattr(self, name)
+        return out
+
+
+_COMPUTED_FIELDS: dict[str, Callable[[AnalyzedOffer], object]] = {
+    "base_price": lambda o: o.score.base_price,
+    "gift_card_discount": lambda o: o.score.gift_card_discount,
+    "price_after_gift_card": lambda o: round(o.score.price_after_gift_card, 2),
+    "credit_card_perk": lambda o: o.score.credit_card_perk,
+    "final_effective_price": lambda o: o.final_effective_price,
+    "savings_breakdown": AnalyzedOffer.savings_breakdown,
+}
+_ENRICHMENT_FIELDS = (
+    "llm_total_quantity", "llm_unit_type", "llm_unit_price", "quantity_source",
+    "couponsapi_coupons", "couponsapi_deals", "price_history",
+)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """"title,store, final_effective_price" -> ("title", "store", "final_effective_price"); blank -> None."""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    return names or None
+
+
+def analysis_to_dict(analysis: dict, fields: Optional[Collection[str]] = None, detail: bool = False,
+                     all_deals: bool = True) -> dict:
+    """Serializes one item's pipeline analysis ({"best_deal", "all_deals"}) for a response."""
+    best_deal = analysis["best_deal"]
+    out = {"best_deal": best_deal.to_dict(fields, detail) if best_deal is not None else None}
+    if all_deals:
+        out["all_deals"] = [offer.to_dict(fields, detail) for offer in analysis["all_deals"]]
+    return out
@@ -0,0 +1,226 @@
+# src/smart_budget_mcp/pipeline.py
+import asyncio
+import os
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .metrics import span
+from .offers import AnalyzedOffer
+from .quantity_parser import MIN_CONFIDENCE, ParsedQuantity
+from .savings_plan import SavingsPlan
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+# --- Concurrency Limits ---
+@dataclass
+class ConcurrencyLimits:
+    """
+    Caps on how many upstream calls the pipeline keeps in flight.
+
+    `global_limit` bounds the total across every upstream, while `per_upstream`
+    bounds each provider on its own so a slow provider cannot starve the rest.
+    """
+    global_limit: int = 32
+    per_upstream: dict[str, int] = field(default_factory=lambda: {
+        "serpapi": 8,
+        "coupons": 16,
+    })
+
+    @classmethod
+    def from_env(cls) -> "ConcurrencyLimits":
+        limits = cls()
+        limits.global_limit = _env_int("PIPELINE_MAX_CONCURRENCY", limits.global_limit)
+        for name, default in list(limits.per_upstream.items()):
+            limits.per_upstream[name] = _env_int(f"{name.upper()}_MAX_CONCURRENCY", default)
+        return limits
+
+
+class UpstreamLimiter:
+    """Runs upstream calls under the global and the per-upstream semaphores."""
+
+    def __init__(self, limits: ConcurrencyLimits):
+        self.limits = limits
+        self._global = asyncio.Semaphore(limits.global_limit)
+        self._upstream = {name: asyncio.Semaphore(n) for name, n in limits.per_upstream.items()}
+
+    async def call(self, upstream: str, fn: Callable[..., Awaitable], *args):
+        semaphore = self._upstream.get(upstream)
+        async with self._global:
+            if semaphore is None:
+                return await fn(*args)
+            async with semaphore:
+                return await fn(*args)
+
+
+# --- Upstream Wiring ---
+@dataclass
+class Upstreams:
+    """The fetchers the pipeline fans out to. Swappable for stubs in benchmarks."""
+    fetch_offers: Callable[[str, str, int], Awaitable[list[dict]]]
+    extract_quantity: Callable[[str, float], Awaitable[tuple]]
+    fetch_coupons: Callable[[str], Awaitable[list]]
+    fetch_deals: Callable[[str], Awaitable[list]]
+    # Returns the compiled savings stack (gift cards, card perks, ...) for a card set.
+    compile_plan: Callable[[list[str]], SavingsPlan]
+    # Rule-based parser tried before the LLM; the LLM only runs below MIN_CONFIDENCE.
+    parse_quantity: Optional[Callable[[str, Optional[float]], ParsedQuantity]] = None
+    # ([(title, store, price)], location) -> how each price compares with its recorded history.
+    # Blocking (it reads the history store), so it runs once per item off the event loop.
+    price_insights: Optional[Callable[[list[tuple[str, str, float]], str], list[Optional[dict]]]] = None
+
+
+class _RequestScope:
+    """
+    Per-request memo of store-level lookups.
+
+    Coupons and deals depend only on the store, so offers
+    from the same store within one request share a single in-flight call.
+    """
+
+    def __init__(self, limiter: UpstreamLimiter):
+        self.limiter = limiter
+        self._tasks: dict[tuple[Callable, str], asyncio.Task] = {}
+
+    def once(self, upstream: str, fn: Callable[[str], Awaitable], store: str) -> asyncio.Task:
+        key = (fn, store)
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.limiter.call(upstream, fn, store))
+            self._tasks[key] = task
+        return task
+
+
+# --- Fan-out Engine ---
+class ShoppingListPipeline:
+    """
+    Analyzes a shopping list by fetching every item in parallel and enriching
+    every offer in parallel, bounded by `ConcurrencyLimits`.
+    """
+
+    def __init__(self, upstreams: Upstreams, limits: Optional[ConcurrencyLimits] = None):
+        self.upstreams = upstreams
+        self.limits = limits or ConcurrencyLimits.from_env()
+        self._limiter: Optional[UpstreamLimiter] = None
+
+    @property
+    def limiter(self) -> UpstreamLimiter:
+        # Created lazily so the semaphores bind to the running event loop.
+        if self._limiter is None:
+            self._limiter = UpstreamLimiter(self.limits)
+        return self._limiter
+
+    async def analyze(self, item_dicts: list[dict], location: str, num: int, credit_cards: list[str]) -> dict:
+        scope = _RequestScope(self.limiter)
+        plan = self.upstreams.compile_plan(credit_cards)
+        analyses = await asyncio.gather(*(
+            self.analyze_item(item["name"], location, num, plan, scope) for item in item_dicts
+        ))
+        return {item["name"]: analysis for item, analysis in zip(item_dicts, analyses)}
+
+    async def analyze_stream(self, item_dicts: list[dict], location: str, num: int,
+                             credit_cards: list[str]) -> AsyncIterator[tuple[str, dict]]:
+        """
+        Yields (item_name, analysis) as each item finishes, fastest first.
+        Items still running are cancelled if the consumer stops early.
+        """
+        scope = _RequestScope(self.limiter)
+        plan = self.upstreams.compile_plan(credit_cards)
+
+        async def run(item_name: str) -> tuple[str, dict]:
+            return item_name, await self.analyze_item(item_name, location, num, plan, scope)
+
+        tasks = [asyncio.ensure_future(run(item["name"])) for item in item_dicts]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def analyze_item(self, item_name: str, location: str, num: int, plan: SavingsPlan,
+                           scope: Optional[_RequestScope] = None) -> dict:
+        """
+        Returns {"best_deal": AnalyzedOffer | None, "all_deals": [AnalyzedOffer]};
+        serialize with `offers.analysis_to_dict` at the API edge.
+        """
+        scope = scope or _RequestScope(self.limiter)
+        offers = await self.limiter.call("serpapi", self.upstreams.fetch_offers, item_name, location, num)
+        priced = [(offer, price) for offer, price in ((o, _base_price(o)) for o in offers) if price is not None]
+        lookups = [self.enrich_offer(offer, price, scope) for offer, price in priced]
+        price_insights = self.upstreams.price_insights
+        if price_insights is not None and priced:
+            lookups.append(asyncio.to_thread(
+                price_insights, [(offer.get("title"), offer.get("store"), price) for offer, price in priced], location
+            ))
+        results = await asyncio.gather(*lookups)
+        enrichments = results[:len(priced)]
+        insights = results[len(priced)] if len(results) > len(priced) else [None] * len(priced)
+        # Gift cards, card perks and any extra layers are scored in one pass,
+        # so they share the "savings_stack" span.
+        with span("savings_stack"):
+            scores = plan.score([offer.get("store") for offer, _ in priced], [price for _, price in priced])
+        analyzed_offers = []
+        best_deal = None
+        best_effective_price = float('inf')
+        with span("scoring"):
+            for (offer, price), enrichment, score, insight in zip(priced, enrichments, scores, insights):
+                analyzed = AnalyzedOffer(offer, score, **enrichment)
+                analyzed.price_history = insight
+                analyzed_offers.append(analyzed)
+                if score.final_price < best_effective_price:
+                    best_effective_price = score.final_price
+                    best_deal = analyzed
+        return {
+            "best_deal": best_deal,
+            "all_deals": analyzed_offers
+        }
+
+    async def extract_quantity(self, title: str, price: float) -> tuple[tuple, Optional[str]]:
+        """Returns ((total_quantity, unit_type, unit_price), source) where source is "rules" or "llm"."""
+        parsed = None
+        if self.upstreams.parse_quantity is not None:
+            parsed = self.upstreams.parse_quantity(title, price)
+            if parsed.confidence >= MIN_CONFIDENCE:
+                return parsed.as_tuple(), "rules"
+        # Not wrapped in the limiter: the extractor batches concurrent misses into
+        # one prompt and bounds its own prompt concurrency (LLM_MAX_CONCURRENCY).
+        extracted = await self.upstreams.extract_quantity(title, price)
+        if extracted[0] is not None:
+            return extracted, "llm"
+        if parsed is not None and parsed.total_quantity is not None:
+            return parsed.as_tuple(), "rules"
+        return extracted, None
+
+    async def enrich_offer(self, offer: dict, base_price: float, scope: _RequestScope) -> dict:
+        """Quantity extraction plus the store's coupons and deals for one offer."""
+        store = offer.get("store", "") or ""
+        quantity, couponsapi_coupons, couponsapi_deals = await asyncio.gather(
+            self.extract_quantity(offer.get("title", "") or "", base_price),
+            scope.once("coupons", self.upstreams.fetch_coupons, store),
+            scope.once("coupons", self.upstreams.fetch_deals, store),
+        )
+        (total_quantity, unit_type, unit_price), quantity_source = quantity
+        return {
+            "llm_total_quantity": total_quantity,
+            "llm_unit_type": unit_type,
+            "llm_unit_price": unit_price,
+            "quantity_source": quantity_source,
+            "couponsapi_coupons": couponsapi_coupons,
+            "couponsapi_deals": couponsapi_deals
+        }
+
+
+def _base_price(offer: dict) -> Optional[float]:
+    base_price = offer.get("extracted_price")
+    if base_price is None:
+        return None
+    try:
+        return float(base_price)
+    except Exception:
+        return None
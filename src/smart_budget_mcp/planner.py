@@ -0,0 +1,251 @@
+# src/smart_budget_mcp/planner.py
+import itertools
+import re
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .offers import AnalyzedOffer
+from .store_index import canonical_store
+
+# --- Item Value ---
+# Value points per item. Groceries are recurring essentials and outrank all
+# but urgent wishlist items; unknown labels get the "not set" value.
+URGENCY_VALUE = {"urgent": 8, "high": 8, "medium": 4, "low": 2, "not set": 3}
+FREQUENCY_VALUE = {"daily": 10, "weekly": 8, "biweekly": 6, "monthly": 5}
+# The budget is monthly, so recurring groceries are costed for a month of purchases.
+PURCHASES_PER_MONTH = {"daily": 30, "weekly": 4, "biweekly": 2, "monthly": 1}
+
+_FEE_RE = re.compile(r"\$\s*(\d+(?:\.\d+)?)")
+# Every combination of paid stores is tried while items x store sets stays under
+# this; larger plans fall back to local search over store sets.
+EXHAUSTIVE_WORK = 4096
+
+
+def delivery_fee(offer: AnalyzedOffer) -> float:
+    """
+    Fee from SerpApi's delivery text: "Delivery $5.99" -> 5.99. Free delivery,
+    pickup and offers without delivery text count as 0.
+    """
+    text = (offer.delivery or "").lower()
+    if not text or "free" in text:
+        return 0.0
+    match = _FEE_RE.search(text)
+    return float(match.group(1)) if match else 0.0
+
+
+@dataclass
+class PlanItem:
+    """One wishlist or grocery entry with its cheapest offer at each store."""
+    name: str
+    list_name: str
+    value: int
+    units: float
+    # canonical store (see store_index) -> analyzed offer with the lowest final_effective_price there.
+    options: dict[str, AnalyzedOffer]
+
+
+def plan_items(wishlist: list[dict], groceries: list[dict], analyses: dict[str, dict]) -> list[PlanItem]:
+    """Builds plan items from the user's lists and the pipeline's per-item analyses (keyed by item name)."""
+    items = []
+    for list_name, entries in (("wishlist", wishlist), ("groceries", groceries)):
+        for entry in entries:
+            if list_name == "wishlist":
+                value = URGENCY_VALUE.get(str(entry.get("urgency") or "not set").lower(), URGENCY_VALUE["not set"])
+                units = 1.0
+            else:
+                frequency = str(entry.get("frequency") or "weekly").lower()
+                value = FREQUENCY_VALUE.get(frequency, FREQUENCY_VALUE["monthly"])
+                units = float(entry.get("quantity") or 1) * PURCHASES_PER_MONTH.get(frequency, 1)
+            options: dict[str, AnalyzedOffer] = {}
+            for offer in (analyses.get(entry["name"]) or {}).get("all_deals", []):
+                store = canonical_store(offer.store)
+                if store and (store not in options or offer.score.final_price < options[store].score.final_price):
+                    options[store] = offer
+            items.append(PlanItem(entry["name"], list_name, value, units, options))
+    return items
+
+
+@dataclass
+class _Solution:
+    value: int
+    item_cost: float
+    fees: dict[str, float]
+    # item index -> chosen store
+    choices: dict[int, str]
+
+    @property
+    def total_cost(self) -> float:
+        return self.item_cost + sum(self.fees.values())
+
+    def key(self) -> tuple[int, float]:
+        """Higher value first, then lower total cost."""
+        return self.value, -round(self.total_cost, 6)
+
+
+class PurchasePlanner:
+    """
+    Picks the purchase set that fits a budget and maximizes total item value.
+
+    For a fixed set of open stores each item's cheapest open offer is known,
+    so the selection is a 0/1 knapsack. Values are small integers, so it is
+    solved exactly by DP over total value (minimum cost per value, one
+    vectorized pass per item). Delivery fees are paid once per store used,
+    which couples items. With few paid stores every store set is tried,
+    which is exact; otherwise the set is chosen by add/drop local search
+    from the fee-free stores. Every store set's knapsack is memoized.
+    """
+
+    def __init__(self, items: list[PlanItem]):
+        self.items = items
+        self.fees: dict[str, float] = {}
+        self.store_names: dict[str, str] = {}
+        for item in items:
+            for store, offer in item.options.items():
+                fee = delivery_fee(offer)
+                self.fees[store] = min(fee, self.fees.get(store, fee))
+                self.store_names.setdefault(store, offer.store or store)
+        self._memo: dict[frozenset, _Solution] = {}
+
+    def _knapsack(self, stores: frozenset, budget: float) -> _Solution:
+        fees = {s: self.fees[s] for s in stores}
+        capacity = budget - sum(fees.values())
+        candidates = []
+        for index, item in enumerate(self.items):
+            offers = [(offer.final_effective_price * item.units, store)
+                      for store, offer in item.options.items() if store in stores]
+            if offers:
+                cost, store = min(offers)
+                if cost <= capacity:
+                    candidates.append((index, item.value, cost, store))
+        if capacity < 0 or not candidates:
+            return _Solution(0, 0.0, {}, {})
+
+        total_value = sum(value for _, value, _, _ in candidates)
+        best_cost = np.full(total_value + 1, np.inf)
+        best_cost[0] = 0.0
+        took = np.zeros((len(candidates), total_value + 1), dtype=bool)
+        for row, (_, value, cost, _) in enumerate(candidates):
+            with_item = best_cost[:-value] + cost
+            better = with_item < best_cost[value:]
+            took[row, value:] = better
+            best_cost[value:] = np.where(better, with_item, best_cost[value:])
+
+        reachable = np.nonzero(best_cost <= capacity + 1e-9)[0]
+        v = int(reachable[-1])
+        solution_value, item_cost = v, float(best_cost[v])
+        choices = {}
+        for row in range(len(candidates) - 1, -1, -1):
+            if v > 0 and took[row, v]:
+                index, value, _, store = candidates[row]
+                choices[index] = store
+                v -= value
+        used = set(choices.values())
+        return _Solution(solution_value, item_cost, {s: f for s, f in fees.items() if s in used}, choices)
+
+    def _evaluate(self, stores: frozenset, budget: float) -> _Solution:
+        """Best plan using only `stores`; re-solved without fees for stores it left unused."""
+        solution = self._memo.get(stores)
+        if solution is None:
+            solution = self._knapsack(stores, budget)
+            used = frozenset(solution.choices.values()) | frozenset(s for s in stores if not self.fees[s])
+            if used != stores:
+                solution = max(solution, self._evaluate(used, budget), key=_Solution.key)
+            self._memo[stores] = solution
+        return solution
+
+    def solve(self, budget: float) -> dict:
+        started = time.perf_counter()
+        self._memo.clear()
+        free = frozenset(s for s, fee in self.fees.items() if not fee)
+        paid = [s for s, fee in self.fees.items() if fee]
+        if len(self.items) << len(paid) <= EXHAUSTIVE_WORK:
+            best = self._evaluate(free, budget)
+            for size in range(1, len(paid) + 1):
+                for opened in itertools.combinations(paid, size):
+                    candidate = self._evaluate(free | frozenset(opened), budget)
+                    if candidate.key() > best.key():
+                        best = candidate
+            return self._report(best, budget, started)
+        current_stores = free
+        best = self._evaluate(current_stores, budget)
+        # Also start from every store open, in case one large basket justifies all the fees.
+        opened = self._evaluate(frozenset(self.fees), budget)
+        if opened.key() > best.key():
+            best, current_stores = opened, frozenset(self.fees)
+        while True:
+            moves = [current_stores ^ {store} for store in paid]
+            if not moves:
+                break
+            stores, candidate = max(((s, self._evaluate(s, budget)) for s in moves), key=lambda m: m[1].key())
+            if candidate.key() <= best.key():
+                break
+            best, current_stores = candidate, stores
+        return self._report(best, budget, started)
+
+    def _report(self, solution: _Solution, budget: float, started: float) -> dict:
+        stores: dict[str, dict] = {}
+        purchases, deferred = [], []
+        for index, item in enumerate(self.items):
+            store = solution.choices.get(index)
+            if store is None:
+                cheapest = min((o.final_effective_price for o in item.options.values()), default=None)
+                deferred.append({
+                    "item": item.name,
+                    "list": item.list_name,
+                    "value": item.value,
+                    "reason": "over_budget" if item.options else "no_offers",
+                    "cheapest_cost": round(cheapest * item.units, 2) if cheapest is not None else None,
+                })
+                continue
+            offer = item.options[store]
+            cost = offer.final_effective_price * item.units
+            purchases.append({
+                "item": item.name,
+                "list": item.list_name,
+                "value": item.value,
+                "store": offer.store,
+                "title": offer.title,
+                "link": offer.link,
+                "unit_price": offer.final_effective_price,
+                "units": item.units,
+                "cost": round(cost, 2),
+            })
+            basket = stores.setdefault(self.store_names[store], {
+                "items": [], "subtotal": 0.0, "delivery_fee": solution.fees.get(store, 0.0)
+            })
+            basket["items"].append(item.name)
+            basket["subtotal"] = round(basket["subtotal"] + cost, 2)
+        return {
+            "budget": round(budget, 2),
+            "total_cost": round(solution.total_cost, 2),
+            "item_cost": round(solution.item_cost, 2),
+            "delivery_fees": round(sum(solution.fees.values()), 2),
+            "value": solution.value,
+            "max_value": sum(item.value for item in self.items if item.options),
+            "stores": stores,
+            "purchases": purchases,
+            "deferred": deferred,
+            "solver": {
+                "store_sets_evaluated": len(self._memo),
+                "solve_ms": round((time.perf_counter() - started) * 1000, 2),
+            },
+        }
+
+
+def plan_purchases(wishlist: list[dict], groceries: list[dict], analyses: dict[str, dict],
+                   budget: float) -> dict:
+    """
+    Chooses what to buy this month, and where, within `budget`.
+
+    Args:
+        wishlist: Wishlist entries (name, urgency).
+        groceries: Grocery entries (name, quantity, frequency).
+        analyses: Pipeline output per item name, with every analyzed offer in "all_deals".
+        budget: Dollars available, delivery fees included.
+
+    Returns:
+        Purchases grouped by store, deferred items and the plan's value and cost.
+    """
+    return PurchasePlanner(plan_items(wishlist, groceries, analyses)).solve(budget)
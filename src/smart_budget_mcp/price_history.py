@@ -0,0 +1,265 @@
+# src/smart_budget_mcp/price_history.py
+import os
+import re
+import sqlite3
+import statistics
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from .coupon_store import normalize_store
+
+DAY = 24 * 60 * 60
+# A price counts as a sale when it is this far below the typical daily median.
+SALE_THRESHOLD = float(os.getenv("PRICE_SALE_THRESHOLD", "0.10"))
+# Days of prior history needed before anything is called a sale.
+SALE_MIN_DAYS = int(os.getenv("PRICE_SALE_MIN_DAYS", "3"))
+RETENTION_DAYS = int(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "365"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_prices (
+    series_key TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    min_price REAL NOT NULL,
+    median_price REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    PRIMARY KEY (series_key, day)
+) WITHOUT ROWID;
+"""
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def product_key(title: Optional[str]) -> str:
+    return _NON_WORD_RE.sub(" ", (title or "").lower()).strip()
+
+
+def series_key(title: Optional[str], store: Optional[str], location: Optional[str]) -> str:
+    """One price series per (normalized product title, store, location)."""
+    return f"{product_key(title)}|{normalize_store(store)}|{product_key(location)}"
+
+
+class PriceSeries:
+    """
+    Daily-downsampled prices for one series, as parallel append-only arrays.
+
+    Only the newest day keeps its raw samples (to maintain an exact median);
+    older days are just (day, min, median, samples).
+    """
+    __slots__ = ("days", "mins", "medians", "samples", "_today")
+
+    def __init__(self):
+        self.days = array("l")
+        self.mins = array("d")
+        self.medians = array("d")
+        self.samples = array("l")
+        self._today: list[float] = []
+
+    def add(self, day: int, price: float) -> bool:
+        """Adds one observation; points older than the newest day are dropped."""
+        if self.days and day < self.days[-1]:
+            return False
+        if not self.days or day > self.days[-1]:
+            self.days.append(day)
+            self.mins.append(price)
+            self.medians.append(price)
+            self.samples.append(1)
+            self._today = [price]
+            return True
+        if not self._today:
+            # Day reloaded from disk: its raw samples are gone, so its median stands in for them.
+            self._today = [self.medians[-1]]
+        insort(self._today, price)
+        self.mins[-1] = min(self.mins[-1], price)
+        self.medians[-1] = statistics.median(self._today)
+        self.samples[-1] += 1
+        return True
+
+    def start(self, since_day: int) -> int:
+        return bisect_left(self.days, since_day)
+
+    def lowest(self, since_day: int) -> Optional[float]:
+        start = self.start(since_day)
+        return min(self.mins[start:]) if start < len(self.days) else None
+
+    def typical(self, since_day: int, before_day: int) -> tuple[Optional[float], int]:
+        """(median of the daily medians in [since_day, before_day), days observed)."""
+        start, end = self.start(since_day), bisect_left(self.days, before_day)
+        if start >= end:
+            return None, 0
+        return statistics.median(self.medians[start:end]), end - start
+
+
+class PriceHistory:
+    """
+    Append-only price history for every observed offer.
+
+    Observations are folded into one row per series and day in SQLite
+    (`PRICE_HISTORY_PATH`), and recently used series are held in memory as
+    `PriceSeries` arrays so "lowest in N days" and "is this a sale" are
+    answered with a bisect and a slice. Several workers can share the file:
+    cached series are dropped whenever SQLite's `data_version` shows another
+    connection committed, and `record` re-reads under the write lock, so
+    one worker's daily row never overwrites another's.
+    """
+
+    def __init__(self, path: str = os.getenv("PRICE_HISTORY_PATH", "price_history.sqlite3"),
+                 max_series: int = 50_000):
+        self.path = path
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._series: OrderedDict[str, PriceSeries] = OrderedDict()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self.observations = 0
+
+    def _sync(self):
+        """Drops cached series if another connection has committed since we last looked. Caller holds the lock."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._series.clear()
+            self._data_version = version
+
+    def _get_series(self, key: str) -> PriceSeries:
+        """Returns the in-memory series for `key`, loading it from disk on first use. Caller holds the lock."""
+        series = self._series.get(key)
+        if series is not None:
+            self._series.move_to_end(key)
+            return series
+        series = PriceSeries()
+        for day, min_price, median_price, samples in self._conn.execute(
+            "SELECT day, min_price, median_price, samples FROM daily_prices WHERE series_key = ? ORDER BY day", (key,)
+        ):
+            series.days.append(day)
+            series.mins.append(min_price)
+            series.medians.append(median_price)
+            series.samples.append(samples)
+        self._series[key] = series
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return series
+
+    # --- Writes ---
+    def record(self, offers: Iterable[dict], location: str, now: Optional[float] = None) -> int:
+        """Appends the priced offers from one shopping response; returns how many were recorded."""
+        day = int((now or time.time()) // DAY)
+        rows = []
+        with self._lock:
+            # Take the write lock first: no other worker can commit until we do,
+            # so series (re)loaded below include every row written so far.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                for offer in offers:
+                    try:
+                        price = float(offer.get("extracted_price"))
+                    except (TypeError, ValueError):
+                        continue
+                    key = series_key(offer.get("title"), offer.get("store"), location)
+                    series = self._get_series(key)
+                    if series.add(day, price):
+                        rows.append((key, day, series.mins[-1], series.medians[-1], series.samples[-1]))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO daily_prices (series_key, day, min_price, median_price, samples)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                # Cached series may hold points that were never written.
+                self._series.clear()
+                raise
+            self.observations += len(rows)
+        return len(rows)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drops days older than PRICE_HISTORY_RETENTION_DAYS from disk and memory."""
+        cutoff = int((now or time.time()) // DAY) - RETENTION_DAYS
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM daily_prices WHERE day < ?", (cutoff,)).rowcount
+            self._series.clear()
+        return deleted
+
+    # --- Queries ---
+    def lowest(self, title: str, store: str, location: str, days: int = 30,
+               now: Optional[float] = None) -> Optional[float]:
+        """Lowest price observed for the product at this store in the last `days` days."""
+        today = int((now or time.time()) // DAY)
+        with self._lock:
+            self._sync()
+            return self._get_series(series_key(title, store, location)).lowest(today - days + 1)
+
+    def insight(self, title: str, store: str, location: str, price: float, days: int = 30,
+                now: Optional[float] = None) -> Optional[dict]:
+        """
+        How `price` compares with the product's recent history at this store.
+
+        Args:
+            price: The offer's current (pre-discount) price.
+            days: Size of the look-back window.
+
+        Returns:
+            Lowest and typical price over the window, whether `price` matches the
+            low and whether it is a sale, or None if the series has no history.
+        """
+        return self.insights([(title, store, price)], location, days, now)[0]
+
+    def insights(self, offers: Iterable[tuple[str, str, float]], location: str, days: int = 30,
+                 now: Optional[float] = None) -> list[Optional[dict]]:
+        """
+        `insight` for a batch of (title, store, price) offers, e.g. every offer
+        for one item, loading their series under a single lock acquisition.
+        Blocking; call it off the event loop.
+        """
+        today = int((now or time.time()) // DAY)
+        with self._lock:
+            self._sync()
+            return [
+                _insight(self._get_series(series_key(title, store, location)), price, days, today)
+                for title, store, price in offers
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT series_key) FROM daily_prices").fetchone()
+            cached = len(self._series)
+        return {"daily_rows": rows[0], "series": rows[1], "cached_series": cached,
+                "observations": self.observations, "path": self.path}
+
+
+def _insight(series: PriceSeries, price: float, days: int, today: int) -> Optional[dict]:
+    since = today - days + 1
+    lowest = series.lowest(since)
+    if lowest is None:
+        return None
+    # Today's own samples are excluded so the current price can't define its own baseline.
+    typical, days_observed = series.typical(since, today)
+    is_sale = (
+        typical is not None and days_observed >= SALE_MIN_DAYS and price <= typical * (1 - SALE_THRESHOLD)
+    )
+    return {
+        "window_days": days,
+        "lowest_price": lowest,
+        "typical_price": round(typical, 2) if typical is not None else None,
+        "days_observed": days_observed,
+        "is_lowest": price <= lowest,
+        "is_sale": is_sale,
+    }
+
+
+_price_history: Optional[PriceHistory] = None
+
+
+def get_price_history() -> PriceHistory:
+    global _price_history
+    if _price_history is None:
+        _price_history = PriceHistory()
+    return _price_history
@@ -0,0 +1,286 @@
+# src/smart_budget_mcp/price_watch.py
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from .http_client import get_upstream_client
+from .price_history import product_key
+from .scheduler import BACKGROUND, upstream_priority
+from .state import StateStore
+from .store_index import normalize_store
+
+logger = logging.getLogger(__name__)
+
+# Wishlist items without their own location are watched here (blank disables them).
+DEFAULT_LOCATION = os.getenv("PRICE_WATCH_DEFAULT_LOCATION", "")
+# Without a target price, alert when an offer drops at least this much between cycles.
+DROP_THRESHOLD = float(os.getenv("PRICE_WATCH_DROP_THRESHOLD", "0.05"))
+
+Alert = dict
+AlertSink = Callable[[Alert], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class Watcher:
+    """One user's wishlist item, as the watch engine sees it."""
+    item_id: int
+    user_id: str
+    query: str
+    location: str
+    target_price: Optional[float]
+
+
+def offer_key(offer: dict) -> tuple[str, str]:
+    return product_key(offer.get("title")), normalize_store(offer.get("store"))
+
+
+# --- Alert Sinks ---
+class QueueSink:
+    """Keeps the most recent alerts in memory for polling via `/alerts`."""
+
+    def __init__(self, maxlen: int = 1000):
+        self.alerts: deque[Alert] = deque(maxlen=maxlen)
+
+    async def __call__(self, alert: Alert):
+        self.alerts.append(alert)
+
+    def for_user(self, user_id: str, since: float = 0.0) -> list[Alert]:
+        return [a for a in self.alerts if a["user_id"] == user_id and a["at"] > since]
+
+    async def recent(self, user_id: str, since: float = 0.0) -> list[Alert]:
+        return self.for_user(user_id, since)
+
+
+class SQLiteSink:
+    """
+    Keeps the most recent alerts in a SQLite file, so with several workers
+    any of them can answer `/alerts` while only the leader runs the watch.
+    """
+
+    def __init__(self, path: str = os.getenv("PRICE_ALERTS_PATH", "price_alerts.sqlite3"), maxlen: int = 1000):
+        self.path = path
+        self.maxlen = maxlen
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS alerts (id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, at REAL NOT NULL,"
+            " alert TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS alerts_user ON alerts(user_id, at)")
+
+    def _append(self, alert: Alert):
+        with self._lock:
+            row_id = self._conn.execute(
+                "INSERT INTO alerts (user_id, at, alert) VALUES (?, ?, ?)",
+                (alert["user_id"], alert["at"], json.dumps(alert)),
+            ).lastrowid
+            self._conn.execute("DELETE FROM alerts WHERE id <= ?", (row_id - self.maxlen,))
+
+    async def __call__(self, alert: Alert):
+        await asyncio.to_thread(self._append, alert)
+
+    def for_user(self, user_id: str, since: float = 0.0) -> list[Alert]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT alert FROM alerts WHERE user_id = ? AND at > ? ORDER BY id", (user_id, since)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    async def recent(self, user_id: str, since: float = 0.0) -> list[Alert]:
+        """`for_user`, run off the event loop."""
+        return await asyncio.to_thread(self.for_user, user_id, since)
+
+
+def webhook_sink(url: str) -> AlertSink:
+    """POSTs each alert as JSON to `url` through the shared upstream client."""
+    async def post(alert: Alert):
+        resp = await get_upstream_client().request("POST", url, json=alert)
+        resp.raise_for_status()
+    return post
+
+
+# --- Watch Engine ---
+class PriceWatch:
+    """
+    Background price-drop checks for every user's wishlist.
+
+    Watched items are grouped by (query, location), so each distinct product
+    is fetched once per cycle however many users want it. The cheapest price
+    per (title, store) is remembered between cycles and thresholds are only
+    re-evaluated for offers whose price changed, plus every offer for
+    watchers that are new since the last cycle.
+    """
+
+    def __init__(self,
+                 state: StateStore,
+                 fetch: Callable[[str, str, int], Awaitable[list[dict]]],
+                 sinks: list[AlertSink],
+                 interval: float = float(os.getenv("PRICE_WATCH_INTERVAL", 1800)),
+                 num: int = 20,
+                 max_concurrency: int = int(os.getenv("PRICE_WATCH_MAX_CONCURRENCY", 4))):
+        self.state = state
+        self.fetch = fetch
+        self.sinks = sinks
+        self.interval = interval
+        self.num = num
+        self.max_concurrency = max_concurrency
+        self._task: Optional[asyncio.Task] = None
+        # (query, location) -> offer key -> cheapest price seen last cycle.
+        self._last_prices: dict[tuple[str, str], dict[tuple[str, str], float]] = {}
+        # (query, location) -> item ids already evaluated against the full offer list.
+        self._seen_watchers: dict[tuple[str, str], set[int]] = {}
+        # (item id, offer key) -> price of the last alert, so a price is only alerted once.
+        self._alerted: dict[tuple[int, tuple[str, str]], float] = {}
+        self._metrics = {
+            "cycles": 0, "fetches": 0, "offers_evaluated": 0, "alerts": 0, "delivery_failures": 0,
+            "last_run_at": None, "last_duration_s": None, "last_groups": None, "last_watchers": None,
+        }
+
+    def watchers(self) -> dict[tuple[str, str], list[Watcher]]:
+        """Every watched wishlist item, grouped by normalized (query, location). Blocking."""
+        groups: dict[tuple[str, str], list[Watcher]] = {}
+        for item_id, user_id, item in self.state.all_items("wishlist"):
+            location = item.get("location") or DEFAULT_LOCATION
+            if not location or not item.get("name"):
+                continue
+            watcher = Watcher(item_id, user_id, item["name"].strip(), location.strip(), item.get("target_price"))
+            groups.setdefault((product_key(watcher.query), product_key(location)), []).append(watcher)
+        return groups
+
+    async def run_once(self) -> dict:
+        started = time.time()
+        groups = await asyncio.to_thread(self.watchers)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(
+            self._check_group(key, watchers, semaphore) for key, watchers in groups.items()
+        ))
+        # Forget products nobody watches any more.
+        watched_ids = {w.item_id for watchers in groups.values() for w in watchers}
+        for key in [k for k in self._last_prices if k not in groups]:
+            del self._last_prices[key]
+            self._seen_watchers.pop(key, None)
+        for key in [k for k in self._alerted if k[0] not in watched_ids]:
+            del self._alerted[key]
+
+        alerts = [alert for group_alerts in results for alert in group_alerts]
+        for alert in alerts:
+            await self._deliver(alert)
+        self._metrics.update({
+            "cycles": self._metrics["cycles"] + 1,
+            "alerts": self._metrics["alerts"] + len(alerts),
+            "last_run_at": started,
+            "last_duration_s": round(time.time() - started, 3),
+            "last_groups": len(groups),
+            "last_watchers": len(watched_ids),
+        })
+        return {"groups": len(groups), "watchers": len(watched_ids), "alerts": len(alerts)}
+
+    async def _check_group(self, key: tuple[str, str], watchers: list[Watcher],
+                           semaphore: asyncio.Semaphore) -> list[Alert]:
+        query, location = watchers[0].query, watchers[0].location
+        async with semaphore:
+            offers = await self.fetch(query, location, self.num)
+        self._metrics["fetches"] += 1
+        if not offers:
+            # Failed or empty fetch: keep last cycle's prices rather than treating everything as new.
+            return []
+        cheapest: dict[tuple[str, str], tuple[float, dict]] = {}
+        for offer in offers:
+            try:
+                price = float(offer.get("extracted_price"))
+            except (TypeError, ValueError):
+                continue
+            k = offer_key(offer)
+            if k not in cheapest or price < cheapest[k][0]:
+                cheapest[k] = (price, offer)
+        previous = self._last_prices.get(key, {})
+        changed = [k for k, (price, _) in cheapest.items() if previous.get(k) != price]
+        seen = self._seen_watchers.setdefault(key, set())
+        alerts = []
+        for watcher in watchers:
+            keys = changed if watcher.item_id in seen else list(cheapest)
+            self._metrics["offers_evaluated"] += len(keys)
+            for k in keys:
+                price, offer = cheapest[k]
+                alert = self._evaluate(watcher, k, price, previous.get(k), offer)
+                if alert is not None:
+                    alerts.append(alert)
+            seen.add(watcher.item_id)
+        self._last_prices[key] = {k: price for k, (price, _) in cheapest.items()}
+        return alerts
+
+    def _evaluate(self, watcher: Watcher, k: tuple[str, str], price: float,
+                  previous_price: Optional[float], offer: dict) -> Optional[Alert]:
+        if watcher.target_price is not None:
+            hit, reason = price <= watcher.target_price, "target_price"
+        else:
+            hit = previous_price is not None and price <= previous_price * (1 - DROP_THRESHOLD)
+            reason = "price_drop"
+        last_alerted = self._alerted.get((watcher.item_id, k))
+        if not hit or (last_alerted is not None and price >= last_alerted):
+            return None
+        self._alerted[(watcher.item_id, k)] = price
+        return {
+            "user_id": watcher.user_id,
+            "item": watcher.query,
+            "location": watcher.location,
+            "reason": reason,
+            "store": offer.get("store"),
+            "title": offer.get("title"),
+            "link": offer.get("link"),
+            "price": price,
+            "previous_price": previous_price,
+            "target_price": watcher.target_price,
+            "at": time.time(),
+        }
+
+    async def _deliver(self, alert: Alert):
+        for sink in self.sinks:
+            try:
+                await sink(alert)
+            except Exception:
+                self._metrics["delivery_failures"] += 1
+                logger.exception("Price alert delivery failed")
+
+    async def run(self):
+        # Queue behind interactive requests for the same upstream quota.
+        upstream_priority.set(BACKGROUND)
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Price watch cycle failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            **self._metrics,
+            "running": self._task is not None and not self._task.done(),
+            "interval_s": self.interval,
+            "tracked_products": len(self._last_prices),
+        }
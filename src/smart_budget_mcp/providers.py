@@ -0,0 +1,307 @@
+# src/smart_budget_mcp/providers.py
+import asyncio
+import csv
+import hashlib
+import os
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Optional, Protocol
+
+from .http_client import get_upstream_client
+from .metrics import span
+from .store_index import canonical_store
+
+
+def _deadline(name: str, default_ms: float) -> float:
+    """Seconds from <NAME>_DEADLINE_MS."""
+    try:
+        return float(os.getenv(f"{name.upper()}_DEADLINE_MS", default_ms)) / 1000
+    except ValueError:
+        return default_ms / 1000
+
+
+def parse_price(value) -> Optional[float]:
+    """3.99, "3.99" or "$1,299.00" -> float; None when there is no number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(value or ""))
+    return float(match.group(0).replace(",", "")) if match else None
+
+
+def make_offer(provider: str, store, title, price, link=None, delivery=None, extensions=None,
+               thumbnail=None, extracted_price=None) -> dict:
+    """An offer in the shape the pipeline scores, tagged with the provider it came from."""
+    extracted = extracted_price if extracted_price is not None else parse_price(price)
+    return {
+        "store": store,
+        "title": title,
+        "price": price if isinstance(price, str) else (f"${extracted:.2f}" if extracted is not None else None),
+        "extracted_price": extracted,
+        "link": link,
+        "delivery": delivery,
+        "extensions": extensions,
+        "thumbnail": thumbnail,
+        "provider": provider,
+    }
+
+
+# --- Title Fingerprints ---
+_NON_WORD_RE = re.compile(r"[^a-z0-9.]+")
+# "12oz" -> "12 oz", "2-pack" -> "2 pack"
+_NUMBER_UNIT_RE = re.compile(r"(\d)([a-z])")
+_UNIT_ALIASES = {
+    "ounce": "oz", "ounces": "oz", "fl": "", "fluid": "", "gallon": "gal", "gallons": "gal",
+    "pound": "lb", "pounds": "lb", "lbs": "lb", "count": "ct", "cnt": "ct", "pk": "pack", "pck": "pack",
+    "liter": "l", "liters": "l", "litre": "l", "dozen": "12 ct", "dz": "12 ct",
+}
+_NOISE_WORDS = frozenset({
+    "a", "an", "the", "of", "and", "with", "for", "in", "new", "fresh", "each", "size",
+})
+
+
+@lru_cache(maxsize=65536)
+def title_fingerprint(title: Optional[str]) -> str:
+    """
+    Order-insensitive key for "the same product" across stores and providers.
+
+    Lowercases, splits numbers from units and folds unit spellings
+    ("12 Ounce" / "12oz" -> "12 oz"), drops filler words and punctuation,
+    then hashes the sorted token set. "Great Value Whole Milk, 1 Gallon" and
+    "great value whole milk 1 gal" share a fingerprint.
+    """
+    text = _NUMBER_UNIT_RE.sub(r"\1 \2", _NON_WORD_RE.sub(" ", (title or "").lower()))
+    tokens = set()
+    for token in text.split():
+        token = token.strip(".")
+        token = _UNIT_ALIASES.get(token, token)
+        if token and token not in _NOISE_WORDS:
+            tokens.update(token.split())
+    return hashlib.blake2b(" ".join(sorted(tokens)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+# --- Provider Adapters ---
+class OfferProvider(Protocol):
+    """A price source. `search` returns offers built with `make_offer`, and may raise."""
+    name: str
+    deadline: float
+
+    async def search(self, query: str, location: str, num: int) -> list[dict]: ...
+
+
+class SerpApiProvider:
+    """Google Shopping results through SerpApi (every store, location-aware)."""
+
+    def __init__(self, api_key: str, base_url: str = "https://serpapi.com",
+                 deadline: float = _deadline("serpapi", 8000)):
+        self.name = "serpapi"
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.deadline = deadline
+
+    async def search(self, query: str, location: str, num: int) -> list[dict]:
+        params = {
+            "engine": "google_shopping",
+            "q": query,
+            "api_key": self.api_key,
+            "gl": "us",
+            "hl": "en",
+            "location": location,
+            "num": num
+        }
+        resp = await get_upstream_client().get(f"{self.base_url}/search.json", provider="serpapi", params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        offers = []
+        for section in ["inline_shopping_results", "shopping_results"]:
+            for result in data.get(section, []):
+                offers.append(make_offer(
+                    self.name, result.get("source"), result.get("title"), result.get("price"),
+                    link=result.get("link"), delivery=result.get("delivery"),
+                    extensions=result.get("extensions"), thumbnail=result.get("thumbnail"),
+                    extracted_price=result.get("extracted_price"),
+                ))
+        return offers
+
+
+class AffiliateFeedProvider:
+    """
+    A JSON product-search endpoint such as an affiliate network's catalog API.
+
+    Called as GET `url?q=&location=&limit=` (plus `api_key` when set); the
+    product list is read from `items_key` and each product's fields are
+    mapped through `fields` (offer field -> feed field).
+    """
+
+    DEFAULT_FIELDS = {
+        "store": "merchant", "title": "name", "price": "price", "link": "url",
+        "delivery": "shipping", "thumbnail": "image",
+    }
+
+    def __init__(self, url: str, api_key: Optional[str] = None, name: str = "affiliate",
+                 items_key: str = "products", fields: Optional[dict[str, str]] = None,
+                 deadline: float = _deadline("affiliate", 3000)):
+        self.name = name
+        self.url = url
+        self.api_key = api_key
+        self.items_key = items_key
+        self.fields = {**self.DEFAULT_FIELDS, **(fields or {})}
+        self.deadline = deadline
+
+    async def search(self, query: str, location: str, num: int) -> list[dict]:
+        params = {"q": query, "location": location, "limit": num}
+        if self.api_key:
+            params["api_key"] = self.api_key
+        resp = await get_upstream_client().get(self.url, provider=self.name, params=params)
+        resp.raise_for_status()
+        fields = self.fields
+        offers = []
+        for product in resp.json().get(self.items_key, [])[:num]:
+            offers.append(make_offer(
+                self.name, product.get(fields["store"]), product.get(fields["title"]), product.get(fields["price"]),
+                link=product.get(fields["link"]), delivery=product.get(fields["delivery"]),
+                thumbnail=product.get(fields["thumbnail"]),
+            ))
+        return offers
+
+
+class CsvCatalogProvider:
+    """
+    A local CSV price list (columns: store, title, price, and optionally link,
+    delivery, thumbnail), e.g. a store's exported catalog. Loaded once on
+    first search into a token index; a row matches when its title contains
+    every query token. Cheapest matches come first.
+    """
+
+    def __init__(self, path: str, name: str = "catalog", deadline: float = _deadline("catalog", 500)):
+        self.name = name
+        self.path = path
+        self.deadline = deadline
+        self._rows: Optional[list[dict]] = None
+        self._index: dict[str, set[int]] = {}
+        self._lock = asyncio.Lock()
+
+    def _load(self):
+        rows, index = [], {}
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                offer = make_offer(
+                    self.name, record.get("store"), record.get("title"), record.get("price"),
+                    link=record.get("link") or None, delivery=record.get("delivery") or None,
+                    thumbnail=record.get("thumbnail") or None,
+                )
+                if offer["extracted_price"] is None or not offer["title"]:
+                    continue
+                for token in set(_search_tokens(offer["title"])):
+                    index.setdefault(token, set()).add(len(rows))
+                rows.append(offer)
+        self._rows, self._index = rows, index
+
+    async def search(self, query: str, location: str, num: int) -> list[dict]:
+        if self._rows is None:
+            async with self._lock:
+                if self._rows is None:
+                    await asyncio.to_thread(self._load)
+        tokens = _search_tokens(query)
+        if not tokens:
+            return []
+        postings = sorted((self._index.get(token, set()) for token in tokens), key=len)
+        matches = set.intersection(*postings)
+        rows = sorted((self._rows[i] for i in matches), key=lambda offer: offer["extracted_price"])
+        return [dict(offer) for offer in rows[:num]]
+
+
+def _search_tokens(text: str) -> list[str]:
+    return [t for t in _NON_WORD_RE.sub(" ", (text or "").lower()).split() if t not in _NOISE_WORDS]
+
+
+# --- Aggregator ---
+class AggregatedOffers(list):
+    """Offers from every provider that answered in time; `partial` when any timed out or failed."""
+    partial: bool = False
+
+
+class PriceAggregator:
+    """
+    Queries every provider concurrently and merges their offers.
+
+    Each provider gets its own deadline; one that misses it (or fails) is
+    left out and the result is marked partial, so a slow or rate-limited
+    source costs at most its deadline instead of setting the whole latency.
+    Offers for the same product at the same store, by title fingerprint, are
+    collapsed to the cheapest, and every offer carries its `fingerprint` so
+    the same product can be compared across stores. The merged offers are
+    returned cheapest first (unpriced last), at most `num` of them.
+    """
+
+    def __init__(self, providers: list[OfferProvider]):
+        self.providers = providers
+        self._metrics = {
+            p.name: {"calls": 0, "timeouts": 0, "errors": 0, "offers": 0, "latency_ms": deque(maxlen=500)}
+            for p in providers
+        }
+        self._deduplicated = 0
+
+    async def _query(self, provider: OfferProvider, query: str, location: str, num: int) -> Optional[list[dict]]:
+        metrics = self._metrics[provider.name]
+        metrics["calls"] += 1
+        started = time.perf_counter()
+        try:
+            with span(f"provider:{provider.name}"):
+                offers = await asyncio.wait_for(provider.search(query, location, num), provider.deadline)
+        except asyncio.TimeoutError:
+            metrics["timeouts"] += 1
+            return None
+        except Exception:
+            metrics["errors"] += 1
+            return None
+        metrics["latency_ms"].append((time.perf_counter() - started) * 1000)
+        metrics["offers"] += len(offers)
+        return offers
+
+    async def search(self, query: str, location: str, num: int = 20) -> AggregatedOffers:
+        results = await asyncio.gather(*(self._query(p, query, location, num) for p in self.providers))
+        merged = AggregatedOffers()
+        merged.partial = any(offers is None for offers in results)
+        by_key: dict[tuple[str, str], int] = {}
+        for offers in results:
+            for offer in offers or ():
+                offer["fingerprint"] = title_fingerprint(offer.get("title"))
+                key = (offer["fingerprint"], canonical_store(offer.get("store")))
+                seen = by_key.get(key)
+                if seen is None:
+                    by_key[key] = len(merged)
+                    merged.append(offer)
+                    continue
+                self._deduplicated += 1
+                price, kept = offer.get("extracted_price"), merged[seen].get("extracted_price")
+                if price is not None and (kept is None or price < kept):
+                    merged[seen] = offer
+        # Each provider returns up to `num`, so the merge can hold several times that.
+        merged.sort(key=lambda o: (o.get("extracted_price") is None, o.get("extracted_price") or 0.0))
+        del merged[num:]
+        return merged
+
+    def stats(self) -> dict:
+        providers = {}
+        for name, metrics in self._metrics.items():
+            latencies = sorted(metrics["latency_ms"])
+            providers[name] = {
+                **{k: v for k, v in metrics.items() if k != "latency_ms"},
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 1) if latencies else None,
+                "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)], 1) if latencies else None,
+            }
+        return {"providers": providers, "deduplicated": self._deduplicated}
+
+
+def providers_from_settings(settings) -> list[OfferProvider]:
+    """SerpApi when SERPAPI_KEY is set, plus the affiliate feed and CSV catalog when configured."""
+    providers: list[OfferProvider] = []
+    if settings.serpapi_key:
+        providers.append(SerpApiProvider(settings.serpapi_key, settings.serpapi_base_url))
+    if settings.affiliate_feed_url:
+        providers.append(AffiliateFeedProvider(settings.affiliate_feed_url, settings.affiliate_feed_key))
+    if settings.catalog_csv_path:
+        providers.append(CsvCatalogProvider(settings.catalog_csv_path))
+    return providers
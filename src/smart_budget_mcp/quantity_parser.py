@@ -0,0 +1,143 @@
+# src/smart_budget_mcp/quantity_parser.py
+import os
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Below this confidence the caller should fall back to the LLM extractor.
+MIN_CONFIDENCE = float(os.getenv("QUANTITY_PARSER_MIN_CONFIDENCE", 0.6))
+
+# --- Unit Table ---
+# Every unit maps to (base unit, factor). Volumes normalize to fl oz, weights
+# to oz and discrete items to count, so offers compare per base unit.
+FL_OZ, OZ, COUNT = "fl oz", "oz", "count"
+
+UNITS = {
+    "fl oz": (FL_OZ, 1.0), "fl. oz": (FL_OZ, 1.0), "fl.oz": (FL_OZ, 1.0), "floz": (FL_OZ, 1.0),
+    "fluid ounce": (FL_OZ, 1.0), "fluid ounces": (FL_OZ, 1.0),
+    "gal": (FL_OZ, 128.0), "gallon": (FL_OZ, 128.0), "gallons": (FL_OZ, 128.0),
+    "qt": (FL_OZ, 32.0), "quart": (FL_OZ, 32.0), "quarts": (FL_OZ, 32.0),
+    "pt": (FL_OZ, 16.0), "pint": (FL_OZ, 16.0), "pints": (FL_OZ, 16.0),
+    "l": (FL_OZ, 33.814), "liter": (FL_OZ, 33.814), "liters": (FL_OZ, 33.814),
+    "litre": (FL_OZ, 33.814), "litres": (FL_OZ, 33.814),
+    "ml": (FL_OZ, 0.033814), "milliliter": (FL_OZ, 0.033814), "milliliters": (FL_OZ, 0.033814),
+    "oz": (OZ, 1.0), "ounce": (OZ, 1.0), "ounces": (OZ, 1.0),
+    "lb": (OZ, 16.0), "lbs": (OZ, 16.0), "pound": (OZ, 16.0), "pounds": (OZ, 16.0),
+    "kg": (OZ, 35.274), "kilogram": (OZ, 35.274), "kilograms": (OZ, 35.274),
+    "g": (OZ, 0.035274), "gram": (OZ, 0.035274), "grams": (OZ, 0.035274),
+    "ct": (COUNT, 1.0), "count": (COUNT, 1.0), "pk": (COUNT, 1.0), "pack": (COUNT, 1.0),
+    "pc": (COUNT, 1.0), "pcs": (COUNT, 1.0), "piece": (COUNT, 1.0), "pieces": (COUNT, 1.0),
+    "each": (COUNT, 1.0), "ea": (COUNT, 1.0),
+}
+COUNT_NOUNS = (
+    "rolls", "cans", "bottles", "bags", "pods", "k-cups", "eggs", "bars", "packets",
+    "sheets", "wipes", "tablets", "capsules", "pouches", "boxes", "cups",
+)
+
+_NUM = r"(\d+(?:\.\d+)?|\.\d+|\d+/\d+)"
+_MEASURE = "|".join(sorted(
+    (re.escape(u) for u, (base, _) in UNITS.items() if base != COUNT), key=len, reverse=True
+))
+_COUNTER = "|".join(sorted(
+    [re.escape(u) for u, (base, _) in UNITS.items() if base == COUNT] + list(COUNT_NOUNS), key=len, reverse=True
+))
+
+SIZE_RE = re.compile(rf"{_NUM}\s*-?\s*({_MEASURE})(?![a-z])", re.IGNORECASE)
+MULTIPACK_RE = re.compile(rf"(\d+)\s*(?:x|×|\*)\s*{_NUM}\s*-?\s*({_MEASURE})(?![a-z])", re.IGNORECASE)
+COUNT_RE = re.compile(
+    rf"(\d+)\s*-?\s*(?:(?:double|triple|mega|family|jumbo|giant|large|regular)\s+)?({_COUNTER})(?![a-z])",
+    re.IGNORECASE,
+)
+PACK_OF_RE = re.compile(r"(?:pack|case|box|set|bundle)\s+of\s+(\d+)", re.IGNORECASE)
+DOZEN_RE = re.compile(r"(?:(\d+)\s*)?dozen", re.IGNORECASE)
+HALF_GALLON_RE = re.compile(r"half[\s-]+gallon", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ParsedQuantity:
+    total_quantity: Optional[float]
+    unit_type: Optional[str]
+    unit_price: Optional[float]
+    confidence: float
+    rule: Optional[str] = None
+
+    def as_tuple(self) -> tuple:
+        return self.total_quantity, self.unit_type, self.unit_price
+
+
+def _number(text: str) -> float:
+    if "/" in text:
+        num, den = text.split("/", 1)
+        return float(num) / float(den) if float(den) else 0.0
+    return float(text)
+
+
+def normalize(quantity: float, unit: str) -> Optional[tuple[float, str]]:
+    """Converts `quantity` in `unit` to (quantity, base unit), or None for unknown units."""
+    entry = UNITS.get(unit.lower().strip().rstrip("."))
+    if entry is None:
+        if unit.lower().strip() in COUNT_NOUNS:
+            return quantity, COUNT
+        return None
+    base, factor = entry
+    return quantity * factor, base
+
+
+def _result(quantity: float, unit: str, price: Optional[float], confidence: float, rule: str) -> ParsedQuantity:
+    quantity = round(quantity, 4)
+    unit_price = round(price / quantity, 4) if price and quantity else None
+    return ParsedQuantity(quantity, unit, unit_price, confidence, rule)
+
+
+def parse_quantity(title: str, price: Optional[float] = None) -> ParsedQuantity:
+    """
+    Parses the total quantity of a product title into a base unit.
+
+    Args:
+        title: The offer title (e.g., "Coca-Cola 6 x 12 fl oz Cans").
+        price: The offer price, used to compute the unit price.
+
+    Returns:
+        A ParsedQuantity. `confidence` is 0.0 when nothing was recognised and
+        drops below MIN_CONFIDENCE when the title carries conflicting sizes
+        or pack counts.
+    """
+    if not title:
+        return ParsedQuantity(None, None, None, 0.0)
+
+    multipack = MULTIPACK_RE.search(title)
+    if multipack:
+        count = int(multipack.group(1))
+        size = normalize(_number(multipack.group(2)), multipack.group(3))
+        if size and count:
+            return _result(count * size[0], size[1], price, 0.95, "multipack")
+
+    sizes = [normalize(_number(m.group(1)), m.group(2)) for m in SIZE_RE.finditer(title)]
+    if HALF_GALLON_RE.search(title):
+        sizes.append((64.0, FL_OZ))
+    sizes = [s for s in sizes if s and s[0] > 0]
+
+    counts = [int(m.group(1)) for m in COUNT_RE.finditer(title)]
+    counts += [int(m.group(1) or 1) * 12 for m in DOZEN_RE.finditer(title)]
+    counts = [c for c in counts if c > 0]
+    packs = [int(m.group(1)) for m in PACK_OF_RE.finditer(title) if int(m.group(1)) > 0]
+
+    if sizes:
+        quantity, unit = sizes[0]
+        # Titles often repeat a size in two units ("1 gal, 128 fl oz"); only
+        # genuinely different sizes make the match ambiguous.
+        consistent = all(u == unit and abs(q - quantity) <= 0.03 * quantity for q, u in sizes[1:])
+        multipliers = set(packs or counts)
+        if len(multipliers) == 1 and next(iter(multipliers)) > 1:
+            return _result(quantity * multipliers.pop(), unit, price, 0.85 if consistent else 0.5, "size_x_count")
+        # "2-pack 1.49 oz, 12 ct": which count multiplies the size is a guess.
+        return _result(quantity, unit, price, 0.9 if consistent and len(multipliers) <= 1 else 0.5, "size")
+
+    if counts and packs:
+        # "75 Wipes (Pack of 3)": items per pack times packs.
+        return _result(float(counts[0] * packs[0]), COUNT, price, 0.8, "count_x_pack")
+    if counts or packs:
+        counts = counts or packs
+        return _result(float(counts[0]), COUNT, price, 0.75 if len(set(counts)) == 1 else 0.5, "count")
+
+    return ParsedQuantity(None, None, None, 0.0)
@@ -0,0 +1,105 @@
+# src/smart_budget_mcp/responses.py
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+from typing import Any, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# orjson encodes several times faster than the stdlib; brotli is only offered
+# to clients when the package is installed. Both are imported on first use.
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# Bodies smaller than this are sent uncompressed; the headers would eat the gain.
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", 5))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", 4))
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON for plain dict/list/str/number data; anything else is str()-ed."""
+    if ORJSON_AVAILABLE:
+        import orjson
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSONResponse encoded with `dumps`; the app's default response class."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Picks "br" or "gzip" from an Accept-Encoding header by q-value (br wins ties), or None."""
+    explicit: dict[str, float] = {}
+    wildcard = 0.0
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if coding == "*":
+            wildcard = q
+        elif coding:
+            explicit[coding] = q
+    offered = {coding: explicit.get(coding, wildcard) for coding in ("br", "gzip")}
+    if not BROTLI_AVAILABLE:
+        offered["br"] = 0.0
+    coding = max(("br", "gzip"), key=lambda c: offered[c])
+    return coding if offered[coding] > 0 else None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def etag_for(body: bytes) -> str:
+    # Weak: the same JSON is one entity whichever content coding it is sent with.
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def json_response(request: Request, content: Any, status_code: int = 200,
+                  vary: tuple[str, ...] = ("Accept-Encoding",), headers: Optional[dict] = None) -> Response:
+    """
+    Encodes pre-shaped `content` (bypassing FastAPI's jsonable_encoder) with an
+    ETag, answering 304 when it matches If-None-Match and compressing the body
+    as the client's Accept-Encoding allows.
+    """
+    body = dumps(content)
+    headers = {
+        **(headers or {}),
+        "ETag": etag_for(body),
+        "Vary": ", ".join(vary),
+        # Revalidate every time: results move with prices and user state.
+        "Cache-Control": "private, no-cache",
+    }
+    if status_code == 200 and _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if len(body) >= COMPRESS_MIN_BYTES:
+        coding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if coding is not None:
+            body = compress(body, coding)
+            headers["Content-Encoding"] = coding
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
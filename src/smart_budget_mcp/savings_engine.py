@@ -1,12 +1,19 @@
-import httpx
 import asyncio
+import io
+import json
 import os
+import tempfile
+import time
+from typing import IO, Iterator
+
+from .settings import get_settings
+from .http_client import get_upstream_client
+from .coupon_store import get_coupon_store, iter_json_offers
+from .store_index import canonical_store
 
 
-# --- Load API keys from .env ---
-from dotenv import load_dotenv
-load_dotenv()
-COUPONSAPI_KEY = os.getenv("COUPONSAPI_KEY")
+# --- API keys (from the environment or .env, loaded once) ---
+COUPONSAPI_KEY = get_settings().couponsapi_key
 
 # --- Layer 3: Mock Credit Card Perks ---
 # In a real application, this would be a database populated by a service like RewardsCC API
@@ -36,7 +43,7 @@ def get_credit_card_perks(store_name: str, user_cards: list[str]) -> list[dict]:
     Checks for credit card perks for a given store from a user's list of cards.
     
     Args:
-        store_name: The name of the store (e.g., "Target").
+        store_name: The name of the store in any spelling (e.g., "Target.com").
         user_cards: A list of card names the user has (e.g., ["Chase Freedom", "Target RedCard"]).
 
     Returns:
@@ -46,23 +53,30 @@ def get_credit_card_perks(store_name: str, user_cards: list[str]) -> list[dict]:
     if not store_name:
         return applicable_perks
 
-    store_name_lower = store_name.lower()
-    category = store_to_category_map.get(store_name_lower)
+    store_key = canonical_store(store_name)
+    category = store_to_category_map.get(store_key)
 
     for card_name in user_cards:
         if card_name in mock_credit_card_offers:
             for perk in mock_credit_card_offers[card_name]["perks"]:
                 # Check for store-specific perks
-                if perk.get("store", "").lower() == store_name_lower:
+                if perk.get("store") and canonical_store(perk["store"]) == store_key:
                     applicable_perks.append({"card": card_name, **perk})
                 # Check for category-specific perks
-                elif perk.get("category") == category:
+                elif category and perk.get("category") == category:
                     applicable_perks.append({"card": card_name, **perk})
     
     return applicable_perks
 
 
 # --- Layer 1: Discounted Gift Cards (Placeholder) ---
+# In a real implementation, this table would be refreshed from the Reloadly API
+# through the shared pooled client from get_upstream_client() with your credentials.
+# e.g., GET https://api.reloadly.com/discounts
+mock_gift_card_deals = {
+    "target": {"discount": 0.04, "provider": "Reloadly"}, # 4% off
+    "starbucks": {"discount": 0.07, "provider": "Reloadly"} # 7% off
+}
 
 async def fetch_gift_card_deals(store_name: str):
     """
@@ -70,28 +84,89 @@ async def fetch_gift_card_deals(store_name: str):
     
     For now, it will return a mock deal for specific stores.
     """
-    # In a real implementation, you would use httpx to call the Reloadly API
-    # with your credentials.
-    # e.g., GET https://api.reloadly.com/discounts
-    
-    mock_deals = {
-        "target": {"discount": 0.04, "provider": "Reloadly"}, # 4% off
-        "starbucks": {"discount": 0.07, "provider": "Reloadly"} # 7% off
-    }
-
-    if store_name and store_name.lower() in mock_deals:
-        return mock_deals[store_name.lower()]
-    
-    return None
+    if not store_name:
+        return None
+    return mock_gift_card_deals.get(canonical_store(store_name))
 
 # --- CouponsAPI.org Integrations ---
+# Served from the local coupon index (coupon_store.py), which is filled from
+# the incremental feed and CSV exports; no network call on the request path.
+
+async def fetch_couponsapi_coupons(store_name: str) -> list[dict]:
+    """
+    Returns unexpired coupon codes for a store from the local coupon index.
+
+    Args:
+        store_name: The name of the store in any spelling (e.g., "Walmart.com").
 
+    Returns:
+        A list of coupon dictionaries (offer_id, title, code, url, end_date, ...).
+    """
+    if not store_name:
+        return []
+    return get_coupon_store().for_store(store_name, kind="coupon")
+
+async def fetch_couponsapi_deals(store_name: str) -> list[dict]:
+    """
+    Returns unexpired code-less deals for a store from the local coupon index.
+    """
+    if not store_name:
+        return []
+    return get_coupon_store().for_store(store_name, kind="deal")
 
 # --- CouponAPI.org Incremental Feed Integration ---
-import requests
-import time
+# Overridable so the sync can run against a local stub serving recorded pages.
+COUPONAPI_BASE_URL = get_settings().couponapi_base_url
+
+# Feed bodies up to this size stay in memory; larger ones (the first, year-long sync) spill to disk.
+FEED_SPOOL_BYTES = int(os.getenv("COUPONAPI_SPOOL_BYTES", 8 * 1024 * 1024))
 
-def fetch_couponapi_incremental(last_extract=None):
+class CouponFeedError(RuntimeError):
+    """The CouponAPI feed returned an error instead of offers."""
+
+async def fetch_couponapi_feed(last_extract: int) -> Iterator[dict]:
+    """
+    Fetches the CouponAPI.org incremental feed since last_extract (UNIX timestamp).
+
+    The body is spooled as it arrives and offers are decoded from it one at a
+    time by the returned iterator, so a large delta is never held in memory.
+    The iterator reads a file; consume it off the event loop (e.g.
+    `CouponStore.ingest` in a thread).
+
+    Unlike fetch_couponapi_incremental this raises on transport, HTTP and API
+    errors, so a failed fetch can't be mistaken for an empty delta. An error
+    payload is only recognised once the body is read, so it raises
+    CouponFeedError from the iterator.
+    """
+    if not COUPONSAPI_KEY:
+        raise CouponFeedError("COUPONSAPI_KEY environment variable not set.")
+    url = f"{COUPONAPI_BASE_URL}/api/getIncrementalFeed/"
+    params = {"API_KEY": COUPONSAPI_KEY, "last_extract": last_extract, "format": "json"}
+    body = tempfile.SpooledTemporaryFile(max_size=FEED_SPOOL_BYTES)
+    try:
+        resp = await get_upstream_client().download(url, body, provider="couponapi", params=params)
+        resp.raise_for_status()
+    except BaseException:
+        body.close()
+        raise
+    return _iter_feed(body)
+
+def _iter_feed(body: IO[bytes]) -> Iterator[dict]:
+    with body:
+        body.seek(0)
+        text = io.TextIOWrapper(body, encoding="utf-8")
+        received = 0
+        for offer in iter_json_offers(text):
+            received += 1
+            yield offer
+        if not received:
+            # No offers: an empty delta or an error payload, small either way.
+            text.seek(0)
+            data = json.load(text)
+            if not data.get("result"):
+                raise CouponFeedError(data.get("error") or "CouponAPI feed returned no result.")
+
+async def fetch_couponapi_incremental(last_extract=None):
     """
     Fetches incremental coupon feed from CouponAPI.org since last_extract (UNIX timestamp).
     Returns a list of offers.
@@ -101,13 +176,7 @@ def fetch_couponapi_incremental(last_extract=None):
     if last_extract is None:
         # Default: 1 year ago
         last_extract = int(time.time()) - 365 * 24 * 60 * 60
-    url = f"https://couponapi.org/api/getIncrementalFeed/?API_KEY={COUPONSAPI_KEY}&last_extract={last_extract}&format=json"
     try:
-        resp = requests.get(url)
-        data = resp.json()
-        if data.get("result"):
-            return data.get("offers", [])
+        return list(await fetch_couponapi_feed(last_extract))
     except Exception:
-        pass
-    return []
-
+        return []
@@ -0,0 +1,111 @@
+# src/smart_budget_mcp/savings_plan.py
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from .savings_engine import mock_credit_card_offers, mock_gift_card_deals, store_to_category_map
+from .store_index import get_store_index, invalidate_store_index, normalize_store
+
+
+@dataclass(frozen=True, slots=True)
+class StackScore:
+    """The savings stack applied to one offer."""
+    base_price: float
+    gift_card: Optional[dict]
+    gift_card_discount: float
+    price_after_gift_card: float
+    perk: Optional[dict]
+    credit_card_perk: float
+    layer_discounts: dict
+    final_price: float
+
+
+@dataclass(frozen=True)
+class SavingsPlan:
+    """
+    Savings stack compiled for one set of credit cards.
+
+    `store_perks` already folds category perks into every mapped store, so
+    scoring an offer is a handful of dict lookups: best card perk, gift-card
+    discount, then one lookup per extra layer (coupons, platform cashback, ...).
+    Every table is keyed by canonical store key, and offer stores are resolved
+    through the store index ("Walmart - Seattle" -> "walmart").
+    """
+    cards: tuple[str, ...]
+    store_perks: dict[str, dict]
+    category_perks: dict[str, dict]
+    gift_cards: dict[str, dict]
+    # Extra stacked layers, applied after the card perk: (name, {store: discount}).
+    layers: tuple[tuple[str, dict[str, float]], ...] = field(default=())
+
+    def best_perk(self, store: str) -> Optional[dict]:
+        return self.store_perks.get(get_store_index().canonical(store))
+
+    def with_layer(self, name: str, discounts_by_store: dict[str, float]) -> "SavingsPlan":
+        """Returns a plan with one more stacked layer; store keys are resolved like offer stores."""
+        canonical = get_store_index().canonical
+        layer = (name, {canonical(store): discount for store, discount in discounts_by_store.items()})
+        return SavingsPlan(self.cards, self.store_perks, self.category_perks, self.gift_cards, self.layers + (layer,))
+
+    def score(self, stores: list[str], prices: list[float]) -> list[StackScore]:
+        """Scores a batch of offers in one pass over parallel store/price lists."""
+        store_perks, gift_cards, layers = self.store_perks, self.gift_cards, self.layers
+        canonical = get_store_index().canonical
+        scores = []
+        for store, base_price in zip(stores, prices):
+            key = canonical(store)
+            gift_card = gift_cards.get(key)
+            gift_card_discount = gift_card["discount"] if gift_card else 0.0
+            perk = store_perks.get(key)
+            perk_value = perk["value"] if perk else 0.0
+            price_after_gift_card = base_price * (1 - gift_card_discount)
+            final_price = price_after_gift_card * (1 - perk_value)
+            layer_discounts = {}
+            for name, discounts in layers:
+                discount = discounts.get(key, 0.0)
+                if discount:
+                    layer_discounts[name] = discount
+                    final_price *= 1 - discount
+            scores.append(StackScore(
+                base_price, gift_card, gift_card_discount, price_after_gift_card,
+                perk, perk_value, layer_discounts, final_price,
+            ))
+        return scores
+
+
+def _better(current: Optional[dict], candidate: dict) -> dict:
+    return candidate if current is None or candidate["value"] > current["value"] else current
+
+
+@lru_cache(maxsize=256)
+def _compile(cards: tuple[str, ...]) -> SavingsPlan:
+    store_perks: dict[str, dict] = {}
+    category_perks: dict[str, dict] = {}
+    for card_name in cards:
+        for perk in mock_credit_card_offers.get(card_name, {}).get("perks", []):
+            applied = {"card": card_name, **perk}
+            if perk.get("store"):
+                key = normalize_store(perk["store"])
+                store_perks[key] = _better(store_perks.get(key), applied)
+            elif perk.get("category"):
+                category_perks[perk["category"]] = _better(category_perks.get(perk["category"]), applied)
+    for store, category in store_to_category_map.items():
+        if category in category_perks:
+            key = normalize_store(store)
+            store_perks[key] = _better(store_perks.get(key), category_perks[category])
+    gift_cards = {normalize_store(store): deal for store, deal in mock_gift_card_deals.items()}
+    return SavingsPlan(cards, store_perks, category_perks, gift_cards)
+
+
+def compile_savings_plan(cards: Iterable[str]) -> SavingsPlan:
+    """
+    Returns the compiled plan for a card set. Plans are cached per distinct
+    set, so a profile only recompiles when its cards change.
+    """
+    return _compile(tuple(sorted(set(cards))))
+
+
+def invalidate_savings_plans():
+    """Drops compiled plans and the store index, e.g. after the perk or gift-card tables change."""
+    _compile.cache_clear()
+    invalidate_store_index()
@@ -0,0 +1,229 @@
+# src/smart_budget_mcp/scheduler.py
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+
+from .workers import WORKERS
+
+T = TypeVar("T")
+
+# Lower runs first. Background work (coupon sync, price watch) marks its task
+# with `upstream_priority.set(BACKGROUND)`; everything else is interactive.
+INTERACTIVE = 0
+BACKGROUND = 10
+upstream_priority: ContextVar[int] = ContextVar("upstream_priority", default=INTERACTIVE)
+
+
+# --- Quotas ---
+@dataclass
+class Quota:
+    """Token bucket: `rate` requests per second on average, bursts of up to `burst`."""
+    rate: float
+    burst: float
+
+    @classmethod
+    def from_env(cls, provider: str, rate: float, burst: float) -> Optional["Quota"]:
+        """
+        Reads <PROVIDER>_RATE_LIMIT and <PROVIDER>_RATE_BURST; a rate of 0 means
+        unlimited. The limits are for the whole deployment, so each of the
+        WEB_CONCURRENCY workers gets an equal share.
+        """
+        try:
+            rate = float(os.getenv(f"{provider.upper()}_RATE_LIMIT", rate))
+            burst = float(os.getenv(f"{provider.upper()}_RATE_BURST", burst))
+        except ValueError:
+            pass
+        return cls(rate / WORKERS, max(1.0, burst / WORKERS)) if rate > 0 else None
+
+
+DEFAULT_QUOTAS = {
+    "serpapi": (5.0, 10.0),
+    "couponapi": (1.0, 5.0),
+}
+
+
+class TokenBucket:
+    def __init__(self, quota: Quota):
+        self.quota = quota
+        self.tokens = quota.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.quota.burst, self.tokens + (now - self.updated) * self.quota.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.quota.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+# --- Provider Lanes ---
+@dataclass
+class _Ticket:
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class _Lane:
+    """
+    Admission queue for one provider: a priority heap drained at the
+    provider's token rate. A ticket may sit in the heap more than once after
+    being promoted; stale entries are skipped once its future is resolved.
+    """
+
+    def __init__(self, quota: Optional[Quota]):
+        self.bucket = TokenBucket(quota) if quota else None
+        self._heap: list[tuple[int, int, _Ticket]] = []
+        self._seq = itertools.count()
+        self._drainer: Optional[asyncio.Task] = None
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.waits: deque[float] = deque(maxlen=1000)
+
+    async def acquire(self, ticket: _Ticket, priority: int):
+        if self.bucket is None or (not self.waiting and self.bucket.delay() == 0):
+            if self.bucket is not None:
+                self.bucket.take()
+            self._admitted(ticket)
+            # Resolve it too, in case a promotion already put it in the heap.
+            if not ticket.future.done():
+                ticket.future.set_result(None)
+            return
+        self.waiting += 1
+        self.promote(ticket, priority)
+        try:
+            await ticket.future
+        finally:
+            self.waiting -= 1
+
+    def promote(self, ticket: _Ticket, priority: int):
+        if self.bucket is None:
+            # Unlimited lanes admit on arrival; there is no queue to reorder.
+            return
+        heapq.heappush(self._heap, (priority, next(self._seq), ticket))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        while self._heap:
+            delay = self.bucket.delay()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.future.done():
+                continue
+            self.bucket.take()
+            self._admitted(ticket)
+            ticket.future.set_result(None)
+
+    def _admitted(self, ticket: _Ticket):
+        self.admitted += 1
+        self.waits.append(time.monotonic() - ticket.enqueued)
+
+
+@dataclass
+class _InFlight:
+    task: asyncio.Task
+    ticket: _Ticket
+    priority: int
+    waiters: int = 0
+
+
+class UpstreamScheduler:
+    """
+    Central admission control for upstream calls across all requests.
+
+    Identical in-flight calls (same provider and key) are merged into one,
+    each provider is held to its token-bucket quota, and when calls have to
+    queue, interactive ones are admitted before background refreshes. A
+    background call that an interactive request joins is promoted.
+    """
+
+    def __init__(self, quotas: Optional[dict[str, Optional[Quota]]] = None):
+        if quotas is None:
+            quotas = {name: Quota.from_env(name, *default) for name, default in DEFAULT_QUOTAS.items()}
+        self.quotas = quotas
+        self._lanes: dict[str, _Lane] = {}
+        self._in_flight: dict[tuple[str, Hashable], _InFlight] = {}
+        self._deduped: dict[str, int] = {}
+
+    def _lane(self, provider: str) -> _Lane:
+        lane = self._lanes.get(provider)
+        if lane is None:
+            quota = self.quotas[provider] if provider in self.quotas else Quota.from_env(provider, 0, 1)
+            lane = self._lanes[provider] = _Lane(quota)
+        return lane
+
+    async def submit(self, provider: str, key: Optional[Hashable], call: Callable[[], Awaitable[T]],
+                     priority: Optional[int] = None) -> T:
+        """
+        Runs `call` once it is admitted for `provider`.
+
+        Args:
+            key: Identity of the call for merging (e.g. method + URL); None never merges.
+            priority: Defaults to the caller's `upstream_priority`.
+        """
+        priority = upstream_priority.get() if priority is None else priority
+        lane = self._lane(provider)
+        entry = self._in_flight.get((provider, key)) if key is not None else None
+        if entry is not None:
+            self._deduped[provider] = self._deduped.get(provider, 0) + 1
+            if priority < entry.priority and not entry.ticket.future.done():
+                entry.priority = priority
+                lane.promote(entry.ticket, priority)
+        else:
+            ticket = _Ticket(asyncio.get_running_loop().create_future())
+
+            async def admitted_call():
+                await lane.acquire(ticket, priority)
+                lane.in_flight += 1
+                try:
+                    return await call()
+                finally:
+                    lane.in_flight -= 1
+
+            entry = _InFlight(asyncio.ensure_future(admitted_call()), ticket, priority)
+            if key is not None:
+                self._in_flight[(provider, key)] = entry
+                entry.task.add_done_callback(lambda _: self._in_flight.pop((provider, key), None))
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.task)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                # Every caller was cancelled, so nobody wants the shared call any more.
+                entry.task.cancel()
+
+    def stats(self) -> dict:
+        """Queue depth, admission counts, merged calls and recent queue wait per provider."""
+        providers = {}
+        for name, lane in self._lanes.items():
+            waits = sorted(lane.waits)
+            quota = lane.bucket.quota if lane.bucket else None
+            providers[name] = {
+                "rate_limit": quota.rate if quota else None,
+                "burst": quota.burst if quota else None,
+                "queue_depth": lane.waiting,
+                "admitted": lane.admitted,
+                "deduped": self._deduped.get(name, 0),
+                "in_flight": lane.in_flight,
+                "wait_ms_p50": round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+                "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else None,
+                "wait_ms_max": round(waits[-1] * 1000, 1) if waits else None,
+            }
+        return providers
@@ -11,6 +11,9 @@ class CardNamesInput(BaseModel):
 class WishlistItemInput(BaseModel):
     name: str
     urgency: Optional[str] = "not set"
+    # Price watch: where to look, and the price that should trigger an alert.
+    location: Optional[str] = None
+    target_price: Optional[float] = None
 
 class GroceryItemInput(BaseModel):
     name: str
@@ -0,0 +1,143 @@
+# src/smart_budget_mcp/scoring.py
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable, Optional
+
+import numpy as np
+
+from .savings_plan import SavingsPlan
+from .store_index import get_store_index
+
+RANK_COLUMNS = ("effective_price", "unit_price")
+
+
+@dataclass
+class OfferBatch:
+    """
+    Columnar batch of offers for bulk scoring.
+
+    Each offer is one row; `item_index` says which item it belongs to. Prices
+    and discounts are float64 arrays, so effective price, unit price and the
+    per-item argmin/top-k are computed without touching the offer dicts,
+    which are only read back in `to_records` at the API edge. The derived
+    price columns are computed once per batch, on first use.
+    """
+    items: list[str]
+    item_index: np.ndarray
+    base_price: np.ndarray
+    gift_card_discount: np.ndarray
+    perk_value: np.ndarray
+    layer_discount: np.ndarray
+    coupon_value: np.ndarray
+    unit_quantity: np.ndarray
+    offers: list[dict]
+    unit_types: list[Optional[str]]
+
+    @classmethod
+    def from_offers(cls, offers_by_item: dict[str, list[dict]], plan: SavingsPlan,
+                    quantity: Optional[Callable[[dict, float], tuple]] = None,
+                    coupon_values: Optional[dict[str, float]] = None) -> "OfferBatch":
+        """
+        Builds a batch from raw offers grouped by item.
+
+        Args:
+            offers_by_item: Item name -> offers as returned by the shopping fetcher.
+            plan: The compiled savings plan for the user's cards.
+            quantity: Optional (offer, price) -> (total_quantity, unit_type) used for unit prices.
+            coupon_values: Optional store -> flat coupon value in dollars (any store spelling).
+        """
+        items, offers, item_index, prices = list(offers_by_item), [], [], []
+        for i, item in enumerate(items):
+            for offer in offers_by_item[item]:
+                try:
+                    price = float(offer.get("extracted_price"))
+                except (TypeError, ValueError):
+                    continue
+                offers.append(offer)
+                item_index.append(i)
+                prices.append(price)
+        n = len(offers)
+        canonical = get_store_index().canonical
+        stores = [canonical(offer.get("store")) for offer in offers]
+        gift_cards, store_perks = plan.gift_cards, plan.store_perks
+        gift_card_discount = np.fromiter(
+            ((gift_cards.get(s) or {}).get("discount", 0.0) for s in stores), dtype=np.float64, count=n
+        )
+        perk_value = np.fromiter(((store_perks.get(s) or {}).get("value", 0.0) for s in stores), np.float64, n)
+        layer_discount = np.zeros(n)
+        for _, discounts in plan.layers:
+            layer_keep = np.fromiter((1 - discounts.get(s, 0.0) for s in stores), np.float64, n)
+            layer_discount = 1 - (1 - layer_discount) * layer_keep
+        coupon_values = {canonical(store): value for store, value in (coupon_values or {}).items()}
+        coupon_value = np.fromiter((coupon_values.get(s, 0.0) for s in stores), np.float64, n)
+        unit_quantity = np.full(n, np.nan)
+        unit_types: list[Optional[str]] = [None] * n
+        if quantity is not None:
+            for row, (offer, price) in enumerate(zip(offers, prices)):
+                total_quantity, unit_type = quantity(offer, price)[:2]
+                if total_quantity:
+                    unit_quantity[row] = float(total_quantity)
+                    unit_types[row] = unit_type
+        return cls(
+            items, np.asarray(item_index, dtype=np.int64), np.asarray(prices, dtype=np.float64),
+            gift_card_discount, perk_value, layer_discount, coupon_value, unit_quantity, offers, unit_types,
+        )
+
+    def __len__(self):
+        return len(self.offers)
+
+    @cached_property
+    def effective_price(self) -> np.ndarray:
+        stacked = self.base_price * (1 - self.gift_card_discount) * (1 - self.perk_value) * (1 - self.layer_discount)
+        return np.maximum(stacked - self.coupon_value, 0.0)
+
+    @cached_property
+    def unit_price(self) -> np.ndarray:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unit_price = self.effective_price / self.unit_quantity
+        return np.where(np.isfinite(unit_price), unit_price, np.nan)
+
+    def _ranked(self, by: str) -> tuple[np.ndarray, np.ndarray]:
+        """Row order sorted by (item, score) with missing scores last, and each row's rank within its item."""
+        if by not in RANK_COLUMNS:
+            raise ValueError(f"Cannot rank by '{by}'; expected one of {RANK_COLUMNS}.")
+        score = getattr(self, by)
+        score = np.where(np.isnan(score), np.inf, score)
+        order = np.lexsort((score, self.item_index))
+        grouped = self.item_index[order]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]]) if len(order) else np.array([], np.int64)
+        group_start = np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return order, np.arange(len(order)) - group_start
+
+    def best(self, by: str = "effective_price") -> dict[str, Optional[int]]:
+        """Item -> row of its cheapest offer (None if the item has no priced offers)."""
+        return {item: rows[0] if rows else None for item, rows in self.top_k(1, by).items()}
+
+    def top_k(self, k: int, by: str = "effective_price") -> dict[str, list[int]]:
+        """Item -> rows of its `k` best offers, best first."""
+        order, rank = self._ranked(by)
+        keep = order[rank < k]
+        result: dict[str, list[int]] = {item: [] for item in self.items}
+        for row in keep.tolist():
+            result[self.items[self.item_index[row]]].append(row)
+        return result
+
+    def to_records(self, rows: list[int]) -> list[dict]:
+        """Materializes rows as JSON-ready dicts."""
+        effective_price, unit_price = self.effective_price, self.unit_price
+        records = []
+        for row in rows:
+            offer = self.offers[row]
+            records.append({
+                "store": offer.get("store"),
+                "title": offer.get("title"),
+                "link": offer.get("link"),
+                "base_price": float(self.base_price[row]),
+                "gift_card_discount": float(self.gift_card_discount[row]),
+                "credit_card_perk": float(self.perk_value[row]),
+                "coupon_value": float(self.coupon_value[row]),
+                "final_effective_price": round(float(effective_price[row]), 2),
+                "unit_type": self.unit_types[row],
+                "unit_price": None if np.isnan(unit_price[row]) else round(float(unit_price[row]), 4),
+            })
+        return records
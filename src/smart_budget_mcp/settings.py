@@ -0,0 +1,80 @@
+# src/smart_budget_mcp/settings.py
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+
+def _find_dotenv() -> Optional[Path]:
+    """`DOTENV_PATH`, else the first .env in the working directory or above this package."""
+    if os.getenv("DOTENV_PATH"):
+        return Path(os.environ["DOTENV_PATH"])
+    for directory in (Path.cwd(), *Path(__file__).resolve().parents):
+        candidate = directory / ".env"
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def load_env() -> Optional[Path]:
+    """
+    Loads the .env file into os.environ without overriding variables that are
+    already set. python-dotenv is only imported when there is a file to read.
+    """
+    path = _find_dotenv()
+    if path is None:
+        return None
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return None
+    load_dotenv(path)
+    return path
+
+
+# Loaded when this module is first imported, so importing it before modules that
+# read their own tuning variables at import time is enough for .env values to reach them.
+ENV_FILE = load_env()
+
+
+def _flag(name: str, default: bool) -> bool:
+    return os.getenv(name, "1" if default else "0").strip().lower() not in ("0", "false", "no", "off", "")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Process-wide configuration, read from the environment (and .env) once."""
+    serpapi_key: Optional[str]
+    serpapi_base_url: str
+    couponsapi_key: Optional[str]
+    affiliate_feed_url: Optional[str]
+    affiliate_feed_key: Optional[str]
+    catalog_csv_path: Optional[str]
+    couponapi_base_url: str
+    coupon_sync_enabled: bool
+    price_watch_enabled: bool
+    price_watch_webhook_url: Optional[str]
+    env_file: Optional[str]
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            serpapi_key=os.getenv("SERPAPI_KEY") or None,
+            serpapi_base_url=os.getenv("SERPAPI_BASE_URL", "https://serpapi.com").rstrip("/"),
+            couponsapi_key=os.getenv("COUPONSAPI_KEY") or None,
+            affiliate_feed_url=os.getenv("AFFILIATE_FEED_URL") or None,
+            affiliate_feed_key=os.getenv("AFFILIATE_FEED_KEY") or None,
+            catalog_csv_path=os.getenv("CATALOG_CSV_PATH") or None,
+            couponapi_base_url=os.getenv("COUPONAPI_BASE_URL", "https://couponapi.org"),
+            coupon_sync_enabled=_flag("COUPON_SYNC_ENABLED", True),
+            price_watch_enabled=_flag("PRICE_WATCH_ENABLED", True),
+            price_watch_webhook_url=os.getenv("PRICE_WATCH_WEBHOOK_URL") or None,
+            env_file=str(ENV_FILE) if ENV_FILE else None,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Reads settings from the environment (with .env already loaded) on first call."""
+    return Settings.from_env()
@@ -1,6 +1,259 @@
 # src/smart_budget_mcp/state.py
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
 
-wishlist = []
-groceries = []
-budget = {"monthly_limit": 0, "spent": 0, "history": []}
-user_profile = {"credit_cards": []} 
\ No newline at end of file
+DEFAULT_USER = "default"
+LISTS = ("wishlist", "groceries")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    credit_cards TEXT NOT NULL DEFAULT '[]',
+    monthly_limit INTEGER NOT NULL DEFAULT 0,
+    spent REAL NOT NULL DEFAULT 0,
+    history TEXT NOT NULL DEFAULT '[]',
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS list_items (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    fields TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS list_items_user ON list_items(user_id, list_name, id);
+CREATE INDEX IF NOT EXISTS list_items_name ON list_items(user_id, name_key);
+CREATE INDEX IF NOT EXISTS list_items_list ON list_items(list_name, name_key);
+"""
+
+
+def name_key(name: Optional[str]) -> str:
+    return (name or "").strip().lower()
+
+
+class StateStore:
+    """
+    Per-user profiles, budgets and wishlist/grocery lists in a SQLite file.
+
+    WAL mode lets every uvicorn worker open the same file. Each process keeps
+    a read-through LRU of user snapshots; it is dropped whenever SQLite's
+    `data_version` shows another connection committed, so workers never serve
+    each other's stale writes. Queries run in a worker thread so the event
+    loop is never blocked on disk. The version check on the event loop uses
+    its own connection and never waits on the write lock.
+    """
+
+    def __init__(self, path: str = os.getenv("STATE_STORE_PATH", "state.sqlite3"), max_cached_users: int = 1024):
+        self.path = path
+        self.max_cached_users = max_cached_users
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        # Read-only connection for PRAGMA data_version. It sees commits from
+        # every other connection, including this process's writer, and is never
+        # held across a write, so checking it can't stall the event loop.
+        self._version_conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._version_lock = threading.Lock()
+        # Guards `_cache` and `_data_version` only; held for dict operations, never for I/O.
+        self._cache_lock = threading.Lock()
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+        self._data_version = self._read_data_version()
+        self.hits = 0
+        self.misses = 0
+
+    # --- Snapshot cache ---
+    def _read_data_version(self) -> int:
+        with self._version_lock:
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cached(self, user_id: str) -> Optional[dict]:
+        version = self._read_data_version()
+        with self._cache_lock:
+            if version != self._data_version:
+                # Something committed; we can't tell which users changed.
+                self._cache.clear()
+                self._data_version = version
+            snapshot = self._cache.get(user_id)
+            if snapshot is not None:
+                self._cache.move_to_end(user_id)
+        return snapshot
+
+    def _remember(self, user_id: str, snapshot: dict, version: int):
+        with self._cache_lock:
+            if version != self._data_version:
+                # Loaded before a commit the cache has since seen; it may be stale.
+                return
+            self._cache[user_id] = snapshot
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_cached_users:
+                self._cache.popitem(last=False)
+
+    def _load_user(self, user_id: str) -> dict:
+        version = self._read_data_version()
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            items = self._conn.execute(
+                "SELECT list_name, fields FROM list_items WHERE user_id = ? ORDER BY id", (user_id,)
+            ).fetchall()
+            snapshot = {
+                "profile": {"credit_cards": json.loads(row["credit_cards"]) if row else []},
+                "budget": {
+                    "monthly_limit": row["monthly_limit"] if row else 0,
+                    "spent": row["spent"] if row else 0,
+                    "history": json.loads(row["history"]) if row else [],
+                },
+                **{list_name: [] for list_name in LISTS},
+            }
+            for item in items:
+                snapshot[item["list_name"]].append(json.loads(item["fields"]))
+            snapshot["by_name"] = _index_by_name(snapshot)
+        self._remember(user_id, snapshot, version)
+        return snapshot
+
+    async def snapshot(self, user_id: str) -> dict:
+        snapshot = self._cached(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        return await asyncio.to_thread(self._load_user, user_id)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        with self._cache_lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    # --- Reads ---
+    async def get_profile(self, user_id: str = DEFAULT_USER) -> dict:
+        return (await self.snapshot(user_id))["profile"]
+
+    async def get_budget(self, user_id: str = DEFAULT_USER) -> dict:
+        return (await self.snapshot(user_id))["budget"]
+
+    async def list_items(self, user_id: str, list_name: str) -> list[dict]:
+        return (await self.snapshot(user_id))[list_name]
+
+    async def find_items(self, user_id: str, names: Iterable[str]) -> dict[str, dict]:
+        """
+        Case-insensitive lookup of list items by name; wishlist entries win over
+        groceries, and the first entry added wins within a list.
+
+        Returns:
+            lowercased name -> item, only for names that were found.
+        """
+        keys = {name_key(name) for name in names}
+        snapshot = self._cached(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            by_name = snapshot["by_name"]
+            return {key: by_name[key] for key in keys if key in by_name}
+        self.misses += 1
+        return await asyncio.to_thread(self._find_items, user_id, keys)
+
+    def _find_items(self, user_id: str, keys: set[str]) -> dict[str, dict]:
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name_key, list_name, fields FROM list_items WHERE user_id = ? AND name_key IN ({placeholders})"
+                " ORDER BY id",
+                (user_id, *keys),
+            ).fetchall()
+        found: dict[str, dict] = {}
+        for list_name in LISTS:
+            for row in rows:
+                if row["list_name"] == list_name and row["name_key"] not in found:
+                    found[row["name_key"]] = json.loads(row["fields"])
+        return found
+
+    def all_items(self, list_name: str) -> list[tuple[int, str, dict]]:
+        """(item id, user id, item) for one list across every user, grouped by name. Blocking."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, user_id, fields FROM list_items WHERE list_name = ? ORDER BY name_key, id", (list_name,)
+            ).fetchall()
+        return [(row["id"], row["user_id"], json.loads(row["fields"])) for row in rows]
+
+    # --- Writes ---
+    def _write(self, user_id: str, sql: str, params: tuple):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO users (user_id, updated_at) VALUES (?, ?)", (user_id, time.time())
+                )
+                self._conn.execute(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.invalidate(user_id)
+
+    async def set_credit_cards(self, user_id: str, card_names: list[str]) -> dict:
+        await asyncio.to_thread(
+            self._write, user_id,
+            "UPDATE users SET credit_cards = ?, updated_at = ? WHERE user_id = ?",
+            (json.dumps(list(card_names)), time.time(), user_id),
+        )
+        return await self.get_profile(user_id)
+
+    async def set_monthly_limit(self, user_id: str, monthly_limit: int) -> dict:
+        await asyncio.to_thread(
+            self._write, user_id,
+            "UPDATE users SET monthly_limit = ?, updated_at = ? WHERE user_id = ?",
+            (monthly_limit, time.time(), user_id),
+        )
+        return await self.get_budget(user_id)
+
+    async def add_item(self, user_id: str, list_name: str, item: dict) -> list[dict]:
+        """Appends `item` (must have a "name") to a list and returns the updated list."""
+        if list_name not in LISTS:
+            raise ValueError(f"Unknown list '{list_name}'; expected one of {LISTS}.")
+        await asyncio.to_thread(
+            self._write, user_id,
+            "INSERT INTO list_items (user_id, list_name, name, name_key, fields, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, list_name, item["name"], name_key(item["name"]), json.dumps(item), time.time()),
+        )
+        return await self.list_items(user_id, list_name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            users = self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            items = self._conn.execute("SELECT COUNT(*) FROM list_items").fetchone()[0]
+        with self._cache_lock:
+            cached = len(self._cache)
+        return {"users": users, "list_items": items, "cached_users": cached,
+                "hits": self.hits, "misses": self.misses, "path": self.path}
+
+
+def _index_by_name(snapshot: dict) -> dict[str, dict]:
+    by_name: dict[str, dict] = {}
+    for list_name in LISTS:
+        for item in snapshot[list_name]:
+            by_name.setdefault(name_key(item.get("name")), item)
+    return by_name
+
+
+_state_store: Optional[StateStore] = None
+
+
+def get_state_store() -> StateStore:
+    global _state_store
+    if _state_store is None:
+        _state_store = StateStore()
+    return _state_store
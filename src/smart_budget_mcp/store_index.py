@@ -0,0 +1,169 @@
+# src/smart_budget_mcp/store_index.py
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, Optional
+
+_STORE_SUFFIX_RE = re.compile(r"\.(com|net|org|co|us)\b")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+# Minimum Dice similarity of character trigrams for a fuzzy match
+# ("safway" -> "safeway" scores 0.67, "fred meyers" -> "fred meyer" 0.86).
+FUZZY_THRESHOLD = float(os.getenv("STORE_FUZZY_THRESHOLD", 0.6))
+# Inputs shorter than this (without spaces) are only matched exactly or by prefix.
+FUZZY_MIN_CHARS = 4
+RESOLVE_CACHE_SIZE = int(os.getenv("STORE_RESOLVE_CACHE_SIZE", 8192))
+
+# Spellings no normalization recovers: normalized alias -> canonical store key.
+STORE_ALIASES = {
+    "quality food centers": "qfc",
+    "quality food center": "qfc",
+    "wally world": "walmart",
+}
+
+
+def normalize_store(name: Optional[str]) -> str:
+    """Lowercases and drops domain suffixes and punctuation: "Walmart.com" -> "walmart"."""
+    name = _STORE_SUFFIX_RE.sub("", (name or "").lower())
+    return _NON_WORD_RE.sub(" ", name).strip()
+
+
+def _extends(a: str, b: str) -> bool:
+    """Whether one name is the other plus more than a plural "s": "targeted"/"target", "safe"/"safeway"."""
+    short, long = sorted((a, b), key=len)
+    return long.startswith(short) and len(long) - len(short) > 1
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StoreIndex:
+    """
+    Resolves store names as offers spell them ("Walmart - Seattle",
+    "Target.com", "Fred Meyers") to one canonical key per known store.
+
+    Lookup order: exact on the normalized or space-less spelling, then the
+    longest known token prefix ("walmart seattle" -> "walmart"), then the
+    closest known name by character-trigram similarity over the whole name
+    and its whole-token prefixes. A fuzzy candidate that is just a longer or
+    shorter word than the input ("Targeted", "Safe Choice") is a different
+    store, not a typo. Each distinct input is resolved once; repeats are
+    answered from an LRU.
+    """
+
+    def __init__(self, stores: Iterable[str], aliases: Optional[dict[str, str]] = None,
+                 threshold: float = FUZZY_THRESHOLD, cache_size: int = RESOLVE_CACHE_SIZE):
+        self.threshold = threshold
+        self._exact: dict[str, str] = {}
+        names = {normalize_store(store): normalize_store(store) for store in stores}
+        for alias, store in (aliases or {}).items():
+            if normalize_store(store) in names:
+                names[normalize_store(alias)] = normalize_store(store)
+        names.pop("", None)
+        self.stores = frozenset(names.values())
+        # Space-less forms catch "Wal-Mart" / "FredMeyer" / "Uber Eats" spelled together.
+        for name, store in names.items():
+            self._exact[name] = store
+            self._exact.setdefault(name.replace(" ", ""), store)
+        self._max_tokens = max((len(name.split()) for name in names), default=0)
+        # Trigram postings over space-less names for the fuzzy pass.
+        self._entries: list[tuple[str, str, int]] = []
+        self._postings: dict[str, list[int]] = {}
+        for name, store in names.items():
+            compact = name.replace(" ", "")
+            grams = _trigrams(compact)
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(len(self._entries))
+            self._entries.append((store, compact, len(grams)))
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _fuzzy(self, text: str) -> tuple[Optional[str], float]:
+        grams = _trigrams(text)
+        overlap: Counter = Counter()
+        for gram in grams:
+            overlap.update(self._postings.get(gram, ()))
+        best, best_score = None, 0.0
+        for entry, shared in overlap.items():
+            store, compact, size = self._entries[entry]
+            if _extends(text, compact):
+                continue
+            score = 2 * shared / (len(grams) + size)
+            if score > best_score:
+                best, best_score = store, score
+        return best, best_score
+
+    def _resolve(self, name: Optional[str]) -> Optional[str]:
+        key = normalize_store(name)
+        if not key:
+            return None
+        store, how = self._exact.get(key) or self._exact.get(key.replace(" ", "")), "exact"
+        tokens = key.split()
+        if store is None:
+            how = "prefix"
+            for n in range(min(len(tokens) - 1, self._max_tokens), 0, -1):
+                prefix = " ".join(tokens[:n])
+                store = self._exact.get(prefix) or self._exact.get(prefix.replace(" ", ""))
+                if store is not None:
+                    break
+        if store is None:
+            # Try the whole name and each token prefix, so a typo survives a location suffix.
+            how, best_score = "fuzzy", 0.0
+            for n in range(len(tokens), 0, -1):
+                text = "".join(tokens[:n])
+                if len(text) < FUZZY_MIN_CHARS:
+                    break
+                candidate, score = self._fuzzy(text)
+                if score > best_score:
+                    store, best_score = candidate, score
+            if best_score < self.threshold:
+                store, how = None, "miss"
+        with self._lock:
+            self._counts[how] += 1
+        return store
+
+    def canonical(self, name: Optional[str]) -> str:
+        """The known store `name` resolves to, else its normalized spelling."""
+        return self.resolve(name) or normalize_store(name)
+
+    def stats(self) -> dict:
+        cache = self.resolve.cache_info()
+        return {
+            "stores": len(self.stores),
+            "names": len(self._exact),
+            # Per distinct input: how it was resolved.
+            "resolved": {how: self._counts[how] for how in ("exact", "prefix", "fuzzy", "miss")},
+            "cache_hits": cache.hits,
+            "cache_misses": cache.misses,
+            "cache_size": cache.currsize,
+        }
+
+
+_store_index: Optional[StoreIndex] = None
+
+
+def get_store_index() -> StoreIndex:
+    """The index over every store the savings layers know (perks, categories, gift cards)."""
+    global _store_index
+    if _store_index is None:
+        from .savings_engine import mock_credit_card_offers, mock_gift_card_deals, store_to_category_map
+        stores = set(store_to_category_map) | set(mock_gift_card_deals)
+        for card in mock_credit_card_offers.values():
+            stores.update(perk["store"] for perk in card["perks"] if perk.get("store"))
+        _store_index = StoreIndex(stores, STORE_ALIASES)
+    return _store_index
+
+
+def invalidate_store_index():
+    """Rebuilds the index on next use, e.g. after the perk or gift-card tables change."""
+    global _store_index
+    _store_index = None
+
+
+def canonical_store(name: Optional[str]) -> str:
+    return get_store_index().canonical(name)
@@ -0,0 +1,96 @@
+# src/smart_budget_mcp/workers.py
+import argparse
+import importlib.util
+import os
+from typing import Optional
+
+# Worker processes behind one listening socket. Read by the launcher and, in
+# each worker, by anything sized per process (upstream quotas, leader lock).
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+STATE_DIR = os.getenv("STATE_DIR", ".")
+
+# Leader election uses flock; without it (Windows) every worker is a leader,
+# so run background jobs in a single worker there.
+FCNTL_AVAILABLE = importlib.util.find_spec("fcntl") is not None
+
+# State every worker must see. All of it is SQLite in WAL mode, which several
+# processes can open at once; the shopping cache is in-process by default.
+SHARED_TIER = {
+    "SHOPPING_CACHE_BACKEND": "sqlite",
+    "SHOPPING_CACHE_PATH": "shopping_cache.sqlite3",
+    "LLM_CACHE_BACKEND": "sqlite",
+    "LLM_CACHE_PATH": "llm_cache.sqlite3",
+    "STATE_STORE_PATH": "state.sqlite3",
+    "COUPON_STORE_PATH": "coupons.sqlite3",
+    "PRICE_HISTORY_PATH": "price_history.sqlite3",
+    "PRICE_ALERTS_PATH": "price_alerts.sqlite3",
+}
+
+
+def use_shared_tier(state_dir: str = STATE_DIR):
+    """
+    Points every cache and store at SQLite files under `state_dir`, unless
+    already configured. Workers inherit the environment, so call this in the
+    launcher before they start.
+    """
+    for name, value in SHARED_TIER.items():
+        if name.endswith("_PATH"):
+            value = os.path.abspath(os.path.join(state_dir, value))
+        os.environ.setdefault(name, value)
+
+
+# --- Leader Election ---
+_leader_lock = None
+
+
+def is_leader() -> bool:
+    """
+    True in exactly one worker: the first to take an exclusive lock on
+    `<STATE_DIR>/workers.lock`. The lock is held for the life of the process
+    and released by the OS when it exits, so a restarted worker can take
+    over. Background jobs (coupon sync, price watch) run only in the leader.
+    """
+    global _leader_lock
+    if WORKERS == 1 or not FCNTL_AVAILABLE:
+        return True
+    if _leader_lock is None:
+        import fcntl
+        handle = open(os.path.join(STATE_DIR, "workers.lock"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        _leader_lock = handle
+    return True
+
+
+# --- Launcher ---
+def serve(argv: Optional[list[str]] = None):
+    """
+    Runs the HTTP app under uvicorn with `--workers` processes (default
+    WEB_CONCURRENCY or 1). With more than one worker, caches and state move
+    to the shared SQLite tier under `--state-dir`.
+    """
+    parser = argparse.ArgumentParser(prog="smart-budget-server", description=serve.__doc__)
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--state-dir", default=STATE_DIR)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    workers = max(1, args.workers)
+    os.makedirs(args.state_dir, exist_ok=True)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    os.environ["STATE_DIR"] = os.path.abspath(args.state_dir)
+    if workers > 1:
+        use_shared_tier(args.state_dir)
+
+    import uvicorn
+    uvicorn.run("smart_budget_mcp.main:app", host=args.host, port=args.port, workers=workers,
+                log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.cache import CacheEntry, MemoryBackend, SQLiteBackend, TTLCache  # noqa: E402
+
+
+async def run():
+    fetches = []
+
+    def fetcher(value, delay=0.02):
+        async def fetch():
+            fetches.append(value)
+            await asyncio.sleep(delay)
+            return value
+        return fetch
+
+    # 1. Concurrent misses share one fetch; a fresh entry is served without fetching.
+    cache = TTLCache(MemoryBackend(), ttl=0.1, stale_ttl=0.2)
+    results = await asyncio.gather(*(cache.get_or_fetch("milk", fetcher("v1")) for _ in range(5)))
+    assert results == ["v1"] * 5 and fetches == ["v1"]
+    assert await cache.get_or_fetch("milk", fetcher("v2")) == "v1" and fetches == ["v1"]
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1), stats
+
+    # 2. Past the TTL the stale value is served at once while one background refresh runs.
+    await asyncio.sleep(0.12)
+    assert await cache.get_or_fetch("milk", fetcher("v2")) == "v1"
+    assert await cache.get_or_fetch("milk", fetcher("v3")) == "v1"
+    await asyncio.sleep(0.05)
+    assert fetches == ["v1", "v2"]
+    assert await cache.get_or_fetch("milk", fetcher("v4")) == "v2"
+    assert cache.stats()["refreshes"] == 1
+
+    # 3. Past the stale window it is a plain miss again.
+    await asyncio.sleep(0.35)
+    assert await cache.get_or_fetch("milk", fetcher("v5")) == "v5"
+
+    # 4. Cancelling the first caller doesn't cancel the fetch the others are waiting on...
+    fetches.clear()
+    first = asyncio.ensure_future(cache.get_or_fetch("eggs", fetcher("e1", delay=0.05)))
+    await asyncio.sleep(0)
+    others = [asyncio.ensure_future(cache.get_or_fetch("eggs", fetcher("e2"))) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await asyncio.gather(*others) == ["e1", "e1"] and fetches == ["e1"]
+
+    # ...but once every caller is gone the fetch is cancelled and nothing is cached.
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.ensure_future(cache.get_or_fetch("bread", slow)) for _ in range(2)]
+    await started.wait()
+    for caller in callers:
+        caller.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert cache.stats()["in_flight"] == 0 and cache.backend.get("bread") is None
+
+    # 5. Errors reach every waiter and aren't cached; `should_cache` filters values.
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    outcomes = await asyncio.gather(*(cache.get_or_fetch("rice", failing) for _ in range(2)), return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) for o in outcomes) and cache.stats()["errors"] == 1
+    picky = TTLCache(MemoryBackend(), should_cache=bool)
+    assert await picky.get_or_fetch("empty", fetcher([])) == [] and picky.backend.get("empty") is None
+
+
+def test_backends():
+    now = time.time()
+    # 6. Both backends evict the least recently used entry past max_entries.
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in (MemoryBackend(max_entries=2), SQLiteBackend(os.path.join(tmp, "c.sqlite3"), 2, 0)):
+            for key in ("a", "b"):
+                backend.set(key, CacheEntry(key, now + 60, now + 120))
+                time.sleep(0.01)
+            assert backend.get("a").value == "a"  # "a" is now more recent than "b"
+            time.sleep(0.01)
+            backend.set("c", CacheEntry("c", now + 60, now + 120))
+            assert backend.get("b") is None and backend.get("a") is not None, type(backend).__name__
+            assert len(backend) == 2 and backend.evictions == 1
+            backend.delete("a")
+            assert backend.get("a") is None
+
+
+def test_cache():
+    asyncio.run(run())
+    test_backends()
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_cache()
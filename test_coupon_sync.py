@@ -0,0 +1,99 @@
+import asyncio
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+from stubs import CouponFeedReplay, couponapi_stub  # noqa: E402
+
+from smart_budget_mcp import http_client, savings_engine  # noqa: E402
+from smart_budget_mcp.coupon_store import CouponStore  # noqa: E402
+from smart_budget_mcp.coupon_sync import CouponSync  # noqa: E402
+from smart_budget_mcp.http_client import UpstreamClient, close_upstream_client  # noqa: E402
+
+
+async def run_sync(replay, db_path):
+    store = CouponStore(db_path)
+    sync = CouponSync(store, savings_engine.fetch_couponapi_feed)
+
+    # 1. First run: no watermark yet, so it asks for the initial one-year window.
+    first = await sync.sync_once()
+    print("sync 1:", first)
+    assert first["received"] == first["upserted"] == 4
+    assert sync.watermark is not None
+    assert [c["code"] for c in store.for_store("walmart", kind="coupon")] == ["PICKUP10"]
+
+    # 2. Delta: an update, a suspension and a new offer; only the watermark window is requested.
+    watermark = sync.watermark
+    second = await sync.sync_once()
+    print("sync 2:", second)
+    assert second["since"] == watermark - sync.overlap
+    assert store.for_store("target") == []
+    assert store.for_store("walmart.com", kind="deal")[0]["title"] == "Free shipping on $25+"
+
+    # 3. A failed fetch leaves the watermark where it was.
+    replay.fail_next = True
+    watermark = sync.watermark
+    try:
+        await sync.sync_once()
+        raise AssertionError("expected the stubbed 500 to fail the sync")
+    except Exception as e:
+        print("sync 3 failed as expected:", type(e).__name__)
+    assert sync.watermark == watermark
+    assert sync.stats()["failures"] == 1
+
+    # 4. Restart: a fresh CouponSync on the same file resumes from the persisted watermark.
+    restarted = CouponSync(CouponStore(db_path), savings_engine.fetch_couponapi_feed)
+    assert restarted.watermark == watermark
+    third = await restarted.sync_once()
+    print("sync 4:", third)
+    assert third["since"] == watermark - restarted.overlap
+    assert third["expired"] == 1
+    assert restarted.store.for_store("instacart")[0]["code"] == "FIRST10"
+
+    # 5. Replaying an already-applied page is idempotent.
+    before = restarted.store.stats()["offers"]
+    restarted.store.ingest(replay.pages[1]["offers"])
+    assert restarted.store.stats()["offers"] == before
+    print("stats:", restarted.stats())
+
+    # 6. The feed is decoded lazily, and an error payload only surfaces while iterating it.
+    offers = await savings_engine.fetch_couponapi_feed(0)
+    assert not isinstance(offers, list) and list(offers) == []
+    failed = savings_engine._iter_feed(io.BytesIO(b'{"result": false, "error": "Invalid API_KEY"}'))
+    try:
+        list(failed)
+        raise AssertionError("expected the error payload to raise")
+    except savings_engine.CouponFeedError as e:
+        assert str(e) == "Invalid API_KEY"
+
+
+async def run_and_close(replay, db_path):
+    try:
+        await run_sync(replay, db_path)
+    finally:
+        await close_upstream_client()
+
+
+def test_coupon_sync_against_stub():
+    # Point the CouponAPI integration at a local replay stub, restoring everything afterwards.
+    replay = CouponFeedReplay()
+    server = couponapi_stub(replay=replay).start()
+    saved = savings_engine.COUPONSAPI_KEY, savings_engine.COUPONAPI_BASE_URL, http_client._upstream_client
+    savings_engine.COUPONSAPI_KEY, savings_engine.COUPONAPI_BASE_URL = "stub-key", server.base_url
+    # No retries, so the stubbed 500 fails the sync at once.
+    http_client._upstream_client = UpstreamClient(retries=0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run_and_close(replay, os.path.join(tmp, "coupons.sqlite3")))
+    finally:
+        savings_engine.COUPONSAPI_KEY, savings_engine.COUPONAPI_BASE_URL, http_client._upstream_client = saved
+        server.stop()
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_coupon_sync_against_stub()
@@ -1,20 +1,22 @@
-import csv
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.coupon_store import get_coupon_store
 
 # Path to your downloaded CSV file
 csv_path = os.path.expanduser(r"~/Downloads/incremental_4878_20250722225203.csv")
 
-# Read and print all offers from the CSV
+# Stream the CSV export into the local coupon index (COUPON_STORE_PATH, default coupons.sqlite3)
+store = get_coupon_store()
 with open(csv_path, newline='', encoding='utf-8') as csvfile:
-    reader = csv.DictReader(csvfile)
-    offers = list(reader)
-    print(f"Total offers: {len(offers)}")
-    for offer in offers[:10]:  # Print first 10 offers for inspection
-        print(offer)
+    counts = store.ingest_csv(csvfile)
+print(f"Ingested: {counts}")
+print(f"Index: {store.stats()}")
 
-# You can now filter, analyze, or use these offers in memory for testing
-# Example: Find all offers for Walmart
-walmart_offers = [o for o in offers if 'walmart' in o.get('store', '').lower()]
+# Example: Find all offers for Walmart with an indexed store lookup
+walmart_offers = store.for_store("Walmart", limit=100)
 print(f"Walmart offers: {len(walmart_offers)}")
 for offer in walmart_offers[:5]:
     print(offer)
@@ -0,0 +1,126 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.http_client import UpstreamClient  # noqa: E402
+
+BODY = b'{"offers": [' + b",".join(b'{"id": %d}' % i for i in range(200)) + b"]}"
+
+
+class Upstream(ThreadingHTTPServer):
+    """Scripted upstream: each path fails its first `failures` requests, then answers 200."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.hits = Counter()
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] += 1
+            attempt = server.hits[self.path]
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        try:
+            if self.path == "/flaky" and attempt == 1:
+                self._send(503, b'{"error": "busy"}', {"Retry-After": "0"})
+            elif self.path == "/down":
+                self._send(503, b'{"error": "down"}')
+            elif self.path == "/dropped" and attempt == 1:
+                # Promise the whole body, send part of it, then hang up.
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(BODY)))
+                self.end_headers()
+                self.wfile.write(BODY[:100])
+                self.wfile.flush()
+                self.close_connection = True
+            else:
+                if self.path == "/slow":
+                    time.sleep(0.05)
+                self._send(200, BODY)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def run(upstream):
+    client = UpstreamClient(retries=2, backoff_base=0.01, per_host_limit=2, http2=False)
+    try:
+        # 1. A 503 is retried after its Retry-After, and the retry is counted per host.
+        resp = await client.get(f"{upstream.base_url}/flaky")
+        assert resp.status_code == 200 and upstream.hits["/flaky"] == 2
+        hosts = client.stats()["hosts"]
+        assert hosts["127.0.0.1"]["retries"] == 1 and hosts["127.0.0.1"]["requests"] == 2, hosts
+
+        # 2. Once retries run out the last error response is returned as is.
+        resp = await client.get(f"{upstream.base_url}/down")
+        assert resp.status_code == 503 and upstream.hits["/down"] == 3
+
+        # 3. A download whose connection drops mid-body is retried from the start.
+        sink = io.BytesIO()
+        resp = await client.download(f"{upstream.base_url}/dropped", sink)
+        assert resp.status_code == 200 and upstream.hits["/dropped"] == 2
+        assert sink.getvalue() == BODY
+        assert client.stats()["hosts"]["127.0.0.1"]["errors"] == 1
+
+        # 4. The per-host cap bounds concurrent requests to one host.
+        await asyncio.gather(*(client.get(f"{upstream.base_url}/slow") for _ in range(6)))
+        assert upstream.hits["/slow"] == 6 and upstream.peak <= 2, upstream.peak
+        assert client.stats()["hosts"]["127.0.0.1"]["in_flight"] == 0
+    finally:
+        await client.aclose()
+
+
+def test_http_client():
+    # Backoff: full jitter under the exponential cap, Retry-After honoured up to backoff_max.
+    client = UpstreamClient(backoff_base=0.25, backoff_max=4.0)
+    assert all(0 <= client._backoff(1) <= 0.5 for _ in range(50))
+    assert all(client._backoff(10) <= 4.0 for _ in range(50))
+    assert client._backoff(0, "2") == 2.0 and client._backoff(0, "120") == 4.0
+    assert client._backoff(0, "Wed, 21 Oct 2015 07:28:00 GMT") <= 0.25
+
+    upstream = Upstream()
+    thread = threading.Thread(target=upstream.serve_forever, daemon=True)
+    thread.start()
+    try:
+        asyncio.run(run(upstream))
+    finally:
+        upstream.shutdown()
+        upstream.server_close()
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_http_client()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.cache import MemoryBackend, SQLiteBackend  # noqa: E402
+from smart_budget_mcp.llm_extractor import EMPTY, LLMQuantityExtractor, extraction_key  # noqa: E402
+
+TITLE_RE = re.compile(r"(\d+)\. Title: '[^']*?(\d+)'")
+
+
+class Model:
+    """Stub model: answers each numbered title with its trailing number as the quantity."""
+
+    def __init__(self, skip=(), fail=False):
+        self.prompts = []
+        self.skip = set(skip)
+        self.fail = fail
+
+    def __call__(self, model, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise RuntimeError("model down")
+        items = [{"id": int(i), "total_quantity": float(n), "unit_type": "count", "unit_price": 1.0}
+                 for i, n in TITLE_RE.findall(prompt) if int(n) not in self.skip]
+        return json.dumps({"items": items})
+
+    def titles(self, prompt_index):
+        return len(TITLE_RE.findall(self.prompts[prompt_index]))
+
+
+async def extract_all(extractor, titles, price=3.0):
+    return await asyncio.gather(*(extractor.extract(title, price) for title in titles))
+
+
+async def run(tmp):
+    # 1. Concurrent misses go out as one prompt, and answers map back by id.
+    model = Model()
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(), chat=model)
+    titles = [f"eggs {n}" for n in (12, 18, 6, 24, 30)]
+    results = await extract_all(extractor, titles)
+    assert [r[0] for r in results] == [12.0, 18.0, 6.0, 24.0, 30.0]
+    assert len(model.prompts) == 1 and model.titles(0) == 5
+
+    # 2. Repeats are served from the memo; the key ignores case and spacing but not the price.
+    assert await extractor.extract("  EGGS   12 ", 3.0) == (12.0, "count", 1.0)
+    assert len(model.prompts) == 1
+    assert extraction_key("eggs 12", 3.0, "m") != extraction_key("eggs 12", 3.5, "m")
+    await extractor.extract("eggs 12", 3.5)
+    assert len(model.prompts) == 2
+
+    # 3. Identical in-flight titles share one slot in the prompt.
+    await extract_all(extractor, ["milk 1"] * 4)
+    assert model.titles(2) == 1
+    stats = extractor.stats()
+    assert (stats["hits"], stats["coalesced"]) == (1, 3), stats
+
+    # 4. Misses beyond batch_size are split into several prompts.
+    model = Model()
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(), chat=model, batch_size=2)
+    await extract_all(extractor, [f"rolls {n}" for n in range(1, 6)])
+    assert sorted(model.titles(i) for i in range(len(model.prompts))) == [1, 2, 2]
+    assert extractor.stats()["batches"] == 3
+    extractor.close()
+
+    # 5. Skipped ids and model errors come back empty and aren't cached.
+    model = Model(skip={2})
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(), chat=model)
+    assert await extract_all(extractor, ["bars 1", "bars 2"]) == [(1.0, "count", 1.0), EMPTY]
+    assert len(extractor.backend) == 1
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(), chat=Model(fail=True))
+    assert await extractor.extract("bars 3", 3.0) == EMPTY
+    assert extractor.stats()["errors"] == 1 and len(extractor.backend) == 0
+    assert await LLMQuantityExtractor(backend=MemoryBackend(), chat=None).extract("bars 4", 3.0) == EMPTY
+
+    # 6. The SQLite memo survives a restart.
+    path = os.path.join(tmp, "llm.sqlite3")
+    model = Model()
+    await LLMQuantityExtractor(backend=SQLiteBackend(path), chat=model).extract("cans 6", 3.0)
+    restarted = LLMQuantityExtractor(backend=SQLiteBackend(path), chat=model)
+    assert await restarted.extract("cans 6", 3.0) == (6.0, "count", 1.0)
+    assert len(model.prompts) == 1
+
+    # 7. A cancelled batch still releases its waiters, with nothing cached.
+    started, release = threading.Event(), threading.Event()
+
+    def hanging(model, prompt):
+        started.set()
+        release.wait(5)
+        return "{}"
+
+    extractor = LLMQuantityExtractor(backend=MemoryBackend(), chat=hanging)
+    waiters = asyncio.gather(extractor.extract("jam 1", 3.0), extractor.extract("jam 2", 3.0))
+    while not started.is_set():
+        await asyncio.sleep(0.005)
+    for task in list(extractor._batches):
+        task.cancel()
+    assert await asyncio.wait_for(waiters, 1) == [EMPTY, EMPTY]
+    assert not extractor._pending and len(extractor.backend) == 0
+    release.set()
+    extractor.close()
+
+
+def test_llm_extractor():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(tmp))
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_llm_extractor()
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.pipeline import ConcurrencyLimits, ShoppingListPipeline, Upstreams  # noqa: E402
+from smart_budget_mcp.quantity_parser import parse_quantity  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+
+STORES = ["Walmart", "Target", "QFC"]
+
+
+class Stubs:
+    """Upstream stubs that record call counts and the peak number of calls in flight."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = Counter()
+        self.in_flight = Counter()
+        self.peak = Counter()
+        self.insight_batches = []
+
+    async def _call(self, upstream, delay=None):
+        # The LLM extractor bounds itself, so only the other upstreams count toward the global limit.
+        tracked = [upstream] if upstream == "llm" else [upstream, "limited"]
+        self.calls[upstream] += 1
+        for name in tracked:
+            self.in_flight[name] += 1
+            self.peak[name] = max(self.peak[name], self.in_flight[name])
+        try:
+            await asyncio.sleep(self.delay if delay is None else delay)
+        finally:
+            for name in tracked:
+                self.in_flight[name] -= 1
+
+    async def fetch_offers(self, item_name, location, num):
+        # "slow" items finish last, so streaming order is predictable.
+        await self._call("serpapi", self.delay * (5 if item_name.startswith("slow") else 1))
+        return [{"store": STORES[i % len(STORES)], "title": f"{item_name} {i + 1} lb", "extracted_price": 2.0 + i}
+                for i in range(num)] + [{"store": "Walmart", "title": "unpriced"}]
+
+    async def extract_quantity(self, title, price):
+        await self._call("llm")
+        return 1.0, "count", price
+
+    async def fetch_coupons(self, store):
+        await self._call("coupons")
+        return [{"store": store, "code": "SAVE"}]
+
+    async def fetch_deals(self, store):
+        await self._call("coupons")
+        return []
+
+    def price_insights(self, offers, location):
+        self.insight_batches.append((threading.current_thread() is threading.main_thread(), len(offers)))
+        return [{"lowest_price": price} for _, _, price in offers]
+
+    def upstreams(self, **overrides):
+        return Upstreams(
+            fetch_offers=self.fetch_offers,
+            extract_quantity=self.extract_quantity,
+            fetch_coupons=self.fetch_coupons,
+            fetch_deals=self.fetch_deals,
+            compile_plan=compile_savings_plan,
+            **overrides,
+        )
+
+
+async def run():
+    items = [{"name": f"item {i}"} for i in range(8)]
+
+    # 1. Items and offers fan out, bounded globally and per upstream.
+    stubs = Stubs()
+    limits = ConcurrencyLimits(global_limit=4, per_upstream={"serpapi": 2, "coupons": 3})
+    pipeline = ShoppingListPipeline(stubs.upstreams(price_insights=stubs.price_insights), limits)
+    started = time.perf_counter()
+    results = await pipeline.analyze(items, "Seattle", 3, ["Chase Freedom"])
+    elapsed = time.perf_counter() - started
+    print(f"8 items: {elapsed * 1000:.0f} ms, peaks {dict(stubs.peak)}")
+    assert list(results) == [item["name"] for item in items]
+    assert stubs.peak["serpapi"] == 2 and stubs.peak["coupons"] <= 3 and stubs.peak["limited"] <= 4
+    assert stubs.calls["serpapi"] == 8 and stubs.calls["llm"] == 24
+    # A serial run would take at least 8 fetches + 24 extractions + 24 coupon calls.
+    assert elapsed < stubs.delay * (8 + 24 + 24) / 2
+
+    # 2. Unpriced offers are dropped, coupons are fetched once per store per request,
+    #    and price history is looked up once per item, off the event loop.
+    analysis = results["item 0"]
+    assert [o.title for o in analysis["all_deals"]] == ["item 0 1 lb", "item 0 2 lb", "item 0 3 lb"]
+    assert analysis["best_deal"] is analysis["all_deals"][0]
+    assert analysis["all_deals"][0].couponsapi_coupons == [{"store": "Walmart", "code": "SAVE"}]
+    assert stubs.calls["coupons"] == 2 * len(STORES)
+    assert stubs.insight_batches == [(False, 3)] * 8
+    assert analysis["all_deals"][1].price_history == {"lowest_price": 3.0}
+
+    # 3. Confident rule parses skip the LLM; the source is reported per offer.
+    stubs = Stubs()
+    pipeline = ShoppingListPipeline(stubs.upstreams(parse_quantity=parse_quantity), limits)
+    analysis = await pipeline.analyze_item("milk", "Seattle", 2, compile_savings_plan([]))
+    offer = analysis["all_deals"][0]
+    assert (offer.llm_total_quantity, offer.llm_unit_type, offer.quantity_source) == (16.0, "oz", "rules")
+    assert stubs.calls["llm"] == 0
+
+    # 4. Streaming yields the fastest items first and cancels the rest when the consumer stops.
+    stubs = Stubs()
+    pipeline = ShoppingListPipeline(stubs.upstreams(), limits)
+    stream = pipeline.analyze_stream([{"name": "slow item"}, {"name": "fast item"}], "Seattle", 1, [])
+    first, _ = await stream.__anext__()
+    assert first == "fast item"
+    await stream.aclose()
+    await asyncio.sleep(0)
+    assert stubs.in_flight["serpapi"] == 0
+
+
+def test_pipeline():
+    asyncio.run(run())
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_pipeline()
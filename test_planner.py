@@ -0,0 +1,56 @@
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+from bench_planner import make_lists  # noqa: E402
+from smart_budget_mcp.offers import AnalyzedOffer  # noqa: E402
+from smart_budget_mcp.planner import PurchasePlanner, delivery_fee, plan_items  # noqa: E402
+
+
+def brute_force(planner, budget):
+    """Best (value, total cost) over every skip-or-store choice per item."""
+    best = (0, 0.0)
+    items = planner.items
+    for combo in itertools.product(*([None, *item.options] for item in items)):
+        picked = [(item, store) for item, store in zip(items, combo) if store]
+        cost = sum(item.options[store].final_effective_price * item.units for item, store in picked)
+        cost += sum(planner.fees[store] for store in {store for _, store in picked})
+        value = sum(item.value for item, _ in picked)
+        if cost <= budget + 1e-9 and (value, -cost) > (best[0], -best[1]):
+            best = (value, cost)
+    return best
+
+
+def test_planner():
+    # 1. Delivery text to fee.
+    assert delivery_fee(AnalyzedOffer({"delivery": "Delivery $5.99"}, None)) == 5.99
+    assert delivery_fee(AnalyzedOffer({"delivery": "Free delivery over $35"}, None)) == 0.0
+    assert delivery_fee(AnalyzedOffer({}, None)) == 0.0
+
+    # 2. Small random plans match brute force, delivery fees included.
+    for seed in range(200):
+        rng = random.Random(seed)
+        stores = ["Walmart", "Target", "QFC", "Safeway"][:rng.randint(2, 4)]
+        wishlist, groceries, analyses = make_lists(rng, rng.randint(1, 6), stores, rng.randint(1, len(stores)))
+        planner = PurchasePlanner(plan_items(wishlist, groceries, analyses))
+        cheapest = sum(min(o.final_effective_price for o in item.options.values()) * item.units
+                       for item in planner.items)
+        budget = cheapest * rng.uniform(0.1, 1.2)
+        plan = planner.solve(budget)
+        value, cost = brute_force(planner, budget)
+        assert plan["value"] == value and abs(plan["total_cost"] - cost) < 0.01, (seed, plan, value, cost)
+        assert plan["total_cost"] <= round(budget, 2) + 0.01
+        assert len(plan["purchases"]) + len(plan["deferred"]) == len(planner.items)
+
+    # 3. Items without offers are deferred as such.
+    plan = PurchasePlanner(plan_items([{"name": "tv", "urgency": "high"}], [], {})).solve(100)
+    assert plan["deferred"][0]["reason"] == "no_offers" and plan["value"] == 0
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_planner()
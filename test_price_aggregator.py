@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.providers import CsvCatalogProvider, PriceAggregator, make_offer, title_fingerprint
+
+
+class StubProvider:
+    """Answers after `delay` seconds with fixed (store, title, price) rows, or raises."""
+
+    def __init__(self, name, rows, delay=0.0, deadline=0.2, fail=False):
+        self.name, self.rows, self.delay, self.deadline, self.fail = name, rows, delay, deadline, fail
+
+    async def search(self, query, location, num):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("stub failure")
+        return [make_offer(self.name, store, title, price) for store, title, price in self.rows][:num]
+
+
+CATALOG = """store,title,price,link
+QFC,Great Value Whole Milk 1 Gallon,$3.29,https://qfc.example/milk
+QFC,Organic Bananas,0.79,https://qfc.example/bananas
+Fred Meyer,Whole Milk Half Gallon,2.49,
+"""
+
+
+async def run(catalog_path):
+    # 1. Titles that differ only in case, punctuation, order and unit spelling share a fingerprint.
+    assert title_fingerprint("Great Value Whole Milk, 1 Gallon") == title_fingerprint("great value 1 gal WHOLE milk")
+    assert title_fingerprint("Eggs, 12 Count") == title_fingerprint("eggs dozen")
+    assert title_fingerprint("Whole Milk 1 gal") != title_fingerprint("Whole Milk 2 gal")
+
+    fast = StubProvider("serpapi", [("Walmart", "Great Value Whole Milk, 1 Gallon", 3.48),
+                                    ("Walmart.com", "great value whole milk 1 gal", 3.39),
+                                    ("Target", "Good & Gather Whole Milk 1gal", 3.59)])
+    slow = StubProvider("affiliate", [("Safeway", "Lucerne Whole Milk 1 Gallon", 3.99)], delay=1.0)
+    broken = StubProvider("broken", [], fail=True)
+    catalog = CsvCatalogProvider(catalog_path)
+
+    # 2. A slow provider costs at most its deadline; the rest come back, marked partial.
+    aggregator = PriceAggregator([fast, slow, broken, catalog])
+    started = time.perf_counter()
+    offers = await aggregator.search("whole milk", "Seattle", 20)
+    elapsed = time.perf_counter() - started
+    print(f"{len(offers)} offers in {elapsed * 1000:.0f} ms, partial={offers.partial}")
+    assert elapsed < 0.5
+    assert offers.partial
+    stores = sorted(o["store"] for o in offers)
+    # Walmart and Walmart.com list the same product: only the cheaper one is kept.
+    assert stores == ["Fred Meyer", "QFC", "Target", "Walmart.com"], stores
+    assert {o["provider"] for o in offers} == {"serpapi", "catalog"}
+    stats = aggregator.stats()
+    print("stats:", stats)
+    assert stats["providers"]["affiliate"]["timeouts"] == 1
+    assert stats["providers"]["broken"]["errors"] == 1
+    assert stats["deduplicated"] == 1
+
+    # 3. With every provider in time, the result is complete.
+    complete = await PriceAggregator([fast, catalog]).search("bananas", "Seattle", 20)
+    assert not complete.partial
+    assert [o["title"] for o in complete if o["provider"] == "catalog"] == ["Organic Bananas"]
+
+    # 4. The merge is cut to `num` after dedupe, keeping the cheapest offers.
+    offers = await PriceAggregator([fast, catalog]).search("whole milk", "Seattle", 2)
+    assert [(o["store"], o["extracted_price"]) for o in offers] == [("Fred Meyer", 2.49), ("QFC", 3.29)]
+    offers = await PriceAggregator([fast, catalog]).search("whole milk", "Seattle", 20)
+    assert [o["extracted_price"] for o in offers] == sorted(o["extracted_price"] for o in offers)
+
+
+def test_price_aggregator():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(CATALOG)
+        asyncio.run(run(path))
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_price_aggregator()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.price_watch import PriceWatch, QueueSink
+from smart_budget_mcp.state import StateStore
+
+
+class StubShopping:
+    """Serves a fixed price table per query and counts upstream calls."""
+
+    def __init__(self):
+        self.prices = {"milk": {"Walmart": 4.00, "Target": 4.50}, "eggs": {"QFC": 3.00}}
+        self.calls = []
+
+    async def __call__(self, query, location, num):
+        self.calls.append((query, location))
+        return [
+            {"store": store, "title": f"{query} 1 gal", "extracted_price": price, "link": f"https://{store}.example"}
+            for store, price in self.prices.get(query.lower(), {}).items()
+        ]
+
+
+async def run_watch(db_path):
+    state = StateStore(db_path)
+    # 100 users watching the same two products (one with a target, one without).
+    for i in range(100):
+        await state.add_item(f"user-{i}", "wishlist", {"name": "Milk", "location": "Seattle", "target_price": 3.50})
+        await state.add_item(f"user-{i}", "wishlist", {"name": "eggs ", "location": "seattle"})
+    # No location and no default: not watched.
+    await state.add_item("user-0", "wishlist", {"name": "TV"})
+
+    shopping, sink = StubShopping(), QueueSink()
+    watch = PriceWatch(state, shopping, [sink], interval=0)
+
+    # 1. First cycle: two upstream calls for 200 watched items, nothing under target yet.
+    first = await watch.run_once()
+    print("cycle 1:", first, "calls:", len(shopping.calls))
+    assert first == {"groups": 2, "watchers": 200, "alerts": 0}
+    assert len(shopping.calls) == 2
+
+    # 2. Nothing changed: no offers are re-evaluated.
+    evaluated = watch.stats()["offers_evaluated"]
+    await watch.run_once()
+    assert watch.stats()["offers_evaluated"] == evaluated
+
+    # 3. Walmart milk drops below target and QFC eggs drop 10%: one alert per watcher.
+    shopping.prices["milk"]["Walmart"] = 3.25
+    shopping.prices["eggs"]["QFC"] = 2.70
+    third = await watch.run_once()
+    print("cycle 3:", third)
+    assert third["alerts"] == 200
+    alerts = sink.for_user("user-7")
+    assert {(a["item"], a["reason"]) for a in alerts} == {("Milk", "target_price"), ("eggs", "price_drop")}
+
+    # 4. Same prices again: no duplicate alerts.
+    assert (await watch.run_once())["alerts"] == 0
+
+    # 5. A new watcher is evaluated against every current offer on its first cycle.
+    await state.add_item("late-user", "wishlist", {"name": "milk", "location": "Seattle", "target_price": 3.30})
+    fifth = await watch.run_once()
+    assert fifth["alerts"] == 1 and sink.for_user("late-user")[0]["price"] == 3.25
+    print("calls after 5 cycles:", len(shopping.calls), "stats:", watch.stats())
+    assert len(shopping.calls) == 10
+
+
+def test_price_watch_groups_and_alerts():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run_watch(os.path.join(tmp, "state.sqlite3")))
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_price_watch_groups_and_alerts()
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.quantity_parser import MIN_CONFIDENCE, normalize, parse_quantity  # noqa: E402
+
+# title -> (total quantity, base unit, rule); every row is confident enough to skip the LLM.
+CONFIDENT = {
+    "Coca-Cola 6 x 12 fl oz Cans": (72.0, "fl oz", "multipack"),
+    "Whole Milk, 1 gal, 128 fl oz": (128.0, "fl oz", "size"),
+    "Organic Whole Milk Half Gallon": (64.0, "fl oz", "size"),
+    "Sugar 1/2 lb": (8.0, "oz", "size"),
+    "Pasta 500g": (17.637, "oz", "size"),
+    "Greek Yogurt 32 oz (Pack of 2)": (64.0, "oz", "size_x_count"),
+    "Rice 2 lb, 2 ct": (64.0, "oz", "size_x_count"),
+    "Huggies Wipes 56 Wipes (Pack of 3)": (168.0, "count", "count_x_pack"),
+    "Bounty Paper Towels 12 Double Rolls": (12.0, "count", "count"),
+    "Large Eggs, 1 dozen": (12.0, "count", "count"),
+}
+
+# Titles whose size or multiplier is ambiguous go to the LLM.
+AMBIGUOUS = [
+    "Olive Oil 1 L or 500 ml",
+    "Nature Valley 2-pack 1.49 oz, 12 ct",
+    "Paper Plates 50 ct, 100 ct",
+]
+
+
+def test_quantity_parser():
+    # 1. Each rule normalizes to the base unit with a unit price.
+    for title, (quantity, unit, rule) in CONFIDENT.items():
+        parsed = parse_quantity(title, 6.0)
+        assert (parsed.total_quantity, parsed.unit_type, parsed.rule) == (quantity, unit, rule), (title, parsed)
+        assert parsed.confidence >= MIN_CONFIDENCE, (title, parsed)
+        assert parsed.unit_price == round(6.0 / quantity, 4)
+
+    # 2. Conflicting sizes or pack counts drop below the LLM threshold.
+    for title in AMBIGUOUS:
+        parsed = parse_quantity(title, 6.0)
+        assert parsed.confidence < MIN_CONFIDENCE, (title, parsed)
+
+    # 3. Nothing recognised, and no price means no unit price.
+    assert parse_quantity("Bananas").as_tuple() == (None, None, None)
+    assert parse_quantity("").confidence == 0.0
+    assert parse_quantity("Milk 1 gal").unit_price is None
+
+    # 4. The unit table.
+    assert normalize(2, "lbs") == (32.0, "oz")
+    assert normalize(1, "Fl. Oz.") == (1.0, "fl oz")
+    assert normalize(3, "pods") == (3, "count")
+    assert normalize(1, "furlong") is None
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_quantity_parser()
@@ -0,0 +1,67 @@
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from starlette.requests import Request  # noqa: E402
+
+from smart_budget_mcp import responses  # noqa: E402
+from smart_budget_mcp.responses import COMPRESS_MIN_BYTES, json_response, negotiate_encoding  # noqa: E402
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").lower().encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_responses():
+    # 1. Encoding negotiation by q-value; br wins ties only when brotli is installed.
+    brotli = responses.BROTLI_AVAILABLE
+    try:
+        responses.BROTLI_AVAILABLE = True
+        assert negotiate_encoding("gzip, deflate, br") == "br"
+        assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+        assert negotiate_encoding("*") == "br"
+        assert negotiate_encoding("*;q=0.2, br;q=0") == "gzip"
+        responses.BROTLI_AVAILABLE = False
+        assert negotiate_encoding("br, gzip;q=0.1") == "gzip"
+        assert negotiate_encoding("br") is None
+    finally:
+        responses.BROTLI_AVAILABLE = brotli
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity, gzip;q=0") is None
+    assert negotiate_encoding("gzip;q=oops") is None
+
+    # 2. Large bodies are compressed; small ones and clients that don't ask are not.
+    content = {"deals": [{"store": "QFC", "title": f"Whole Milk {i}", "price": 3.29} for i in range(100)]}
+    plain = json_response(request(), content)
+    assert "content-encoding" not in plain.headers and json.loads(plain.body) == content
+    assert len(plain.body) >= COMPRESS_MIN_BYTES
+    zipped = json_response(request(accept_encoding="gzip"), content)
+    assert zipped.headers["content-encoding"] == "gzip" and gzip.decompress(zipped.body) == plain.body
+    small = json_response(request(accept_encoding="gzip"), {"ok": True})
+    assert "content-encoding" not in small.headers
+
+    # 3. One weak ETag per JSON body, whatever the coding; a match answers 304 with no body.
+    etag = plain.headers["etag"]
+    assert etag.startswith('W/"') and zipped.headers["etag"] == etag
+    assert plain.headers["vary"] == "Accept-Encoding" and plain.headers["cache-control"] == "private, no-cache"
+    for if_none_match in (etag, etag[2:], f'"other", {etag}', "*"):
+        revalidated = json_response(request(if_none_match=if_none_match, accept_encoding="gzip"), content)
+        assert revalidated.status_code == 304 and revalidated.body == b"", if_none_match
+        assert revalidated.headers["etag"] == etag
+    changed = json_response(request(if_none_match=etag), {**content, "total": 1})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    # 4. Only 200s revalidate; extra headers and Vary pass through.
+    error = json_response(request(if_none_match="*"), {"error": "x"}, status_code=404,
+                          vary=("Accept-Encoding", "X-User-Id"), headers={"Server-Timing": "plan;dur=1"})
+    assert error.status_code == 404 and error.headers["vary"] == "Accept-Encoding, X-User-Id"
+    assert error.headers["server-timing"] == "plan;dur=1"
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_responses()
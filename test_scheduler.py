@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.scheduler import BACKGROUND, INTERACTIVE, Quota, UpstreamScheduler  # noqa: E402
+
+
+async def run():
+    loop_errors = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+    calls = []
+
+    def upstream(name, delay=0.01):
+        async def call():
+            calls.append(name)
+            await asyncio.sleep(delay)
+            return name
+        return call
+
+    # 1. Identical in-flight calls are merged into one upstream call.
+    scheduler = UpstreamScheduler({"p": None})
+    results = await asyncio.gather(*(scheduler.submit("p", "milk", upstream("milk")) for _ in range(5)))
+    assert results == ["milk"] * 5 and calls == ["milk"], calls
+    assert scheduler.stats()["p"]["deduped"] == 4
+
+    # 2. An interactive caller joining a queued background call on an unlimited lane just shares it.
+    for quotas in ({"p": None}, {}):
+        calls.clear()
+        scheduler = UpstreamScheduler(quotas)
+        background = asyncio.ensure_future(scheduler.submit("p", "eggs", upstream("eggs"), priority=BACKGROUND))
+        await asyncio.sleep(0)
+        interactive = await scheduler.submit("p", "eggs", upstream("eggs"), priority=INTERACTIVE)
+        assert interactive == "eggs" and await background == "eggs" and calls == ["eggs"]
+        assert scheduler._lanes["p"]._drainer is None
+
+    # 3. On a rate-limited lane, a queued background call joined by an interactive one is promoted
+    #    ahead of the other queued background calls.
+    calls.clear()
+    scheduler = UpstreamScheduler({"p": Quota(rate=50, burst=1)})
+    first = asyncio.ensure_future(scheduler.submit("p", "a", upstream("a"), priority=BACKGROUND))
+    queued = [asyncio.ensure_future(scheduler.submit("p", k, upstream(k), priority=BACKGROUND)) for k in "bcd"]
+    await asyncio.sleep(0.001)
+    promoted = asyncio.ensure_future(scheduler.submit("p", "d", upstream("d"), priority=INTERACTIVE))
+    await asyncio.gather(first, promoted, *queued)
+    assert calls == ["a", "d", "b", "c"], calls
+
+    # 4. When every caller of a shared call is cancelled, the upstream call is cancelled too.
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    scheduler = UpstreamScheduler({"p": None})
+    waiters = [asyncio.ensure_future(scheduler.submit("p", "slow", slow)) for _ in range(2)]
+    await started.wait()
+    waiters[0].cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+    waiters[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert not loop_errors, loop_errors
+
+
+def test_scheduler():
+    asyncio.run(run())
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_scheduler()
@@ -0,0 +1,60 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+from bench_scoring import synthetic_offers  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+from smart_budget_mcp.scoring import OfferBatch  # noqa: E402
+
+
+def scalar_ranking(offers, plan, coupon_values):
+    """Offer indexes of one item, cheapest first, from the scalar savings plan."""
+    scores = plan.score([offer["store"] for offer in offers], [offer["extracted_price"] for offer in offers])
+    prices = [max(score.final_price - coupon_values.get(offer["store"], 0.0), 0.0)
+              for offer, score in zip(offers, scores)]
+    return sorted(range(len(offers)), key=lambda i: (prices[i], i))
+
+
+def test_scoring():
+    # 1. best and top_k agree with the scalar savings-plan ranking, layers and coupons included.
+    offers_by_item = synthetic_offers(40, 12)
+    plan = compile_savings_plan(["Target RedCard", "Chase Freedom"]).with_layer("cashback", {"Costco": 0.02})
+    # Coupon stores may be spelled any way; the batch canonicalizes them.
+    batch = OfferBatch.from_offers(offers_by_item, plan, coupon_values={"walmart": 1.5, "QFC": 0.75})
+    best, top3 = batch.best(), batch.top_k(3)
+    for item, offers in offers_by_item.items():
+        ranking = scalar_ranking(offers, plan, {"Walmart": 1.5, "QFC": 0.75})
+        assert batch.offers[best[item]] is offers[ranking[0]], item
+        assert [batch.offers[row] for row in top3[item]] == [offers[i] for i in ranking[:3]], item
+
+    # 2. Derived columns are computed once per batch.
+    assert batch.effective_price is batch.effective_price and batch.unit_price is batch.unit_price
+
+    # 3. Unit-price ranking puts offers without a quantity last; unpriced offers are dropped.
+    offers = {"rice": [{"store": "QFC", "title": f"rice {n} lb", "extracted_price": p}
+                       for n, p in ((1, 2.0), (5, 6.0), (None, 1.0), (2, 5.0))]
+              + [{"store": "QFC", "title": "rice", "extracted_price": None}],
+              "empty": []}
+    quantities = {f"rice {n} lb": n for n in (1, 5, 2)}
+    batch = OfferBatch.from_offers(offers, compile_savings_plan([]),
+                                   quantity=lambda offer, price: (quantities.get(offer["title"]), "lb"))
+    assert len(batch) == 4
+    assert [batch.offers[row]["title"] for row in batch.top_k(4, by="unit_price")["rice"]] == \
+        ["rice 5 lb", "rice 1 lb", "rice 2 lb", "rice None lb"]
+    assert batch.best()["rice"] == 2 and batch.best()["empty"] is None
+    record = batch.to_records([1])[0]
+    assert (record["final_effective_price"], record["unit_price"], record["unit_type"]) == (6.0, 1.2, "lb")
+    assert batch.to_records([2])[0]["unit_price"] is None
+    try:
+        batch.top_k(1, by="title")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown rank column accepted")
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_scoring()
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.state import StateStore  # noqa: E402
+
+
+async def run(path):
+    store, other_worker = StateStore(path), StateStore(path)
+
+    # 1. Profiles, budgets and lists round-trip; unknown users get empty defaults.
+    assert await store.get_profile("nobody") == {"credit_cards": []}
+    assert (await store.set_credit_cards("u1", ["Chase Freedom"]))["credit_cards"] == ["Chase Freedom"]
+    assert (await store.set_monthly_limit("u1", 400))["monthly_limit"] == 400
+    await store.add_item("u1", "groceries", {"name": "Milk", "quantity": 2})
+    wishlist = await store.add_item("u1", "wishlist", {"name": "milk", "urgency": "high"})
+    assert [item["name"] for item in wishlist] == ["milk"]
+    try:
+        await store.add_item("u1", "pantry", {"name": "Rice"})
+        raise AssertionError("unknown list accepted")
+    except ValueError:
+        pass
+
+    # 2. Names match case-insensitively and the wishlist wins over groceries.
+    found = await store.find_items("u1", ["MILK", "bread"])
+    assert found == {"milk": {"name": "milk", "urgency": "high"}}, found
+    assert await store.list_items("u2", "wishlist") == []
+
+    # 3. Repeat reads come from the snapshot cache...
+    hits = store.hits
+    await store.get_budget("u1")
+    await store.find_items("u1", ["milk"])
+    assert store.hits == hits + 2
+
+    # ...until another worker commits, which is seen on the next read.
+    assert (await other_worker.get_profile("u1"))["credit_cards"] == ["Chase Freedom"]
+    await other_worker.set_credit_cards("u1", ["Amex Gold"])
+    assert (await store.get_profile("u1"))["credit_cards"] == ["Amex Gold"]
+    await other_worker.add_item("u1", "wishlist", {"name": "Eggs"})
+    assert "eggs" in await store.find_items("u1", ["eggs"])
+
+    # 4. The cache check on the event loop doesn't wait for a write in progress.
+    holding = threading.Event()
+
+    def slow_write():
+        with store._lock:
+            holding.set()
+            time.sleep(0.5)
+
+    writer = threading.Thread(target=slow_write)
+    writer.start()
+    holding.wait()
+    started = time.perf_counter()
+    store._cached("u1")
+    blocked = time.perf_counter() - started
+    writer.join()
+    print(f"cache check during a write: {blocked * 1000:.1f} ms")
+    assert blocked < 0.1
+
+
+def test_state_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "state.sqlite3")))
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_state_store()
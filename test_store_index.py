@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from smart_budget_mcp.coupon_store import CouponStore  # noqa: E402
+from smart_budget_mcp.savings_engine import fetch_gift_card_deals, get_credit_card_perks  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+from smart_budget_mcp.store_index import StoreIndex, get_store_index  # noqa: E402
+
+
+def test_store_index():
+    index = StoreIndex(["walmart", "target", "fred meyer", "safeway"], {"wally world": "walmart"})
+    # 1. Exact, space-less, prefix, fuzzy and alias spellings all land on one key.
+    cases = {
+        "Walmart.com": "walmart", "Wal-Mart": "walmart", "Walmart - Seattle": "walmart",
+        "FredMeyer": "fred meyer", "Fred Meyers - Bellevue": "fred meyer", "Safway": "safeway",
+        "Target Store #412": "target", "Wally World": "walmart",
+        "Walgreens": None, "Trader Joe's": None, "": None, None: None,
+        # Longer or shorter words are other merchants, not typos.
+        "Safe Choice": None, "Targeted": None, "Safe": None, "Walgreens Pharmacy": None,
+    }
+    for name, expected in cases.items():
+        assert index.resolve(name) == expected, (name, index.resolve(name))
+    assert index.canonical("Costco.com") == "costco"
+    # 2. Repeats come from the LRU.
+    index.resolve("Walmart - Seattle")
+    assert index.stats()["cache_hits"] >= 1
+
+    # 3. Perks, gift cards and stacked scores apply to decorated store names.
+    assert get_credit_card_perks("Target - Seattle", ["Target RedCard"])[0]["card"] == "Target RedCard"
+    assert get_credit_card_perks("Safeway Delivery", ["Chase Freedom"])[0]["category"] == "groceries"
+    assert asyncio.run(fetch_gift_card_deals("Target.com"))["discount"] == 0.04
+    score = compile_savings_plan(["Chase Freedom"]).score(["QFC - Seattle"], [10.0])[0]
+    assert score.perk is not None and round(score.final_price, 2) == 9.5
+
+    # 4. The coupon index resolves against the stores it holds.
+    with tempfile.TemporaryDirectory() as tmp:
+        coupons = CouponStore(os.path.join(tmp, "coupons.sqlite3"))
+        coupons.ingest([{"offer_id": "1", "store": "Walmart", "title": "$5 off", "code": "SAVE5",
+                         "end_date": "2099-12-31"}])
+        assert [c["code"] for c in coupons.for_store("Walmart - Seattle")] == ["SAVE5"]
+        coupons.ingest([{"offer_id": "2", "store": "Kroger", "title": "10% off", "end_date": "2099-12-31"}])
+        assert [c["offer_id"] for c in coupons.for_store("Kroger Marketplace")] == ["2"]
+        # Lookups reuse the key index; only a write that adds a store rebuilds it.
+        keys = coupons._stores
+        coupons.for_store("Target"), coupons.search("off", store="Walmart")
+        coupons.ingest([{"offer_id": "3", "store": "Walmart.com", "title": "$3 off", "end_date": "2099-12-31"}])
+        assert coupons._stores is keys
+        coupons.ingest([{"offer_id": "4", "store": "Target", "title": "$2 off", "end_date": "2099-12-31"}])
+        assert coupons._stores is not keys and "target" in coupons._stores.stores
+
+        # 5. Lookups don't wait for a sync batch holding the write lock.
+        holding = threading.Event()
+
+        def slow_write():
+            with coupons._lock:
+                holding.set()
+                time.sleep(0.5)
+
+        writer = threading.Thread(target=slow_write)
+        writer.start()
+        holding.wait()
+        started = time.perf_counter()
+        assert [c["code"] for c in coupons.for_store("Walmart", kind="coupon", limit=5)] == ["SAVE5"]
+        blocked = time.perf_counter() - started
+        writer.join()
+        assert blocked < 0.1, blocked
+        coupons._read_conn.close()
+        coupons._conn.close()
+    print("stats:", get_store_index().stats())
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_store_index()
@@ -0,0 +1,100 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from smart_budget_mcp import state  # noqa: E402
+from smart_budget_mcp.pipeline import ConcurrencyLimits, ShoppingListPipeline, Upstreams  # noqa: E402
+from smart_budget_mcp.savings_plan import compile_savings_plan  # noqa: E402
+
+# The package's `main` attribute is the CLI entry point, not the app module.
+main = importlib.import_module("smart_budget_mcp.main")
+
+
+async def fetch_offers(item_name, location, num):
+    # "slow" items finish last, so the stream order is predictable.
+    await asyncio.sleep(0.1 if item_name.startswith("slow") else 0.0)
+    return [{"store": "QFC", "title": f"{item_name} {i + 1}", "extracted_price": 2.0 + i, "thumbnail": "t.jpg"}
+            for i in range(num)]
+
+
+async def extract_quantity(title, price):
+    return 1.0, "count", price
+
+
+async def no_coupons(store):
+    return []
+
+
+def stub_pipeline():
+    # A fresh pipeline per request: each TestClient call runs on its own event loop.
+    return ShoppingListPipeline(
+        Upstreams(fetch_offers=fetch_offers, extract_quantity=extract_quantity, fetch_coupons=no_coupons,
+                  fetch_deals=no_coupons, compile_plan=compile_savings_plan),
+        ConcurrencyLimits(global_limit=4, per_upstream={}),
+    )
+
+
+def stream(client, **params):
+    main.pipeline = stub_pipeline()
+    resp = client.get("/shopping_list_value/stream",
+                      params={"items": ["slow tea", "milk"], "location": "Seattle", "num": 2, **params})
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["cache-control"] == "no-cache"
+    return resp
+
+
+def test_stream():
+    saved = main.pipeline, state._state_store
+    client = TestClient(main.app)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            state._state_store = state.StateStore(os.path.join(tmp, "state.sqlite3"))
+
+            # 1. NDJSON: one line per item, fastest first, then the done summary.
+            resp = stream(client)
+            assert resp.headers["content-type"].startswith("application/x-ndjson")
+            assert resp.text.endswith("\n")
+            lines = [json.loads(line) for line in resp.text.splitlines()]
+            assert [line.get("item") for line in lines] == ["milk", "slow tea", None]
+            assert lines[-1] == {"done": True, "items": 2}
+            milk = lines[0]
+            assert milk["offers"] == 2 and milk["best_deal"]["title"] == "milk 1"
+            assert "all_deals" not in milk and "thumbnail" not in milk["best_deal"]
+
+            # 2. detail adds every offer with its heavy fields; fields trims them.
+            milk = json.loads(stream(client, detail="true").text.splitlines()[0])
+            assert [o["title"] for o in milk["all_deals"]] == ["milk 1", "milk 2"]
+            assert milk["best_deal"]["thumbnail"] == "t.jpg"
+            milk = json.loads(stream(client, fields="title,final_effective_price").text.splitlines()[0])
+            assert set(milk["best_deal"]) == {"title", "final_effective_price"}
+
+            # 3. SSE: named events separated by blank lines, ending with done.
+            resp = stream(client, format="sse")
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            assert resp.text.endswith("\n\n")
+            events = []
+            for block in resp.text.split("\n\n")[:-1]:
+                event, data = block.split("\n")
+                assert event.startswith("event: ") and data.startswith("data: ")
+                events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+            assert [name for name, _ in events] == ["item", "item", "done"]
+            assert [payload.get("item") for _, payload in events[:2]] == ["milk", "slow tea"]
+            assert events[-1][1] == {"done": True, "items": 2}
+
+            # 4. Unknown formats are rejected before anything streams.
+            assert client.get("/shopping_list_value/stream",
+                              params={"items": "milk", "location": "Seattle", "format": "xml"}).status_code == 422
+    finally:
+        main.pipeline, state._state_store = saved
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_stream()
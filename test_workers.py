@@ -0,0 +1,88 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SRC = os.path.join(os.path.dirname(__file__), "src")
+sys.path.insert(0, SRC)
+
+from smart_budget_mcp.cache import CacheEntry, SQLiteBackend  # noqa: E402
+from smart_budget_mcp.coupon_store import CouponStore  # noqa: E402
+from smart_budget_mcp.llm_extractor import LLMQuantityExtractor  # noqa: E402
+from smart_budget_mcp.price_history import PriceHistory  # noqa: E402
+from smart_budget_mcp.price_watch import SQLiteSink  # noqa: E402
+
+LEADER_CHECK = "from smart_budget_mcp.workers import is_leader; import time; print(is_leader(), flush=True); time.sleep(1)"
+
+
+def test_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        # 1. Exactly one of several processes sharing a state dir is the leader.
+        env = {**os.environ, "PYTHONPATH": SRC, "WEB_CONCURRENCY": "3", "STATE_DIR": tmp}
+        procs = [subprocess.Popen([sys.executable, "-c", LEADER_CHECK], env=env, stdout=subprocess.PIPE, text=True)
+                 for _ in range(3)]
+        leaders = [p.communicate()[0].strip() for p in procs]
+        print("leaders:", leaders)
+        assert sorted(leaders) == ["False", "False", "True"]
+
+        # 2. Two backends on one file (two workers) see each other's entries.
+        path = os.path.join(tmp, "cache.sqlite3")
+        a, b = SQLiteBackend(path), SQLiteBackend(path)
+        now = time.time()
+        a.set("milk|seattle|10", CacheEntry([{"store": "QFC", "extracted_price": 3.29}], now + 60, now + 120))
+        assert b.get("milk|seattle|10").value[0]["store"] == "QFC"
+
+        # 3. Alerts written by the leader are served by any worker.
+        writer = SQLiteSink(os.path.join(tmp, "alerts.sqlite3"), maxlen=2)
+        reader = SQLiteSink(writer.path)
+        for i in range(3):
+            asyncio.run(writer({"user_id": "u1", "at": now + i, "title": f"drop {i}"}))
+        assert [a["title"] for a in reader.for_user("u1")] == ["drop 1", "drop 2"]
+        assert reader.for_user("u1", since=now + 1.5)[0]["title"] == "drop 2"
+        assert asyncio.run(reader.recent("u1")) == reader.for_user("u1")
+
+        # 4. Two workers recording the same product on the same day merge into one row.
+        path = os.path.join(tmp, "price_history.sqlite3")
+        first, second = PriceHistory(path), PriceHistory(path)
+        for history, price in ((first, 5.0), (second, 3.0), (first, 4.0)):
+            history.record([{"title": "Whole Milk", "store": "QFC", "extracted_price": price}], "Seattle", now=now)
+        row = first._conn.execute("SELECT min_price, median_price, samples FROM daily_prices").fetchone()
+        assert row == (3.0, 4.0, 3), row
+        assert second.lowest("Whole Milk", "QFC", "Seattle", now=now) == 3.0
+
+        # 5. A worker's coupon lookups pick up stores the sync leader ingested on its next lookup,
+        #    memoized or not.
+        path = os.path.join(tmp, "coupons.sqlite3")
+        leader, worker = CouponStore(path), CouponStore(path, memo_ttl=3600)
+        assert worker.for_store("Walmart - Seattle") == []
+        leader.ingest([{"offer_id": "1", "store": "Walmart", "title": "$5 off", "code": "SAVE5",
+                        "end_date": "2099-12-31"}])
+        assert [c["code"] for c in leader.for_store("Walmart - Seattle")] == ["SAVE5"]
+        assert [c["code"] for c in worker.for_store("Walmart - Seattle")] == ["SAVE5"]
+
+    # 6. Model calls run on the extractor's own bounded pool, not the default executor.
+    threads = set()
+
+    def chat(model, prompt):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return '{"items": [{"id": 1, "total_quantity": 1, "unit_type": "gal", "unit_price": 3.0}]}'
+
+    async def run():
+        extractor = LLMQuantityExtractor(backend=SQLiteBackend(":memory:"), chat=chat, batch_size=1,
+                                         max_concurrency=2)
+        results = await asyncio.gather(*(extractor.extract(f"milk {i}", 3.0) for i in range(6)))
+        extractor.close()
+        return results
+
+    assert all(r[1] == "gal" for r in asyncio.run(run()))
+    print("llm threads:", sorted(threads))
+    assert len(threads) <= 2 and all(name.startswith("llm") for name in threads)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    test_workers()